@@ -749,4 +749,51 @@ INSERT IGNORE INTO `settings` (`setting_key`, `setting_value`, `description`) VA
 ('master_scans_hold_open', '3', 'Number of consecutive master card scans required to enter hold-open state'),
 ('master_scans_release_hold', '1', 'Number of master card scans required to release any hold state');
 
+-- --------------------------------------------------------
+-- Reader health (controller heartbeat)
+-- --------------------------------------------------------
+
+-- reader_health: JSON per-reader supervisor state, reset counts and time-to-recover
+SET @exist := (SELECT COUNT(*) FROM information_schema.columns WHERE table_schema = DATABASE() AND table_name = 'doors' AND column_name = 'reader_health');
+SET @sqlstmt := IF(@exist = 0, 'ALTER TABLE `doors` ADD COLUMN `reader_health` longtext DEFAULT NULL AFTER `status_led_config`', 'SELECT 1');
+PREPARE stmt FROM @sqlstmt;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- --------------------------------------------------------
+-- Command sequence numbers (push-first command delivery)
+-- --------------------------------------------------------
+
+-- command_seq: bumped by the server for every unlock/hold/release sent to the door
+SET @exist := (SELECT COUNT(*) FROM information_schema.columns WHERE table_schema = DATABASE() AND table_name = 'doors' AND column_name = 'command_seq');
+SET @sqlstmt := IF(@exist = 0, 'ALTER TABLE `doors` ADD COLUMN `command_seq` int(10) unsigned NOT NULL DEFAULT 0 AFTER `hold_requested`', 'SELECT 1');
+PREPARE stmt FROM @sqlstmt;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- command_time: when command_seq was last bumped (the controller ignores stale unlocks)
+SET @exist := (SELECT COUNT(*) FROM information_schema.columns WHERE table_schema = DATABASE() AND table_name = 'doors' AND column_name = 'command_time');
+SET @sqlstmt := IF(@exist = 0, 'ALTER TABLE `doors` ADD COLUMN `command_time` datetime DEFAULT NULL AFTER `command_seq`', 'SELECT 1');
+PREPARE stmt FROM @sqlstmt;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- command_ack: highest command_seq the controller has acted on
+SET @exist := (SELECT COUNT(*) FROM information_schema.columns WHERE table_schema = DATABASE() AND table_name = 'doors' AND column_name = 'command_ack');
+SET @sqlstmt := IF(@exist = 0, 'ALTER TABLE `doors` ADD COLUMN `command_ack` int(10) unsigned NOT NULL DEFAULT 0 AFTER `command_seq`', 'SELECT 1');
+PREPARE stmt FROM @sqlstmt;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- --------------------------------------------------------
+-- Cache versions (server-pushed cache deltas)
+-- --------------------------------------------------------
+
+-- cache_version: bumped for every card/schedule/holiday change pushed to the door
+SET @exist := (SELECT COUNT(*) FROM information_schema.columns WHERE table_schema = DATABASE() AND table_name = 'doors' AND column_name = 'cache_version');
+SET @sqlstmt := IF(@exist = 0, 'ALTER TABLE `doors` ADD COLUMN `cache_version` int(10) unsigned NOT NULL DEFAULT 0 AFTER `command_ack`', 'SELECT 1');
+PREPARE stmt FROM @sqlstmt;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
 COMMIT;
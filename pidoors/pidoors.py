@@ -28,16 +28,21 @@ if _install_dir not in sys.path:
     sys.path.insert(0, _install_dir)
 
 import RPi.GPIO as GPIO
+import bisect
+import gc
+import hashlib
+import hmac
 import time
 import signal
 import json
+import random
 import threading
 import syslog
 import socket
 import fcntl
 import subprocess
-import hmac
 import tempfile
+from collections import deque
 
 # Try to import optional dependencies
 try:
@@ -55,6 +60,19 @@ except ImportError:
     FORMAT_REGISTRY_AVAILABLE = False
     print("Warning: Format registry not available. Using legacy format support.")
 
+# Import the reader dispatcher. Driver modules (and pyserial/smbus2/spidev)
+# are only imported when a configured reader of that type is created.
+try:
+    from readers import CardDispatcher, ReaderStatus, credential_key
+    READERS_AVAILABLE = True
+except ImportError as e:
+    READERS_AVAILABLE = False
+    print(f"Warning: Reader modules not available ({e}). Card reading disabled.")
+
+    def credential_key(facility, user_id):
+        """Canonical interned "facility,user_id" card key"""
+        return sys.intern(f"{facility},{user_id}")
+
 # Version
 def _read_version():
     """Read version from VERSION file, fallback to 'unknown'"""
@@ -78,12 +96,30 @@ CUSTOM_FORMATS_FILE = os.path.join(CONF_DIR, 'formats.json')
 SSL_CA_PATH = os.path.join(CONF_DIR, 'ca.pem')
 SSL_CA_STALE_PATH = os.path.join(CONF_DIR, 'ca.pem.stale')
 CACHE_DURATION = 86400  # 24 hours in seconds
+# Server-pushed cache deltas are appended to a journal beside the cache file;
+# the cache file is rewritten (and the journal emptied) after this many.
+CACHE_JOURNAL_COMPACT = 100
+CACHE_DELTA_HISTORY = 64  # Applied deltas kept to replay over a full sync in flight
 # Default heartbeat fallback. The EFFECTIVE interval is read at runtime from the
 # server-provided door/global settings (see get_heartbeat_interval) so it stays
 # in sync with the server's offline threshold (3x heartbeat_interval) and
 # healthy doors don't flap offline. This value is only used until settings load.
 HEARTBEAT_INTERVAL = 300  # seconds (fallback only)
+# Heartbeats and full syncs run at per-door offsets (a hash of the zone name)
+# plus random jitter, so doors that boot together do not hit the DB together.
+HEARTBEAT_JITTER = 0.1  # each beat lands up to +/- this fraction of the interval off its slot
+SYNC_INTERVAL = 3600  # seconds between full cache syncs
+SYNC_WINDOW = 3600  # seconds the fleet's syncs are spread across (zone config "sync_window")
+SYNC_JITTER = 60  # seconds a sync may land after its slot
+BOOT_SPREAD = 20  # seconds the first heartbeat and sync after boot are spread across
 DB_RETRY_INTERVAL = 30  # seconds
+# Remote commands arrive by push; the DB is only swept for ones a push missed.
+COMMAND_RECONCILE_INTERVAL = 60  # seconds between sweeps while the push listener is up
+COMMAND_DEDUP_WINDOW = 600  # seconds a command_seq is remembered for duplicate detection
+COMMAND_MAX_AGE = 10  # seconds a remote unlock left for the sweep is still acted on
+# Door state is written to the server only when it changes, plus a full
+# rewrite this often to correct anything that drifted on the server side.
+STATE_FULL_REFRESH = 900  # seconds
 # Master cards are persistent emergency credentials. If the DB is unreachable we
 # fail OPEN on them (emergency access must work during an outage) — but only for
 # a BOUNDED window. A master card that has not been re-verified against the DB
@@ -95,10 +131,8 @@ MASTER_CARD_MAX_STALE_DAYS = 7
 # Global variables
 zone = None
 config = None
-last_card = None
 zone_by_pin = {}
-repeat_read_count = 0
-repeat_read_timeout = time.time()
+repeat_reads = {}  # Per-reader repeat swipe tracking: {reader: {'user_id', 'count', 'expires'}}
 db_connected = False
 last_db_attempt = 0
 ssl_mode = None  # None = not yet connected, 'tls' = verified TLS (the only allowed mode)
@@ -110,6 +144,7 @@ running = True
 door_unlocked = False  # Real-time lock state tracking
 master_cards = {}  # Persistent master cards (never expire)
 format_registry = None  # Wiegand format registry
+card_dispatcher = None  # CardDispatcher owning every configured reader
 door_sensor_open = None  # Current door sensor state (None/True/False)
 current_sensor_pin = None  # Currently active door sensor GPIO pin
 
@@ -138,10 +173,13 @@ master_scans_release_hold = 1
 # Thread locks for shared state
 state_lock = threading.Lock()  # For db_connected, last_db_attempt, cache_last_sync
 cache_lock = threading.Lock()  # For local_cache access
-card_lock = threading.Lock()   # For last_card, repeat_read_count, repeat_read_timeout
+card_lock = threading.Lock()   # For repeat_reads
 master_lock = threading.Lock() # For master_cards access
-wiegand_lock = threading.Lock() # For legacy Wiegand stream access
 gate_lock = threading.Lock()   # For gate state mutations
+command_lock = threading.Lock()  # For command sequence and delivery counters
+snapshot_lock = threading.Lock()  # For server_state, server_state_time, state_stats
+hold_lock = threading.RLock()     # For the held-open state (zone_config['unlocked'])
+journal_lock = threading.Lock()   # For the cache file and its delta journal
 
 
 def _try_db_connect(kwargs):
@@ -164,7 +202,7 @@ def _try_db_connect(kwargs):
     return pymysql.connect(**kw)
 
 
-def get_db_connection(timeout=5):
+def get_db_connection(timeout=5, autocommit=False):
     """
     Create a verified-TLS database connection, or fail closed.
 
@@ -205,10 +243,13 @@ def get_db_connection(timeout=5):
         'password': sqlpass,
         'database': sqldb,
         'connect_timeout': timeout,
+        'autocommit': autocommit,
     }
 
+    started = time.perf_counter()
     try:
         conn = _try_db_connect(kwargs)
+        metric_observe('pidoors_db_connect_seconds', DB_CONNECT_BUCKETS, time.perf_counter() - started)
         if ssl_mode != 'tls':
             ssl_mode = 'tls'
             report("TLS: connected to DB with verified certificate")
@@ -216,6 +257,7 @@ def get_db_connection(timeout=5):
     except Exception as e:
         # Any failure (including TLS/cert errors) is a HARD failure. We do not
         # downgrade to cleartext. Propagate so callers handle it as DB-down.
+        metric_inc('pidoors_db_connect_failures_total')
         debug(f"TLS: verified DB connection failed: {e}")
         raise
 
@@ -246,6 +288,7 @@ def initialize():
     GPIO.setmode(GPIO.BCM)
     GPIO.setwarnings(False)
     syslog.openlog("accesscontrol", syslog.LOG_PID, syslog.LOG_AUTH)
+    start_metrics()
 
     report("Initializing PiDoors Access Control")
 
@@ -293,8 +336,8 @@ def initialize():
     # Start push listener (HTTPS server for instant commands from server)
     start_push_listener()
 
-    # Sync cache from server
-    sync_cache_from_server()
+    # The first cache sync is made by the heartbeat thread, at this door's
+    # offset within BOOT_SPREAD
 
     report(f"{zone} access control is online (IP: {myip}, version: {VERSION})")
 
@@ -312,34 +355,12 @@ def debug(message):
         print(f"[{timestamp}] {message}")
 
 
-def _reseed_reader_runtime_keys():
-    """Re-add the per-reader runtime keys that setup_readers injects.
-
-    read_configs() reloads config.json from disk, which REPLACES the global
-    `config` dict with fresh reader dicts that lack the runtime keys
-    setup_readers added ("stream", "timer", "name", "unlocked"). Without these,
-    the next Wiegand pulse KeyErrors inside the GPIO callback (data_pulse /
-    wiegand_stream_done) and kills the shared event thread. Re-seed them so the
-    readers keep working after a SIGHUP rehash. Pins are unchanged, so we do NOT
-    re-register GPIO edge detection here."""
-    for name in config:
-        if name == "<zone>" or not isinstance(config[name], dict):
-            continue
-        reader = config[name]
-        if reader.get("d0") and reader.get("d1"):
-            reader.setdefault("stream", "")
-            reader.setdefault("timer", None)
-            reader["name"] = name
-            reader.setdefault("unlocked", False)
-
-
 def rehash(sig=None, frame=None):
     """Reload configurations and sync cache"""
     report("Rehashing configuration")
     read_configs()
-    # read_configs replaced the global config; restore reader runtime keys so the
-    # Wiegand GPIO callbacks don't KeyError on the next scan.
-    _reseed_reader_runtime_keys()
+    # Readers keep the config they were created with (pins don't change on a
+    # rehash), so nothing needs re-seeding here.
     sync_cache_from_server()
 
 
@@ -423,6 +444,13 @@ def load_cache():
                     # Legacy format: full cache nested under 'cards' key
                     local_cache = cache_data.get('cards', {})
 
+                # Intern card keys so lookups by CardRead.key hit by identity
+                if isinstance(local_cache.get('cards'), dict):
+                    local_cache['cards'] = {sys.intern(k): v for k, v in local_cache['cards'].items()}
+
+                # Deltas pushed since the file was last written
+                replay_cache_journal()
+
                 # Check if cache is still valid (within 24 hours)
                 if time.time() - cache_last_sync > CACHE_DURATION:
                     report("Local cache expired (>24 hours old)")
@@ -435,21 +463,34 @@ def load_cache():
         cache_last_sync = 0
 
 
-def save_cache():
-    """Save the local access cache to disk"""
-    global cache_last_sync
+def save_cache(sync_time=None):
+    """
+    Save the local access cache to disk and empty the delta journal.
+
+    sync_time defaults to now (a full sync). Journal compaction passes the
+    existing sync time, so applying deltas never extends the 24-hour validity
+    of a cache that has not been fully synced.
+    """
+    global cache_last_sync, cache_journal_entries
     cache_file = get_cache_file()
 
     try:
-        # Save local_cache structure (cards, schedules, holidays, door_settings)
-        # with metadata at the same level
-        cache_data = dict(local_cache)
-        cache_data['zone'] = zone
-        cache_data['sync_time'] = time.time()
-        cache_data['sync_datetime'] = datetime.now().isoformat()
-        save_json(cache_file, cache_data)
+        with journal_lock:
+            # Save local_cache structure (cards, schedules, holidays, door_settings)
+            # with metadata at the same level
+            with cache_lock:
+                cache_data = dict(local_cache)
+            cache_data['zone'] = zone
+            cache_data['sync_time'] = time.time() if sync_time is None else sync_time
+            cache_data['sync_datetime'] = datetime.fromtimestamp(cache_data['sync_time']).isoformat()
+            save_json(cache_file, cache_data)
+            try:
+                os.remove(get_cache_journal_file())
+            except FileNotFoundError:
+                pass
+            cache_journal_entries = 0
         cache_last_sync = cache_data['sync_time']
-        debug(f"Cache saved with {len(local_cache.get('cards', {}))} cards")
+        debug(f"Cache saved with {len(cache_data.get('cards', {}))} cards")
     except Exception as e:
         report(f"Error saving cache: {e}")
 
@@ -479,7 +520,7 @@ def load_master_cards():
             with open(MASTER_CARDS_FILE, 'r') as f:
                 data = json.load(f)
                 with master_lock:
-                    master_cards = data.get('cards', {})
+                    master_cards = {sys.intern(k): v for k, v in data.get('cards', {}).items()}
                 card_count = len(master_cards)
                 if card_count > 0:
                     report(f"Loaded {card_count} master cards from persistent storage")
@@ -503,11 +544,14 @@ def save_master_cards():
         report(f"Error saving master cards: {e}")
 
 
-def sync_master_cards_from_db(cursor):
+def sync_master_cards_from_db(cursor, version=None):
     """
     Sync master cards from database.
     Called during cache sync - updates local persistent storage.
     Removes cards that have been deleted from the database.
+
+    version is the cache_version the sync read its snapshot at; master card
+    changes from deltas applied since then are re-applied over the snapshot.
     """
     global master_cards
 
@@ -521,7 +565,7 @@ def sync_master_cards_from_db(cursor):
         now_ts = time.time()
         new_master_cards = {}
         for mc in db_master_cards:
-            key = f"{mc['facility']},{mc['user_id']}"
+            key = credential_key(mc['facility'], mc['user_id'])
             new_master_cards[key] = {
                 'card_id': mc['card_id'],
                 'user_id': mc['user_id'],
@@ -545,6 +589,14 @@ def sync_master_cards_from_db(cursor):
 
             master_cards = new_master_cards
 
+            # A delta pushed while this sync ran is newer than its snapshot
+            if version is not None:
+                with cache_lock:
+                    pending = [changes for delta_version, changes in cache_delta_history
+                               if delta_version > version]
+                for changes in pending:
+                    _merge_master_changes(changes, now_ts)
+
         save_master_cards()
         debug(f"Master cards synced: {len(new_master_cards)} active cards")
 
@@ -568,7 +620,7 @@ def verify_master_card_in_db(cursor, facility, user_id, card_id):
         if result and result.get('active', 0) == 1:
             # Successful online verification — refresh the local freshness stamp
             # so the bounded fail-open window restarts from now.
-            key = f"{facility},{user_id}"
+            key = credential_key(facility, user_id)
             with master_lock:
                 if key in master_cards:
                     master_cards[key]['last_verified'] = time.time()
@@ -577,7 +629,7 @@ def verify_master_card_in_db(cursor, facility, user_id, card_id):
 
         # Card not found or inactive - remove from local storage (fail SECURE:
         # an explicit revocation seen while online takes effect immediately).
-        key = f"{facility},{user_id}"
+        key = credential_key(facility, user_id)
         with master_lock:
             if key in master_cards:
                 report(f"Master card revoked: {key}")
@@ -593,9 +645,11 @@ def verify_master_card_in_db(cursor, facility, user_id, card_id):
         return True
 
 
-def is_master_card(facility, user_id):
-    """Check if a card is a master card (from local persistent storage)"""
-    key = f"{facility},{user_id}"
+def is_master_card(facility, user_id, key=None):
+    """Check if a card is a master card (from local persistent storage).
+    key is the card's precomputed credential_key(), when the caller has it."""
+    if key is None:
+        key = credential_key(facility, user_id)
     with master_lock:
         return master_cards.get(key)
 
@@ -618,12 +672,15 @@ def master_card_locally_expired(master_info):
         return True  # Unparseable timestamp -> fail secure
 
 
-def get_master_card_info(facility, user_id):
-    """Get master card info if exists"""
-    key = f"{facility},{user_id}"
+def get_master_card_info(facility, user_id, key=None):
+    """Get master card info if exists.
+    key is the card's precomputed credential_key(), when the caller has it."""
+    if key is None:
+        key = credential_key(facility, user_id)
     with master_lock:
-        if key in master_cards:
-            return dict(master_cards[key])
+        info = master_cards.get(key)
+        if info is not None:
+            return dict(info)
     return None
 
 
@@ -674,6 +731,12 @@ def sync_cache_from_server():
 
         cursor = db.cursor(pymysql.cursors.DictCursor)
 
+        # Fetch door settings for this zone first: its cache_version is the
+        # delta version this snapshot is at least as new as
+        cursor.execute("SELECT * FROM doors WHERE name = %s", (zone,))
+        door_info = cursor.fetchone()
+        base_version = door_info.get('cache_version') if door_info else None
+
         # Fetch all cards that have access to this zone.
         # Use FIND_IN_SET for proper comma-delimited matching (prevents "main"
         # matching "maintenance"). FIND_IN_SET is whitespace-sensitive, so a
@@ -697,16 +760,12 @@ def sync_cache_from_server():
         schedules = {s['id']: s for s in cursor.fetchall()}
 
         # Sync master cards to persistent storage (never expires)
-        sync_master_cards_from_db(cursor)
+        sync_master_cards_from_db(cursor, base_version)
 
         # Fetch holidays
         cursor.execute("SELECT * FROM holidays WHERE date >= CURDATE()")
         holidays = cursor.fetchall()
 
-        # Fetch door settings for this zone
-        cursor.execute("SELECT * FROM doors WHERE name = %s", (zone,))
-        door_info = cursor.fetchone()
-
         with state_lock:
             db_connected = True
 
@@ -721,7 +780,7 @@ def sync_cache_from_server():
 
         # Add regular cards to cache
         for card in cards:
-            key = f"{card['facility']},{card['user_id']}"
+            key = credential_key(card['facility'], card['user_id'])
             new_cache['cards'][key] = {
                 'card_id': card['card_id'],
                 'firstname': card['firstname'],
@@ -734,6 +793,8 @@ def sync_cache_from_server():
             }
 
         with cache_lock:
+            # Deltas pushed while this sync ran may be newer than the snapshot
+            new_cache['version'] = _replay_cache_deltas(new_cache, base_version)
             local_cache = new_cache
         save_cache()
         report(f"Cache synced from server: {len(new_cache['cards'])} cards")
@@ -778,6 +839,261 @@ def is_cache_valid():
     return cache_last_sync > 0 and (time.time() - cache_last_sync) < CACHE_DURATION
 
 
+# ============================================================
+# CACHE DELTAS (server-pushed changes)
+# ============================================================
+#
+# The server pushes each card, master card, schedule or holiday change to
+# /cmd/cache-delta as soon as it is saved. Every delta carries the door's
+# next doors.cache_version and an HMAC-SHA256 over zone, version and payload
+# keyed by the door's api_key. A delta that follows the local version is
+# applied to the in-memory cache and appended to the journal; anything that
+# skips a version (a push that never arrived) triggers a full sync instead.
+#
+# Payload (the signed JSON string):
+#     {"cards": {"set": {"<facility>,<user_id>": {...}}, "remove": [...]},
+#      "master_cards": {"set": {...}, "remove": [...]},
+#      "schedules": {"set": {"<id>": {...}}, "remove": [...]},
+#      "holidays": [...]}        # replaces the list when present
+
+CACHE_DELTA_CARD_FIELDS = ('card_id', 'firstname', 'lastname', 'doors', 'schedule_id',
+                           'valid_from', 'valid_until', 'daily_scan_limit')
+CACHE_DELTA_MASTER_FIELDS = ('card_id', 'user_id', 'facility', 'description')
+
+cache_journal_entries = 0  # Lines in the journal since the cache file was written
+cache_delta_history = []  # (version, changes) of recently applied deltas
+cache_resync_state = {'running': False, 'again': False}
+cache_delta_stats = {'applied': 0, 'duplicate': 0, 'gaps': 0, 'rejected': 0, 'resyncs': 0}
+
+
+def get_cache_journal_file():
+    """Get the path to the delta journal for this zone's cache file"""
+    return os.path.join(CACHE_DIR, f"{zone}_access_cache.journal")
+
+
+def cache_delta_signature(version, delta):
+    """HMAC-SHA256 (hex) the server signs a cache delta with"""
+    api_key = str(config.get(zone, {}).get('api_key', ''))
+    message = f"{zone}\n{version}\n{delta}".encode()
+    return hmac.new(api_key.encode(), message, hashlib.sha256).hexdigest()
+
+
+def parse_cache_delta(delta):
+    """
+    Decode and check a delta payload before any of it is applied.
+
+    Returns:
+        Changes dict with only the known sections
+
+    Raises:
+        ValueError: Malformed payload
+    """
+    changes = json.loads(delta)
+    if not isinstance(changes, dict):
+        raise ValueError('Delta must be an object')
+    parsed = {}
+    for section in ('cards', 'master_cards', 'schedules'):
+        if section not in changes:
+            continue
+        entries = changes[section]
+        if (not isinstance(entries, dict)
+                or not isinstance(entries.get('set', {}), dict)
+                or not isinstance(entries.get('remove', []), list)
+                or not all(isinstance(v, dict) for v in entries.get('set', {}).values())):
+            raise ValueError(f'Invalid {section} section')
+        parsed[section] = {'set': entries.get('set', {}),
+                           'remove': [str(k) for k in entries.get('remove', [])]}
+    if 'holidays' in changes:
+        holidays = changes['holidays']
+        if not isinstance(holidays, list) or not all(isinstance(h, dict) for h in holidays):
+            raise ValueError('Invalid holidays section')
+        parsed['holidays'] = [{'date': str(h.get('date', '')), 'name': h.get('name'),
+                               'access_denied': h.get('access_denied'),
+                               'recurring': h.get('recurring', 0)} for h in holidays]
+    return parsed
+
+
+def _card_covers_zone(card):
+    doors = str(card.get('doors') or '')
+    return doors == '*' or zone in doors.replace(' ', '').split(',')
+
+
+def _apply_cache_changes(cache, changes):
+    """Apply card/schedule/holiday changes to a cache dict (caller holds cache_lock)"""
+    if 'cards' in changes:
+        cards = cache.setdefault('cards', {})
+        for key in changes['cards']['remove']:
+            cards.pop(key, None)
+        for key, card in changes['cards']['set'].items():
+            # The server only sends cards for this door; a card moved off it is a removal
+            if _card_covers_zone(card):
+                cards[sys.intern(key)] = {f: card.get(f) for f in CACHE_DELTA_CARD_FIELDS}
+            else:
+                cards.pop(key, None)
+    if 'schedules' in changes:
+        schedules = cache.setdefault('schedules', {})
+        for schedule_id in changes['schedules']['remove']:
+            schedules.pop(schedule_id, None)
+            if schedule_id.isdigit():
+                schedules.pop(int(schedule_id), None)
+        for schedule_id, schedule in changes['schedules']['set'].items():
+            # A full sync keys schedules by int id, a cache file by str
+            if schedule_id.isdigit():
+                schedules.pop(int(schedule_id), None)
+            schedules[schedule_id] = schedule
+    if 'holidays' in changes:
+        cache['holidays'] = changes['holidays']
+
+
+def _merge_master_changes(changes, now_ts):
+    """Apply master card changes to master_cards (caller holds master_lock)"""
+    section = changes.get('master_cards')
+    if not section:
+        return
+    for key in section['remove']:
+        if master_cards.pop(key, None) is not None:
+            report(f"Master card revoked: {key}")
+    for key, card in section['set'].items():
+        entry = {f: card.get(f) for f in CACHE_DELTA_MASTER_FIELDS}
+        entry['last_verified'] = now_ts  # Pushed by the server: as fresh as a sync
+        master_cards[sys.intern(key)] = entry
+
+
+def _apply_master_changes(changes):
+    """Apply master card changes and persist them (returns True if any)"""
+    if 'master_cards' not in changes:
+        return False
+    with master_lock:
+        _merge_master_changes(changes, time.time())
+    save_master_cards()
+    return True
+
+
+def _replay_cache_deltas(cache, version):
+    """
+    Re-apply deltas newer than a full sync snapshot (caller holds cache_lock).
+
+    Returns:
+        Version the cache is now at (None if the server has no cache_version)
+    """
+    if version is None:
+        return None
+    for delta_version, changes in cache_delta_history:
+        if delta_version > version:
+            _apply_cache_changes(cache, changes)
+            version = delta_version
+    return version
+
+
+def apply_cache_delta(version, changes):
+    """
+    Apply one verified delta if it directly follows the local cache version.
+
+    Returns:
+        ('applied' | 'duplicate' | 'gap', local cache version afterwards)
+    """
+    global cache_journal_entries
+
+    with journal_lock:
+        with cache_lock:
+            local_version = local_cache.get('version')
+            if local_version is not None and version <= local_version:
+                cache_delta_stats['duplicate'] += 1
+                return 'duplicate', local_version
+            if local_version is None or version != local_version + 1:
+                cache_delta_stats['gaps'] += 1
+                return 'gap', local_version
+            _apply_cache_changes(local_cache, changes)
+            local_cache['version'] = version
+            cache_delta_history.append((version, changes))
+            del cache_delta_history[:-CACHE_DELTA_HISTORY]
+            cache_delta_stats['applied'] += 1
+
+        _apply_master_changes(changes)
+
+        # Persist just this change; the cache file is rewritten only on compaction
+        entry = {key: value for key, value in changes.items() if key != 'master_cards'}
+        if entry:
+            try:
+                with open(get_cache_journal_file(), 'a') as f:
+                    f.write(json.dumps({'version': version, 'changes': entry}, default=str) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                cache_journal_entries += 1
+            except OSError as e:
+                report(f"Error writing cache journal: {e}")
+        compact = cache_journal_entries >= CACHE_JOURNAL_COMPACT
+
+    if compact:
+        save_cache(sync_time=cache_last_sync)
+    return 'applied', version
+
+
+def replay_cache_journal():
+    """Apply journaled deltas on top of the cache just loaded from disk"""
+    global cache_journal_entries
+
+    try:
+        with open(get_cache_journal_file(), 'r') as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return
+    except OSError as e:
+        report(f"Error reading cache journal: {e}")
+        return
+
+    applied = 0
+    with cache_lock:
+        for line in lines:
+            try:
+                entry = json.loads(line)
+                version = int(entry['version'])
+            except (ValueError, KeyError, TypeError):
+                break  # Torn last line after a power loss
+            local_version = local_cache.get('version')
+            if local_version is None or version > local_version + 1:
+                break  # Gap: the next delta or full sync sorts it out
+            if version == local_version + 1:
+                _apply_cache_changes(local_cache, entry['changes'])
+                local_cache['version'] = version
+                applied += 1
+    cache_journal_entries = len(lines)
+    if applied:
+        report(f"Applied {applied} journaled cache deltas")
+
+
+def request_cache_sync(reason):
+    """Run a full sync in the background; one more if asked while one is running"""
+    with cache_lock:
+        if cache_resync_state['running']:
+            cache_resync_state['again'] = True
+            return
+        cache_resync_state['running'] = True
+        cache_delta_stats['resyncs'] += 1
+    report(f"Full cache sync requested: {reason}")
+
+    def run():
+        while True:
+            try:
+                sync_cache_from_server()
+            finally:
+                with cache_lock:
+                    again = cache_resync_state['again']
+                    cache_resync_state['again'] = False
+                    cache_resync_state['running'] = again
+            if not again:
+                return
+
+    threading.Thread(target=run, name="cache-resync", daemon=True).start()
+
+
+def cache_delta_status():
+    """Cache version and delta counters for the status endpoint"""
+    with cache_lock:
+        return dict(cache_delta_stats, version=local_cache.get('version'),
+                    journal=cache_journal_entries)
+
+
 # ============================================================
 # GPIO SETUP
 # ============================================================
@@ -801,29 +1117,69 @@ def setup_output_GPIOs():
         GPIO.output(22, 1)
 
 
-def setup_readers():
-    """Setup Wiegand reader GPIO pins"""
-    for name in config:
-        if name == "<zone>" or not isinstance(config[name], dict):
+def _collect_reader_configs():
+    """Return {reader_name: reader_config} for every reader in config.json.
+
+    A config entry is a reader when it has Wiegand d0/d1 pins or an explicit
+    non-Wiegand reader_type (the zone entry itself usually is one). Several
+    heterogeneous readers can also be listed under a "readers" object inside
+    an entry, e.g. {"entry": {"reader_type": "wiegand", ...},
+    "exit": {"reader_type": "nfc_pn532", ...}}."""
+    readers = {}
+    for name, entry in config.items():
+        if name == "<zone>" or name.startswith("_") or not isinstance(entry, dict):
             continue
+        for sub_name, sub in (entry.get("readers") or {}).items():
+            if isinstance(sub, dict) and not sub_name.startswith("_"):
+                readers[sub_name] = sub
+        reader_type = str(entry.get("reader_type", "wiegand")).lower()
+        if entry.get("d0") and entry.get("d1"):
+            readers[name] = entry
+        elif reader_type not in ("wiegand", "gpio"):
+            readers[name] = entry
+    return readers
+
 
-        reader = config[name]
-        if reader.get("d0") and reader.get("d1"):
-            reader["stream"] = ""
-            reader["timer"] = None
-            reader["name"] = name
-            reader["unlocked"] = False
+def setup_readers():
+    """Create every configured reader through ReaderFactory and start them.
 
-            zone_by_pin[reader["d0"]] = name
-            zone_by_pin[reader["d1"]] = name
+    All readers report into one CardDispatcher, which runs access decisions on
+    a small fixed worker pool instead of a thread per reader per scan."""
+    global card_dispatcher
 
-            GPIO.setup(reader["d0"], GPIO.IN)
-            GPIO.setup(reader["d1"], GPIO.IN)
+    if not READERS_AVAILABLE:
+        report("Reader modules not available - no card readers started")
+        return
 
-            GPIO.add_event_detect(reader["d0"], GPIO.FALLING, callback=data_pulse)
-            GPIO.add_event_detect(reader["d1"], GPIO.FALLING, callback=data_pulse)
+    zone_config = config.get(zone, {})
+    card_dispatcher = CardDispatcher(
+        handle_card_read,
+        workers=zone_config.get("reader_workers", CardDispatcher.DEFAULT_WORKERS),
+        on_error=report,
+        debounce=zone_config.get("reader_debounce"),
+        supervisor=zone_config.get("reader_supervisor")
+    )
 
-            debug(f"Reader configured on GPIO {reader['d0']}/{reader['d1']}")
+    for name, reader_config in _collect_reader_configs().items():
+        reader = card_dispatcher.add_reader(name, reader_config)
+        if reader:
+            debug(f"Reader '{name}' configured ({reader.get_reader_type().value})")
+
+    started = card_dispatcher.start()
+    report(f"Card readers started: {started}/{len(card_dispatcher.readers)}")
+
+
+def reader_health():
+    """Supervisor state of every reader (None when readers are not running)"""
+    if card_dispatcher and card_dispatcher.supervisor:
+        return card_dispatcher.supervisor.get_status()
+    return None
+
+
+def stop_readers():
+    """Stop every reader and the dispatcher workers"""
+    if card_dispatcher:
+        card_dispatcher.stop()
 
 
 def _read_door_sensor(pin):
@@ -897,6 +1253,7 @@ def door_sensor_event(channel):
     global door_sensor_open
     door_open = _read_door_sensor(channel)
     door_sensor_open = door_open
+    publish_event('door', open=door_open)
 
     if door_open:
         report(f"Door opened at {zone}")
@@ -909,6 +1266,7 @@ def door_sensor_event(channel):
 def rex_button_pressed(channel):
     """Handle REX button press - unlock door temporarily"""
     report(f"REX button pressed at {zone}")
+    publish_event('rex')
     log_door_event('rex_activated')
     zone_config = config.get(zone, {})
     latch_gpio = zone_config.get("latch_gpio")
@@ -1243,9 +1601,14 @@ def gate_set_state(new_state, held=None):
     """Update gate state and persist to DB on next heartbeat."""
     global gate_state, gate_held
     with gate_lock:
+        previous = gate_state
+        changed = new_state != gate_state or (held is not None and held != gate_held)
         gate_state = new_state
         if held is not None:
             gate_held = held
+        current_held = gate_held
+    if changed:
+        publish_event('gate', state=new_state, previous=previous, held=current_held)
     debug(f"Gate state -> {new_state}" + (f" held={held}" if held is not None else ""))
 
 
@@ -1502,6 +1865,7 @@ def lock_door():
     _set_legacy_leds(False)
     with state_lock:
         door_unlocked = False
+    command_wake_event.set()  # Report the new lock state now
 
 
 def unlock_door():
@@ -1516,6 +1880,7 @@ def unlock_door():
     _set_legacy_leds(True)
     with state_lock:
         door_unlocked = True
+    command_wake_event.set()  # Report the new lock state now
 
 
 def unlock_briefly(gpio):
@@ -1549,131 +1914,27 @@ def unlock_briefly(gpio):
 
 
 # ============================================================
-# WIEGAND CARD READING
+# CARD READING
 # ============================================================
 
-def data_pulse(channel):
-    """Handle Wiegand data pulse"""
-    reader_name = zone_by_pin.get(channel)
-    if not reader_name:
-        return
-
-    reader = config[reader_name]
-
-    with wiegand_lock:
-        if channel == reader["d0"]:
-            reader["stream"] += "0"
-        elif channel == reader["d1"]:
-            reader["stream"] += "1"
-
-        # Start timer if not already running
-        if reader["timer"] is None:
-            reader["timer"] = threading.Timer(0.2, wiegand_stream_done, args=[reader])
-            reader["timer"].start()
-
-
-def wiegand_stream_done(reader):
-    """Process completed Wiegand stream"""
-    with wiegand_lock:
-        if reader["stream"] == "":
-            reader["timer"] = None
-            return
-
-        bitstring = reader["stream"]
-        reader["stream"] = ""
-        reader["timer"] = None
-
-    # Process outside the lock
-    validate_bits(bitstring)
-
-
-def validate_bits(bstr):
-    """Validate Wiegand bit stream and extract card data using format registry"""
-    bit_len = len(bstr)
-
-    # Use format registry if available
-    if FORMAT_REGISTRY_AVAILABLE and format_registry:
-        result = format_registry.validate(bstr)
-        if result:
-            card_id, facility, user_id = result
-            fmt = format_registry.get_format(bit_len)
-            debug(f"{bit_len}-bit card ({fmt.name}): facility={facility} user={user_id} card_id={card_id}")
-            lookup_card(card_id, facility, user_id, bstr)
-            return True
-        elif format_registry.get_format(bit_len):
-            # Format is supported but validation failed (parity error)
-            debug(f"Parity error in {bit_len}-bit Wiegand stream")
-            return False
-        else:
-            debug(f"Unsupported Wiegand format: {bit_len} bits")
-            return False
-
-    # Legacy fallback: Support 26-bit and 34-bit only
-    if bit_len == 26:
-        return validate_26bit_legacy(bstr)
-    elif bit_len == 34:
-        return validate_34bit_legacy(bstr)
-    else:
-        debug(f"Unsupported Wiegand format: {bit_len} bits (use format registry for more formats)")
-        return False
-
-
-def validate_26bit_legacy(bstr):
-    """Validate and decode 26-bit Wiegand format (legacy fallback)"""
-    lparity = int(bstr[0])
-    facility = int(bstr[1:9], 2)
-    user_id = int(bstr[9:25], 2)
-    rparity = int(bstr[25])
-
-    # Calculate expected parities
-    calc_lparity = 0
-    calc_rparity = 1
-    for i in range(12):
-        calc_lparity ^= int(bstr[i + 1])
-        calc_rparity ^= int(bstr[i + 13])
-
-    if calc_lparity != lparity or calc_rparity != rparity:
-        debug("Parity error in 26-bit Wiegand stream")
-        return False
-
-    # Use full BYTE width (2 hex digits per byte) so this legacy path produces
-    # the SAME card_id as the format-registry path in wiegand_formats.py for the
-    # same physical card. 26 bits -> ceil(26/8)=4 bytes -> 8 hex digits.
-    hex_width = ((len(bstr) + 7) // 8) * 2
-    card_id = f"{int(bstr, 2):0{hex_width}x}"
-    debug(f"26-bit card: facility={facility} user={user_id} card_id={card_id}")
-
-    lookup_card(card_id, str(facility), str(user_id), bstr)
-    return True
-
-
-def validate_34bit_legacy(bstr):
-    """Validate and decode 34-bit Wiegand format (legacy fallback)"""
-    lparity = int(bstr[0])
-    facility = int(bstr[1:17], 2)
-    user_id = int(bstr[17:33], 2)
-    rparity = int(bstr[33])
-
-    # Calculate expected parities (even parity for first half, odd for second)
-    calc_lparity = 0
-    calc_rparity = 1
-    for i in range(16):
-        calc_lparity ^= int(bstr[i + 1])
-        calc_rparity ^= int(bstr[i + 17])
-
-    if calc_lparity != lparity or calc_rparity != rparity:
-        debug("Parity error in 34-bit Wiegand stream")
-        return False
+def handle_card_read(card_read):
+    """Dispatcher handler: run the access decision for a decoded card read"""
+    if DEBUG_MODE:
+        debug(f"{card_read.format_name} card on {card_read.reader_name}: "
+              f"facility={card_read.facility} user={card_read.user_id} card_id={card_read.card_id}")
+    scan_started()
+    try:
+        lookup_card(card_read.card_id, card_read.facility, card_read.user_id, card_read.bitstring,
+                    reader=card_read.reader_name, key=card_read.key)
+    finally:
+        _scan_context.start = None
 
-    # Use full BYTE width (2 hex digits per byte) to match the format-registry
-    # path. 34 bits -> ceil(34/8)=5 bytes -> 10 hex digits (the old "%09x" was
-    # inconsistent and yielded a different card_id for the same card).
-    hex_width = ((len(bstr) + 7) // 8) * 2
-    card_id = f"{int(bstr, 2):0{hex_width}x}"
-    debug(f"34-bit card: facility={facility} user={user_id} card_id={card_id}")
 
-    lookup_card(card_id, str(facility), str(user_id), bstr)
-    return True
+def reader_feedback(reader, event):
+    """Show grant/deny/held on the reader the card was presented at (if it has
+    an LED/buzzer, e.g. OSDP). Queued to the reader; never blocks the decision."""
+    if card_dispatcher and reader:
+        card_dispatcher.feedback(reader, event)
 
 
 # ============================================================
@@ -1721,18 +1982,22 @@ def door_is_locked_down():
         return bool(val)
 
 
-def lookup_card(card_id, facility, user_id, bstr):
-    """Look up card and determine if access should be granted"""
+def lookup_card(card_id, facility, user_id, bstr, reader=None, key=None):
+    """Look up card and determine if access should be granted.
+    reader names the reader the card was presented at (repeat swipe tracking);
+    key is the card's precomputed credential_key() (CardRead.key)."""
     global db_connected
 
     now = datetime.now()
-    card_key = f"{facility},{user_id}"
+    card_key = key if key is not None else credential_key(facility, user_id)
 
-    debug(f"Looking up card: {card_key}")
+    if DEBUG_MODE:
+        debug(f"Looking up card: {card_key}")
 
     # First check: Master cards (persistent emergency credentials)
-    master_info = get_master_card_info(facility, user_id)
+    master_info = get_master_card_info(facility, user_id, card_key)
     if master_info:
+        scan_path('master')
         # Master card found in local storage.
         # If the database is reachable, verify it's still active. A successful
         # verification refreshes the local freshness stamp; an explicit
@@ -1741,13 +2006,13 @@ def lookup_card(card_id, facility, user_id, bstr):
         if MYSQL_AVAILABLE and db_connected:
             if not verify_master_card_online(card_id, facility, user_id):
                 # Master card was revoked or DB returned inactive - deny access
-                reject_card(user_id, "Master card revoked")
+                reject_card(user_id, "Master card revoked", reader=reader)
                 log_access(user_id, card_id, facility, False, "Master card revoked")
                 return
             # NOTE: verify_master_card_online fails OPEN (returns True) on a DB
             # error, so "True" does not guarantee a real online check happened.
             # Re-read the freshness stamp to know whether we actually verified.
-            refreshed = get_master_card_info(facility, user_id)
+            refreshed = get_master_card_info(facility, user_id, card_key)
             if refreshed and not master_card_locally_expired(refreshed):
                 verified_online = True
             master_info = refreshed or master_info
@@ -1756,7 +2021,7 @@ def lookup_card(card_id, facility, user_id, bstr):
         # within the bounded offline window. Beyond that, a revoked master must
         # stop working even during an induced outage.
         if not verified_online and master_card_locally_expired(master_info):
-            reject_card(user_id, "Master card stale (not re-verified)")
+            reject_card(user_id, "Master card stale (not re-verified)", reader=reader)
             log_access(user_id, card_id, facility, False,
                        f"Master card expired locally (>{MASTER_CARD_MAX_STALE_DAYS}d unverified)")
             return
@@ -1770,7 +2035,7 @@ def lookup_card(card_id, facility, user_id, bstr):
             # audit log and can be reviewed after an outage.
             report(f"Master card access granted (FAIL-OPEN, DB unverified): {description}")
             log_reason = "Master card (FAIL-OPEN: DB unverified)"
-        open_door(user_id, "Master", is_master=True)
+        open_door(user_id, "Master", is_master=True, reader=reader)
         log_access(user_id, card_id, facility, True, log_reason)
         return
 
@@ -1779,7 +2044,8 @@ def lookup_card(card_id, facility, user_id, bstr):
     # responders can still get in. This is enforced BEFORE any DB/cache lookup so
     # it holds even when the controller is offline (fail secure).
     if door_is_locked_down():
-        reject_card(user_id, "Door is in lockdown")
+        scan_path('lockdown')
+        reject_card(user_id, "Door is in lockdown", reader=reader)
         log_access(user_id, card_id, facility, False, "Lockdown mode active")
         return
 
@@ -1787,8 +2053,10 @@ def lookup_card(card_id, facility, user_id, bstr):
     access_granted = False
     access_reason = ""
 
-    if MYSQL_AVAILABLE and try_database_lookup(card_id, facility, user_id, bstr, now):
+    scan_path('db')
+    if MYSQL_AVAILABLE and try_database_lookup(card_id, facility, user_id, bstr, now, reader):
         return  # Database handled it
+    scan_path('cache')
 
     # Fall back to local cache
     if is_cache_valid():
@@ -1841,19 +2109,20 @@ def lookup_card(card_id, facility, user_id, bstr):
 
         if access_granted:
             name = f"{cached_card.get('firstname', '')} {cached_card.get('lastname', '')}".strip() or user_id
-            open_door(user_id, name)
+            open_door(user_id, name, reader=reader)
             log_access(user_id, card_id, facility, True, access_reason)
         else:
-            reject_card(user_id, access_reason)
+            reject_card(user_id, access_reason, reader=reader)
             log_access(user_id, card_id, facility, False, access_reason)
     else:
         # No valid cache available
+        scan_path('offline')
         report("WARNING: No valid cache and database unavailable!")
-        reject_card(user_id, "System offline - no cached access data")
+        reject_card(user_id, "System offline - no cached access data", reader=reader)
         log_access(user_id, card_id, facility, False, "Cache expired/unavailable")
 
 
-def try_database_lookup(card_id, facility, user_id, bstr, now):
+def try_database_lookup(card_id, facility, user_id, bstr, now, reader=None):
     """Try to look up card in the database"""
     global db_connected, last_db_attempt
 
@@ -1885,7 +2154,7 @@ def try_database_lookup(card_id, facility, user_id, bstr, now):
 
         if cursor.fetchone():
             report("Master card access via database")
-            open_door(user_id, "Master", is_master=True)
+            open_door(user_id, "Master", is_master=True, reader=reader)
             cursor.execute("""
                 INSERT INTO logs (user_id, Date, Granted, Location, doorip)
                 VALUES (%s, %s, 1, %s, %s)
@@ -1941,14 +2210,14 @@ def try_database_lookup(card_id, facility, user_id, bstr, now):
                 else:
                     granted = True
                     name = f"{card.get('firstname', '')} {card.get('lastname', '')}".strip() or user_id
-                    open_door(user_id, name)
+                    open_door(user_id, name, reader=reader)
             else:
                 granted = True
                 name = f"{card.get('firstname', '')} {card.get('lastname', '')}".strip() or user_id
-                open_door(user_id, name)
+                open_door(user_id, name, reader=reader)
 
             if not granted:
-                reject_card(user_id, reason)
+                reject_card(user_id, reason, reader=reader)
 
             cursor.execute("""
                 INSERT INTO logs (user_id, Date, Granted, Location, doorip)
@@ -1964,7 +2233,9 @@ def try_database_lookup(card_id, facility, user_id, bstr, now):
             return True
 
         else:
-            # Card not found - add to database as inactive for enrollment
+            # Card not found - deny first, then add to database as inactive
+            # for enrollment
+            reject_card(user_id, "Unknown card", reader=reader)
             debug("Card not found, adding to database as inactive")
             try:
                 cursor.execute("""
@@ -1978,7 +2249,6 @@ def try_database_lookup(card_id, facility, user_id, bstr, now):
                 db.commit()
             except pymysql.IntegrityError:
                 pass  # Card already exists
-            reject_card(user_id, "Unknown card")
             # Mirror the denial into the local JSON log for a consistent audit
             # trail across the DB and offline paths.
             log_access(user_id, card_id, facility, False, "Unknown card")
@@ -2140,37 +2410,48 @@ def is_holiday_denied_db(cursor, now):
     return cursor.fetchone() is not None
 
 
-def open_door(user_id, name, is_master=False):
+def open_door(user_id, name, is_master=False, reader=None):
     """Handle door open logic with repeat swipe detection.
     Only master cards can toggle held-open / hold state.
-    Configurable via master_scans_hold_open / master_scans_release_hold settings."""
-    global last_card, repeat_read_timeout, repeat_read_count
-
+    Configurable via master_scans_hold_open / master_scans_release_hold settings.
+    Repeat swipes are tracked per reader so scans interleaved on another
+    reader don't reset a master card gesture in progress."""
+    scan_decided(True)
     now = time.time()
 
     with card_lock:
-        # Track consecutive scans of the same card within 30 seconds
-        if user_id == last_card and now <= repeat_read_timeout:
-            repeat_read_count += 1
+        # Track consecutive scans of the same card on this reader within 30 seconds
+        repeat = repeat_reads.get(reader)
+        if repeat and user_id == repeat['user_id'] and now <= repeat['expires']:
+            repeat['count'] += 1
         else:
-            repeat_read_count = 0
-            repeat_read_timeout = now + 30
+            repeat = {'user_id': user_id, 'count': 0, 'expires': now + 30}
+            repeat_reads[reader] = repeat
 
-        last_card = user_id
-        current_repeat_count = repeat_read_count + 1  # 1-indexed scan count
+        current_repeat_count = repeat['count'] + 1  # 1-indexed scan count
+
+    zone_config = config.get(zone, {})
+
+    # ── Reader feedback first: the decision is known, the user is waiting ──
+    if gate_enabled:
+        releasing = is_master and gate_held and current_repeat_count >= master_scans_release_hold
+    else:
+        releasing = is_master and zone_config.get("unlocked") and current_repeat_count >= master_scans_release_hold
+    holding = not releasing and is_master and current_repeat_count >= master_scans_hold_open
+    reader_feedback(reader, 'held' if holding else 'grant')
 
     # ── Status LED feedback for the access event ──
     status_led_pulse(2)
 
     # ── Gate mode routing ──
     if gate_enabled:
-        if is_master and gate_held and current_repeat_count >= master_scans_release_hold:
+        if releasing:
             # Release any hold state
             gate_command('release', source=f'master:{name}')
             log_door_event('lock', f"Hold released by {name}")
             with card_lock:
-                repeat_read_count = 0
-        elif is_master and current_repeat_count >= master_scans_hold_open:
+                repeat['count'] = 0
+        elif holding:
             # Triple master scan = hold (after firing open)
             report(f"{zone} GATE HOLD by {name}")
             gate_command('open', source=f'master:{name}', hold_after=True)
@@ -2181,21 +2462,21 @@ def open_door(user_id, name, is_master=False):
         return
 
     # ── Standard door behavior ──
-    zone_config = config.get(zone, {})
-
-    if is_master and zone_config.get("unlocked") and current_repeat_count >= master_scans_release_hold:
+    if releasing:
         # Single master scan while held-open -> release hold
-        zone_config["unlocked"] = False
+        with hold_lock:
+            zone_config["unlocked"] = False
+            lock_door()
         report(f"{zone} hold released by {name}")
-        lock_door()
         log_door_event('lock', f"Hold released by {name}")
         with card_lock:
-            repeat_read_count = 0
-    elif is_master and current_repeat_count >= master_scans_hold_open:
+            repeat['count'] = 0
+    elif holding:
         # Triple master scan -> enter held-open
-        zone_config["unlocked"] = True
+        with hold_lock:
+            zone_config["unlocked"] = True
+            unlock_door()
         report(f"{zone} HELD OPEN by {name}")
-        unlock_door()
         log_door_event('door_held_open', f"Held open by {name}")
     else:
         if zone_config.get("unlocked"):
@@ -2209,11 +2490,15 @@ def open_door(user_id, name, is_master=False):
                 debug(f"Warning: latch_gpio not configured for zone {zone}")
 
 
-def reject_card(user_id, reason="Access denied"):
+def reject_card(user_id, reason="Access denied", reader=None):
     """Handle card rejection"""
-    global repeat_read_count
+    scan_decided(False)
+    reader_feedback(reader, 'deny')
+
     with card_lock:
-        repeat_read_count = 0
+        repeat = repeat_reads.get(reader)
+        if repeat:
+            repeat['count'] = 0
 
     report(f"Access denied at {zone} for user {user_id}: {reason}")
 
@@ -2237,6 +2522,8 @@ def reject_card(user_id, reason="Access denied"):
 
 def log_access(user_id, card_id, facility, granted, reason=""):
     """Log access attempt to local file (for offline backup)"""
+    publish_event('access', user_id=user_id, card_id=card_id, facility=facility,
+                  granted=bool(granted), reason=reason)
     log_file = os.path.join(CACHE_DIR, f"{zone}_access_log.json")
 
     entry = {
@@ -2250,6 +2537,7 @@ def log_access(user_id, card_id, facility, granted, reason=""):
         'ip': myip
     }
 
+    started = time.perf_counter()
     try:
         # Use file locking to prevent race conditions
         with open(log_file, 'a+') as f:
@@ -2277,6 +2565,9 @@ def log_access(user_id, card_id, facility, granted, reason=""):
                 json.dump(logs, f, indent=2)
             finally:
                 fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        metric_set('pidoors_local_log_entries', len(logs), (('log', 'access'),))
+        metric_observe('pidoors_log_write_seconds', LOG_WRITE_BUCKETS,
+                       time.perf_counter() - started, (('log', 'access'),))
     except Exception as e:
         debug(f"Error writing access log: {e}")
 
@@ -2292,6 +2583,7 @@ def log_door_event(event_type, details=""):
         'zone': zone
     }
 
+    started = time.perf_counter()
     try:
         # Use file locking to prevent race conditions
         with open(log_file, 'a+') as f:
@@ -2319,6 +2611,9 @@ def log_door_event(event_type, details=""):
                 json.dump(logs, f, indent=2)
             finally:
                 fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        metric_set('pidoors_local_log_entries', len(logs), (('log', 'events'),))
+        metric_observe('pidoors_log_write_seconds', LOG_WRITE_BUCKETS,
+                       time.perf_counter() - started, (('log', 'events'),))
     except Exception as e:
         debug(f"Error writing door event log: {e}")
 
@@ -2327,6 +2622,14 @@ def log_door_event(event_type, details=""):
 # HEARTBEAT / HEALTH CHECK
 # ============================================================
 
+schedule_lock = threading.Lock()
+schedule_state = {
+    'next_heartbeat': None,
+    'next_sync': None,
+    'sync_base': None,  # (last_sync, offset) next_sync was drawn for
+}
+
+
 def start_heartbeat_thread():
     """Start the heartbeat thread for server communication"""
     global heartbeat_thread
@@ -2363,42 +2666,153 @@ def get_heartbeat_interval():
     return HEARTBEAT_INTERVAL
 
 
+def schedule_phase(name):
+    """Return this door's fixed offset for a schedule, as a fraction in [0, 1).
+
+    Derived from the zone name, so it survives restarts and differs between
+    doors that share a config template."""
+    digest = hashlib.sha256(f"{zone}/{name}".encode()).digest()
+    return int.from_bytes(digest[:8], 'big') / 2 ** 64
+
+
+def get_sync_window():
+    """Return the window (seconds) full syncs are spread across, 0..SYNC_INTERVAL"""
+    try:
+        window = int(config.get(zone, {}).get("sync_window", SYNC_WINDOW))
+    except (TypeError, ValueError):
+        window = SYNC_WINDOW
+    return min(max(window, 0), SYNC_INTERVAL)
+
+
+def next_slot(after, period, offset):
+    """First wall-clock time later than after that falls offset seconds into a period"""
+    return (int((after - offset) // period) + 1) * period + offset
+
+
+def next_sync_time(last_sync):
+    """Time of the next full sync for a cache last synced at last_sync.
+
+    Syncs land on a wall-clock grid of SYNC_INTERVAL, at this door's offset
+    within the sync window, so each door keeps the same slot every hour
+    whenever its last sync happened. A sync made off the grid (a rehash, a
+    resync after a missed delta) moves the next one to the first slot at
+    least half an interval later."""
+    offset = schedule_phase('sync') * get_sync_window()
+    with schedule_lock:
+        if schedule_state['sync_base'] != (last_sync, offset):
+            slot = next_slot(last_sync + SYNC_INTERVAL / 2, SYNC_INTERVAL, offset)
+            schedule_state['sync_base'] = (last_sync, offset)
+            schedule_state['next_sync'] = slot + random.uniform(0, SYNC_JITTER)
+        return schedule_state['next_sync']
+
+
+def schedule_status():
+    """Heartbeat and sync schedule, for /status"""
+    interval = get_heartbeat_interval()
+    window = get_sync_window()
+    with schedule_lock:
+        next_beat = schedule_state['next_heartbeat']
+        next_sync = schedule_state['next_sync']
+    return {
+        'heartbeat_interval': interval,
+        'heartbeat_offset_s': round(schedule_phase('heartbeat') * interval, 1),
+        'next_heartbeat': round(next_beat, 1) if next_beat else None,
+        'sync_window': window,
+        'sync_offset_s': round(schedule_phase('sync') * window, 1),
+        'next_sync': round(next_sync, 1) if next_sync else None,
+    }
+
+
+def _sync_due(boot, floor):
+    """When the heartbeat thread should next sync (never before floor).
+
+    The cache on disk may have missed deltas while the door was down, so the
+    first sync after boot is due at once rather than at the next slot."""
+    with state_lock:
+        last_sync = cache_last_sync
+    if last_sync < boot:
+        return floor
+    return max(next_sync_time(last_sync), floor)
+
+
 def heartbeat_loop():
-    """Send periodic heartbeat to server and sync cache"""
+    """Send periodic heartbeats and run the hourly full sync.
+
+    Beats fall on a wall-clock grid of the heartbeat interval at this door's
+    offset, each moved by up to HEARTBEAT_JITTER of the interval, so beats
+    stay 0.8-1.2 intervals apart (well inside the server's 3x offline
+    threshold). The first beat and any overdue sync after boot are spread
+    across BOOT_SPREAD instead of firing the moment the service starts.
+    """
     global running, myip
 
+    boot = time.time()
+    beat_slot = beat_interval = None
+    beat_due = boot + schedule_phase('heartbeat') * BOOT_SPREAD
+    sync_floor = boot + schedule_phase('sync') * BOOT_SPREAD
+
     while running:
+        now = time.time()
+        sync_due = _sync_due(boot, sync_floor)
         try:
-            # Refresh IP in case network came up after boot
-            if myip == '127.0.0.1':
-                myip = get_local_ip()
-
-            send_heartbeat()
-
-            # Sync cache every hour
-            with state_lock:
-                last_sync = cache_last_sync
-            if time.time() - last_sync > 3600:
+            if now >= beat_due:
+                # Refresh IP in case network came up after boot
+                if myip == '127.0.0.1':
+                    myip = get_local_ip()
+
+                send_heartbeat()
+
+                # Read the interval each beat so a server-side change takes
+                # effect after the next cache sync without a restart
+                interval = get_heartbeat_interval()
+                if beat_slot is not None and interval == beat_interval and now < beat_slot + interval:
+                    beat_slot += interval
+                else:
+                    # First beat, a new interval or a stall: back onto the
+                    # grid, at least half an interval from now
+                    offset = schedule_phase('heartbeat') * interval
+                    beat_slot = next_slot(now + interval / 2, interval, offset)
+                beat_interval = interval
+                beat_due = beat_slot + random.uniform(-HEARTBEAT_JITTER, HEARTBEAT_JITTER) * interval
+
+            if now >= sync_due:
                 sync_cache_from_server()
+                # A failed sync leaves cache_last_sync alone; retry it with the
+                # next beat rather than straight away
+                sync_floor = beat_due
 
         except Exception as e:
             report(f"Heartbeat error: {e}")
+            beat_due = max(beat_due, now + get_heartbeat_interval())
+            sync_floor = max(sync_floor, beat_due)
 
-        # Read interval each loop so a server-side change takes effect after the
-        # next cache sync without restarting the controller.
-        time.sleep(get_heartbeat_interval())
+        sync_due = _sync_due(boot, sync_floor)
+        with schedule_lock:
+            schedule_state['next_heartbeat'] = beat_due
+        # Syncs started elsewhere move the next one; the wait is re-checked
+        # at least once a minute
+        time.sleep(min(max(min(beat_due, sync_due) - time.time(), 0.1), 60))
 
 
 def send_heartbeat():
-    """Send heartbeat to update door status in database"""
-    global db_connected, door_sensor_open
+    """
+    Send heartbeat to update door status in database.
+
+    One upsert and one read: the upsert auto-registers the door, refreshes its
+    status, clears a stale "updating" status (if we're heartbeating, the update
+    finished) and claims a pending update request; the read returns the claim
+    and the settings the controller follows (door sensor, poll interval).
+    """
+    global db_connected, door_sensor_open, command_poll_interval, heartbeat_health_column
 
     if not MYSQL_AVAILABLE:
         return
 
     db = None
     try:
-        db = get_db_connection(timeout=5)
+        # Autocommit: each statement stands alone, and it saves the
+        # SET autocommit and COMMIT round trips
+        db = get_db_connection(timeout=5, autocommit=True)
         if db is None:
             return
 
@@ -2410,61 +2824,64 @@ def send_heartbeat():
         held_open_val = 1 if zone_config.get("unlocked", False) else 0
         reader = zone_config.get("reader_type", "wiegand")
 
-        # Update door status with version, listen port, api_key, and door sensor state
+        # Door status with version, listen port, api_key, and door sensor state
         controller_api_key = zone_config.get("api_key", "")
         door_open_val = None
         if door_sensor_open is True:
             door_open_val = 1
         elif door_sensor_open is False:
             door_open_val = 0
-        cursor.execute("""
-            UPDATE doors
-            SET status = 'online',
-                last_seen = NOW(),
-                ip_address = %s,
-                locked = %s,
-                held_open = %s,
-                controller_version = %s,
-                listen_port = %s,
-                api_key = %s,
-                door_open = %s,
-                gate_state = %s,
-                gate_held = %s
-            WHERE name = %s
-        """, (myip, locked_status, held_open_val, VERSION, push_listener_port, controller_api_key, door_open_val, gate_state, 1 if gate_held else 0, zone))
-
-        # Auto-register door if it doesn't exist yet
-        if cursor.rowcount == 0:
-            cursor.execute("""
-                INSERT INTO doors (name, ip_address, status, last_seen, locked, held_open, reader_type, controller_version, listen_port, api_key, door_open)
-                VALUES (%s, %s, 'online', NOW(), %s, %s, %s, %s, %s, %s, %s)
-            """, (zone, myip, locked_status, held_open_val, reader, VERSION, push_listener_port, controller_api_key, door_open_val))
-            report(f"Door '{zone}' auto-registered in database")
-
-        # Clear stale "updating" status — if we're heartbeating, the update finished
-        cursor.execute("""
-            UPDATE doors
-            SET update_status = %s, update_status_time = NOW()
-            WHERE name = %s AND update_status LIKE 'updating%%'
-        """, (f'success: running {VERSION}', zone))
 
-        db.commit()
+        current = {
+            'ip_address': myip,
+            'locked': locked_status,
+            'held_open': held_open_val,
+            'controller_version': VERSION,
+            'listen_port': push_listener_port,
+            'api_key': controller_api_key,
+            'door_open': door_open_val,
+            'gate_state': gate_state,
+            'gate_held': 1 if gate_held else 0,
+        }
+        # Reader supervisor state: per-reader state, resets and time-to-recover
+        health = reader_health()
+        if health is not None and heartbeat_health_column:
+            current['reader_health'] = json.dumps(health, sort_keys=True)
+
+        # Only columns that changed since the server last took them (all of
+        # them when the periodic full refresh is due); status and last_seen
+        # are always written
+        columns, full = state_delta(current)
+        try:
+            cursor.execute(*_heartbeat_upsert(columns, reader))
+        except pymysql.Error as e:
+            if 'reader_health' not in current or e.args[0] != 1054:
+                raise
+            # Server without the reader_health column still gets the heartbeat
+            debug(f"Reader health not stored: {e}")
+            heartbeat_health_column = False
+            del current['reader_health']
+            columns.pop('reader_health', None)
+            cursor.execute(*_heartbeat_upsert(columns, reader))
+        if cursor.rowcount == 1:
+            # Inserted: the door row was missing, so it needs every column
+            report(f"Door '{zone}' auto-registered in database")
+            if not full:
+                columns, full = dict(current), True
+                cursor.execute(*_heartbeat_upsert(columns, reader))
+        record_state_write(current, columns, full)
 
-        # Check if an update has been requested
         cursor.execute("""
-            SELECT update_requested, door_sensor_gpio, door_sensor_invert FROM doors WHERE name = %s
+            SELECT update_status, door_sensor_gpio, door_sensor_invert, poll_interval FROM doors WHERE name = %s
         """, (zone,))
         row = cursor.fetchone()
-        if row and row.get('update_requested'):
+        if row and row.get('poll_interval') and 1 <= int(row['poll_interval']) <= 60:
+            command_poll_interval = int(row['poll_interval'])
+
+        # The upsert sets exactly 'updating' only when it claimed a request;
+        # an earlier 'updating...' has just been turned into success
+        if row and row.get('update_status') == 'updating':
             report("Update requested by server, initiating update...")
-            cursor.execute("""
-                UPDATE doors
-                SET update_requested = 0,
-                    update_status = 'updating',
-                    update_status_time = NOW()
-                WHERE name = %s
-            """, (zone,))
-            db.commit()
             trigger_update()
 
         # Check if door sensor GPIO pin or invert setting changed in DB
@@ -2502,27 +2919,265 @@ def send_heartbeat():
                 pass
 
 
+heartbeat_health_column = True  # False once the server rejects doors.reader_health
+
+
+def _heartbeat_upsert(columns, reader):
+    """
+    Build the heartbeat upsert.
+
+    Args:
+        columns: Status columns to write
+        reader: reader_type, only set when the door is auto-registered
+
+    Returns:
+        (sql, params) for cursor.execute
+    """
+    names = list(columns)
+    insert_names = ['name', 'status', 'last_seen', 'reader_type'] + names
+    insert_values = ['%s', "'online'", 'NOW()', '%s'] + ['%s'] * len(names)
+    sql = (
+        f"INSERT INTO doors ({', '.join(insert_names)}) "
+        f"VALUES ({', '.join(insert_values)}) "
+        "ON DUPLICATE KEY UPDATE status = 'online', last_seen = NOW(), "
+        + ''.join(f"{name} = VALUES({name}), " for name in names) +
+        # Evaluated left to right: update_status_time before update_status
+        # changes, and both before update_requested is cleared
+        "update_status_time = IF(update_requested OR update_status LIKE 'updating%%', NOW(), update_status_time), "
+        "update_status = IF(update_requested, 'updating', "
+        "IF(update_status LIKE 'updating%%', %s, update_status)), "
+        "update_requested = 0"
+    )
+    params = [zone, reader] + [columns[name] for name in names] + [f'success: running {VERSION}']
+    return sql, params
+
+
+# ============================================================
+# STATE SNAPSHOT (only changed door columns are written)
+# ============================================================
+
+server_state = {}  # doors column -> value the server last acknowledged
+server_state_time = 0  # When every column was last written (0 = never)
+state_stats = {'writes': 0, 'suppressed': 0, 'full_refreshes': 0,
+               'columns_sent': 0, 'columns_suppressed': 0}
+
+
+def state_delta(current, full=None):
+    """
+    Work out which door state columns need writing.
+
+    Args:
+        current: Current value of each column this writer owns
+        full: True to write every column, False for changes only, None to
+              write every column when the periodic full refresh is due
+
+    Returns:
+        (columns to write, whether this is a full refresh)
+    """
+    with snapshot_lock:
+        if full is None:
+            full = time.time() - server_state_time >= STATE_FULL_REFRESH
+        if full:
+            return dict(current), True
+        return {name: value for name, value in current.items()
+                if name not in server_state or server_state[name] != value}, False
+
+
+def record_state_write(current, sent, full):
+    """
+    Record a door state write once the server has taken it.
+
+    Args:
+        current: Every column the writer compared
+        sent: Columns actually written (empty if the write was skipped)
+        full: Whether it was a full refresh
+    """
+    global server_state_time
+    with snapshot_lock:
+        server_state.update(sent)
+        if full:
+            server_state_time = time.time()
+            state_stats['full_refreshes'] += 1
+        state_stats['writes' if sent else 'suppressed'] += 1
+        state_stats['columns_sent'] += len(sent)
+        state_stats['columns_suppressed'] += len(current) - len(sent)
+
+
+def state_write_stats():
+    """Door state write counters (suppressed = writes skipped as unchanged)"""
+    with snapshot_lock:
+        return dict(state_stats)
+
+
 # ============================================================
-# COMMAND POLL (lightweight fast-polling for remote commands)
+# COMMAND DELIVERY (push acknowledgements + reconciliation sweep)
 # ============================================================
 
+command_poll_interval = 3  # doors.poll_interval, read by the heartbeat
+command_ack_pending = None  # Latest acted-on command_seq not yet written back
+command_wake_event = threading.Event()  # Wakes the command loop (ack or lock state change)
+recent_commands = {}  # command_seq -> time acted on (dedupes a push retried as a DB flag)
+command_stats = {'push': 0, 'poll': 0, 'duplicate': 0, 'acks': 0, 'sweeps': 0, 'queries': 0}
+push_reached = False  # An authenticated request has come in over the push listener
+
+
 def start_command_poll_thread():
-    """Start the command poll thread for remote unlock and real-time lock state"""
+    """Start the command thread (acknowledgements, lock state, reconciliation sweep)"""
     global command_poll_thread
     command_poll_thread = threading.Thread(target=command_poll_loop, daemon=True)
     command_poll_thread.start()
 
 
+def accept_command(seq, source):
+    """
+    Record a server command before acting on it.
+
+    The server gives every unlock/hold/release a command_seq. A push that
+    timed out is also left as a DB flag under the same number, so a command
+    seen recently is a duplicate and must not be acted on twice.
+
+    Args:
+        seq: command_seq from the server, or None for an unsequenced command
+        source: 'push' or 'poll'
+
+    Returns:
+        False if the command was already acted on, True otherwise
+    """
+    global command_ack_pending
+
+    now = time.monotonic()
+    with command_lock:
+        if seq is not None:
+            seen = recent_commands.get(seq)
+            if seen is not None and now - seen < COMMAND_DEDUP_WINDOW:
+                command_stats['duplicate'] += 1
+                return False
+            if len(recent_commands) >= 64:
+                for old in [s for s, t in recent_commands.items() if now - t >= COMMAND_DEDUP_WINDOW]:
+                    del recent_commands[old]
+            recent_commands[seq] = now
+            if source == 'push':
+                command_ack_pending = seq
+        command_stats[source] += 1
+
+    if seq is not None and source == 'push':
+        command_wake_event.set()
+    return True
+
+
+def _command_query(cursor, sql, params):
+    """Execute one command-path statement and count it"""
+    cursor.execute(sql, params)
+    with command_lock:
+        command_stats['queries'] += 1
+
+
+def reconcile_commands(cursor, sequenced=True, timed=True):
+    """
+    Pick up a remote command whose push did not get through.
+
+    Only returns the door row when the server's command_seq has moved past
+    our command_ack, so an idle door costs one indexed read and no writes.
+    An unlock older than COMMAND_MAX_AGE (by doors.command_time) is
+    acknowledged without opening the door: the admin has likely walked away.
+
+    Args:
+        cursor: DictCursor on the access DB
+        sequenced: False for a server without the command_seq columns (the
+                   sweep then looks at the request flags directly)
+        timed: False for a server without the command_time column
+
+    Returns:
+        True if another command arrived during the sweep (sweep again now)
+    """
+    zone_config = config.get(zone, {})
+    with command_lock:
+        command_stats['sweeps'] += 1
+
+    # Age by the DB clock, so controller clock drift does not matter
+    age = "TIMESTAMPDIFF(SECOND, command_time, NOW())" if sequenced and timed else "NULL"
+    if sequenced:
+        _command_query(cursor,
+            f"SELECT unlock_requested, hold_requested, command_seq, {age} AS command_age FROM doors "
+            "WHERE name = %s AND command_seq <> command_ack",
+            (zone,)
+        )
+    else:
+        _command_query(cursor,
+            "SELECT unlock_requested, hold_requested, NULL AS command_seq, NULL AS command_age FROM doors "
+            "WHERE name = %s AND (unlock_requested <> 0 OR hold_requested <> 0)",
+            (zone,)
+        )
+    row = cursor.fetchone()
+    if not row:
+        return False
+
+    seq = int(row['command_seq']) if row.get('command_seq') is not None else None
+    if accept_command(seq, 'poll'):
+        # Handle remote unlock request
+        age = row.get('command_age')
+        if row.get('unlock_requested') and age is not None and age > COMMAND_MAX_AGE:
+            log_door_event('remote_unlock_expired', f'Remote unlock ignored ({age}s old)')
+            report(f"Remote unlock requested {age}s ago ignored (stale)")
+        elif row.get('unlock_requested'):
+            log_door_event('remote_unlock', 'Unlocked by remote request')
+            report("Remote unlock requested by server")
+
+            latch_gpio = zone_config.get("latch_gpio")
+            if latch_gpio:
+                unlock_briefly(latch_gpio)
+
+        # Handle hold_requested from web UI (stale requests are just cleared)
+        hold_req = int(row.get('hold_requested') or 0)
+        with hold_lock:
+            if hold_req == 1 and not zone_config.get("unlocked", False):
+                zone_config["unlocked"] = True
+                unlock_door()
+                log_door_event('door_held_open', 'Held open by admin')
+                report("Door held open by admin request")
+            elif hold_req == 2 and zone_config.get("unlocked", False):
+                zone_config["unlocked"] = False
+                lock_door()
+                log_door_event('lock', 'Hold released by admin')
+                report("Door hold released by admin request")
+    else:
+        debug(f"Command {seq} already delivered by push, clearing its DB flag")
+
+    # Clear the flags and acknowledge in one write. If the server queued
+    # another command since the SELECT, leave both for an immediate re-sweep.
+    if seq is None:
+        _command_query(cursor,
+            "UPDATE doors SET unlock_requested = 0, hold_requested = 0 WHERE name = %s",
+            (zone,)
+        )
+        return False
+    _command_query(cursor,
+        "UPDATE doors SET unlock_requested = 0, hold_requested = 0, command_ack = %s "
+        "WHERE name = %s AND command_seq = %s",
+        (seq, zone, seq)
+    )
+    return cursor.rowcount == 0
+
+
 def command_poll_loop():
-    """Lightweight fast-polling loop that checks for remote commands and sends lock state"""
-    global running
+    """
+    Write back command acknowledgements, lock state and missed commands.
+
+    Commands are delivered by the push listener. This loop writes each
+    pushed command_seq back to doors.command_ack once, reports lock state
+    only when it changes, and runs reconcile_commands() every
+    COMMAND_RECONCILE_INTERVAL seconds. Until the server has reached the push
+    listener (or when it is not running) the sweep is the only delivery path
+    known to work, so it runs every poll_interval seconds instead.
+    """
+    global running, command_ack_pending
 
     if not MYSQL_AVAILABLE:
         return
 
     db = None
-    # When push listener is active, use longer fallback interval (safety net only)
-    poll_interval = 15 if push_listener_port else 3
+    sequenced = timed = True
+    last_sweep = None  # None = sweep due now
 
     while running:
         # Fetch the zone config fresh each iteration. A SIGHUP rehash or a
@@ -2533,77 +3188,76 @@ def command_poll_loop():
         try:
             # Reconnect if needed
             if db is None:
-                db = get_db_connection(timeout=5)
+                # Autocommit: every statement here stands alone, and an idle
+                # sweep is then a single round trip
+                db = get_db_connection(timeout=5, autocommit=True)
                 if db is None:
                     time.sleep(DB_RETRY_INTERVAL)
                     continue
                 debug("Command poll: connected to database")
+                sequenced = timed = True
 
             cursor = db.cursor(pymysql.cursors.DictCursor)
 
-            # Check for remote commands and read current poll interval
-            cursor.execute(
-                "SELECT unlock_requested, hold_requested, poll_interval FROM doors WHERE name = %s",
-                (zone,)
-            )
-            row = cursor.fetchone()
-
-            if row:
-                # Update poll interval dynamically
-                new_interval = row.get('poll_interval')
-                if new_interval and 1 <= int(new_interval) <= 60:
-                    poll_interval = int(new_interval)
-
-                # Handle remote unlock request
-                if row.get('unlock_requested'):
-                    cursor.execute(
-                        "UPDATE doors SET unlock_requested = 0 WHERE name = %s",
-                        (zone,)
-                    )
-
-                    log_door_event('remote_unlock', 'Unlocked by remote request')
-                    report("Remote unlock requested by server")
-
-                    latch_gpio = zone_config.get("latch_gpio")
-                    if latch_gpio:
-                        unlock_briefly(latch_gpio)
-
-                # Handle hold_requested from web UI
-                hold_req = int(row.get('hold_requested') or 0)
-                if hold_req == 1 and not zone_config.get("unlocked", False):
-                    zone_config["unlocked"] = True
-                    unlock_door()
-                    log_door_event('door_held_open', 'Held open by admin')
-                    report("Door held open by admin request")
-                    cursor.execute(
-                        "UPDATE doors SET hold_requested = 0, held_open = 1 WHERE name = %s",
-                        (zone,)
-                    )
-                elif hold_req == 2 and zone_config.get("unlocked", False):
-                    zone_config["unlocked"] = False
-                    lock_door()
-                    log_door_event('lock', 'Hold released by admin')
-                    report("Door hold released by admin request")
-                    cursor.execute(
-                        "UPDATE doors SET hold_requested = 0, held_open = 0 WHERE name = %s",
-                        (zone,)
-                    )
-                elif hold_req:
-                    # Stale request (e.g. hold requested but already held), just clear it
-                    cursor.execute(
-                        "UPDATE doors SET hold_requested = 0 WHERE name = %s",
-                        (zone,)
-                    )
-
-            # Send real-time lock state and held_open AFTER processing commands
+            pushed = push_listener_port and push_reached
+            sweep_interval = COMMAND_RECONCILE_INTERVAL if pushed else command_poll_interval
+            now = time.monotonic()
+            if last_sweep is None or now - last_sweep >= sweep_interval:
+                last_sweep = now
+                while True:
+                    try:
+                        again = reconcile_commands(cursor, sequenced, timed)
+                        break
+                    except pymysql.Error as e:
+                        if not sequenced or e.args[0] != 1054:
+                            raise
+                        # Unknown column: server predates command_time or command_seq
+                        if timed:
+                            debug("Command poll: no command_time column, not aging unlocks")
+                            timed = False
+                        else:
+                            debug("Command poll: no command_seq column, sweeping request flags")
+                            sequenced = False
+                if again:
+                    last_sweep = None
+
+            # Write back the latest pushed command and the lock state, in one
+            # statement and only when one of them changed
+            with command_lock:
+                ack = command_ack_pending
             with state_lock:
                 locked_status = 0 if door_unlocked else 1
-            held_open_val = 1 if zone_config.get("unlocked", False) else 0
-            cursor.execute(
-                "UPDATE doors SET locked = %s, held_open = %s WHERE name = %s",
-                (locked_status, held_open_val, zone)
-            )
-            db.commit()
+            current = {
+                'locked': locked_status,
+                'held_open': 1 if zone_config.get("unlocked", False) else 0,
+            }
+            changed, _ = state_delta(current, full=False)
+            state = (current['locked'], current['held_open'])
+
+            if ack is not None and sequenced:
+                # Acks carry the lock state the command led to. A push that
+                # timed out on the server side may also have been left in
+                # the request flags; they are done with too unless a newer
+                # command has been queued since
+                _command_query(cursor,
+                    "UPDATE doors SET locked = %s, held_open = %s, "
+                    "unlock_requested = IF(command_seq = %s, 0, unlock_requested), "
+                    "hold_requested = IF(command_seq = %s, 0, hold_requested), "
+                    "command_ack = GREATEST(command_ack, %s) WHERE name = %s",
+                    state + (ack, ack, ack, zone)
+                )
+                changed = current
+            elif changed:
+                _command_query(cursor,
+                    "UPDATE doors SET locked = %s, held_open = %s WHERE name = %s",
+                    state + (zone,)
+                )
+            record_state_write(current, changed, False)
+            if ack is not None:
+                with command_lock:
+                    command_stats['acks'] += 1
+                    if command_ack_pending == ack:
+                        command_ack_pending = None
 
         except pymysql.Error as e:
             debug(f"Command poll error: {e}")
@@ -2620,7 +3274,10 @@ def command_poll_loop():
         except Exception as e:
             debug(f"Command poll unexpected error: {e}")
 
-        time.sleep(poll_interval)
+        # Lock state is checked every poll_interval (no query unless it
+        # changed); a pushed command wakes the loop to acknowledge it at once
+        if command_wake_event.wait(0 if last_sweep is None else command_poll_interval):
+            command_wake_event.clear()
 
     # Cleanup on exit
     if db:
@@ -2630,6 +3287,349 @@ def command_poll_loop():
             pass
 
 
+def command_delivery_stats():
+    """Command delivery counters and the command path's DB query rate"""
+    with command_lock:
+        stats = dict(command_stats)
+    minutes = max(time.time() - _start_time, 1) / 60
+    stats['queries_per_min'] = round(stats['queries'] / minutes, 2)
+    return stats
+
+
+# ============================================================
+# METRICS (Prometheus text format on the push listener's /metrics)
+# ============================================================
+# Scan path instrumentation is a perf_counter() pair, one bisect and a dict
+# update under metrics_lock (a few microseconds); everything else is read
+# when /metrics is scraped.
+
+DECISION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+DB_CONNECT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LOG_WRITE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+GC_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+
+METRIC_HELP = {
+    'pidoors_scans_total': ('counter', 'Card scans by access decision outcome and decision path'),
+    'pidoors_decision_seconds': ('histogram', 'Card read to grant/deny, by decision path'),
+    'pidoors_db_connect_seconds': ('histogram', 'Database connect time including the TLS handshake'),
+    'pidoors_db_connect_failures_total': ('counter', 'Database connections that failed'),
+    'pidoors_log_write_seconds': ('histogram', 'Local offline log write time, by log'),
+    'pidoors_local_log_entries': ('gauge', 'Entries held in the local offline log, by log'),
+    'pidoors_gc_pause_seconds': ('histogram', 'Garbage collector pauses, by generation'),
+    'pidoors_up': ('gauge', 'Controller process is running'),
+    'pidoors_uptime_seconds': ('gauge', 'Seconds since the controller started'),
+    'pidoors_db_connected': ('gauge', 'Last database operation succeeded'),
+    'pidoors_cache_age_seconds': ('gauge', 'Seconds since the last cache sync (-1 if never)'),
+    'pidoors_cache_cards': ('gauge', 'Cards in the local cache'),
+    'pidoors_cache_master_cards': ('gauge', 'Master cards held locally'),
+    'pidoors_threads': ('gauge', 'Live threads'),
+    'pidoors_resident_memory_bytes': ('gauge', 'Resident set size'),
+    'pidoors_read_queue_depth': ('gauge', 'Card reads waiting for a dispatcher worker'),
+    'pidoors_read_queue_dropped_total': ('counter', 'Card reads dropped because the read queue was full'),
+    'pidoors_reader_up': ('gauge', 'Reader is running'),
+    'pidoors_reader_consecutive_failures': ('gauge', 'Reader hardware failures since its last success'),
+    'pidoors_reader_failures_total': ('counter', 'Reader hardware failures (missed replies, I/O errors)'),
+    'pidoors_reader_resets_total': ('counter', 'Reader hard resets by the supervisor'),
+    'pidoors_reads_suppressed_total': ('counter', 'Repeat reads dropped by the debounce filter'),
+    'pidoors_command_events_total': ('counter', 'Remote command delivery counters'),
+    'pidoors_state_writes_total': ('counter', 'Door state write counters'),
+    'pidoors_cache_deltas_total': ('counter', 'Server-pushed cache deltas by result'),
+    'pidoors_push_total': ('counter', 'Push listener connection and request counters'),
+}
+
+metrics_lock = threading.Lock()
+metric_counters = {}    # (name, labels) -> value
+metric_gauges = {}      # (name, labels) -> value
+metric_histograms = {}  # (name, labels) -> [bounds, bucket counts, sum]
+_scan_context = threading.local()  # Per dispatcher worker: scan start time and decision path
+_gc_started = [0.0]
+
+
+def metric_inc(name, labels=(), value=1):
+    """Add to a counter. labels is a tuple of (name, value) pairs."""
+    key = (name, labels)
+    with metrics_lock:
+        metric_counters[key] = metric_counters.get(key, 0) + value
+
+
+def metric_set(name, value, labels=()):
+    """Set a gauge"""
+    with metrics_lock:
+        metric_gauges[(name, labels)] = value
+
+
+def metric_observe(name, bounds, value, labels=()):
+    """Record one histogram observation"""
+    index = bisect.bisect_left(bounds, value)
+    key = (name, labels)
+    with metrics_lock:
+        histogram = metric_histograms.get(key)
+        if histogram is None:
+            histogram = metric_histograms[key] = [bounds, [0] * (len(bounds) + 1), 0.0]
+        histogram[1][index] += 1
+        histogram[2] += value
+
+
+def scan_started():
+    """Mark the start of an access decision on this dispatcher worker"""
+    _scan_context.start = time.perf_counter()
+    _scan_context.path = 'cache'
+
+
+def scan_path(path):
+    """Name the path the current decision is taking (master/lockdown/db/cache/offline)"""
+    _scan_context.path = path
+
+
+def scan_decided(granted):
+    """Record the current scan's outcome and decision latency (once per scan)"""
+    start = getattr(_scan_context, 'start', None)
+    if start is None:
+        return  # Not a card scan (e.g. REX or remote command)
+    _scan_context.start = None
+    elapsed = time.perf_counter() - start
+    path = _scan_context.path
+    metric_inc('pidoors_scans_total', (('outcome', 'granted' if granted else 'denied'), ('path', path)))
+    metric_observe('pidoors_decision_seconds', DECISION_BUCKETS, elapsed, (('path', path),))
+
+
+def _gc_callback(phase, info):
+    # Runs inside the collector, which never overlaps itself, so it takes no
+    # lock (and must not take metrics_lock: the collection may have been
+    # triggered by an allocation made while that lock is held)
+    if phase == 'start':
+        _gc_started[0] = time.perf_counter()
+        return
+    elapsed = time.perf_counter() - _gc_started[0]
+    generation = info.get('generation', 0)
+    counts, sums = _gc_pauses
+    counts[generation][bisect.bisect_left(GC_BUCKETS, elapsed)] += 1
+    sums[generation] += elapsed
+
+
+_gc_pauses = ([[0] * (len(GC_BUCKETS) + 1) for _ in range(3)], [0.0, 0.0, 0.0])
+
+
+def start_metrics():
+    """Start collecting process metrics that need a hook (GC pauses)"""
+    if _gc_callback not in gc.callbacks:
+        gc.callbacks.append(_gc_callback)
+
+
+def _resident_memory_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _metric_line(name, labels, value):
+    if not labels:
+        return f'{name} {value}'
+    text = ','.join(
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in labels)
+    return f'{name}{{{text}}} {value}'
+
+
+def _histogram_lines(name, labels, bounds, counts, total):
+    lines = []
+    cumulative = 0
+    for bound, count in zip(bounds, counts):
+        cumulative += count
+        lines.append(_metric_line(f'{name}_bucket', labels + (('le', repr(float(bound))),), cumulative))
+    cumulative += counts[-1]
+    lines.append(_metric_line(f'{name}_bucket', labels + (('le', '+Inf'),), cumulative))
+    lines.append(_metric_line(f'{name}_sum', labels, round(total, 6)))
+    lines.append(_metric_line(f'{name}_count', labels, cumulative))
+    return lines
+
+
+def render_metrics():
+    """Build the /metrics response (Prometheus text exposition format 0.0.4)"""
+    with metrics_lock:
+        counters = dict(metric_counters)
+        gauges = dict(metric_gauges)
+        histograms = {key: (h[0], list(h[1]), h[2]) for key, h in metric_histograms.items()}
+
+    # Values read at scrape time
+    with state_lock:
+        last_sync = cache_last_sync
+        connected = db_connected
+    with cache_lock:
+        cached_cards = len(local_cache.get('cards', {}))
+    with master_lock:
+        cached_masters = len(master_cards)
+    gauges[('pidoors_up', ())] = 1
+    gauges[('pidoors_uptime_seconds', ())] = int(time.time() - _start_time)
+    gauges[('pidoors_db_connected', ())] = 1 if connected else 0
+    gauges[('pidoors_cache_age_seconds', ())] = int(time.time() - last_sync) if last_sync else -1
+    gauges[('pidoors_cache_cards', ())] = cached_cards
+    gauges[('pidoors_cache_master_cards', ())] = cached_masters
+    gauges[('pidoors_threads', ())] = threading.active_count()
+    gauges[('pidoors_resident_memory_bytes', ())] = _resident_memory_bytes()
+
+    if card_dispatcher:
+        status = card_dispatcher.get_status()
+        gauges[('pidoors_read_queue_depth', ())] = status['queue_depth']
+        counters[('pidoors_read_queue_dropped_total', ())] = status['dropped']
+        debounce = status['debounce']['readers']
+        health = status.get('health') or {}
+        for name, reader in card_dispatcher.readers.items():
+            labels = (('reader', name), ('type', reader.get_reader_type().value))
+            gauges[('pidoors_reader_up', labels)] = 1 if reader.status in (ReaderStatus.READY, ReaderStatus.READING) else 0
+            gauges[('pidoors_reader_consecutive_failures', labels)] = reader.consecutive_failures
+            counters[('pidoors_reader_failures_total', labels)] = reader.failures_total
+            counters[('pidoors_reader_resets_total', labels)] = health.get(name, {}).get('resets', 0)
+            counters[('pidoors_reads_suppressed_total', labels)] = debounce.get(name, {}).get('suppressed', 0)
+
+    for stat, value in command_delivery_stats().items():
+        if stat != 'queries_per_min':
+            counters[('pidoors_command_events_total', (('event', stat),))] = value
+    for stat, value in state_write_stats().items():
+        counters[('pidoors_state_writes_total', (('stat', stat),))] = value
+    for stat, value in push_listener_stats().items():
+        counters[('pidoors_push_total', (('stat', stat),))] = value
+    for stat, value in cache_delta_status().items():
+        if stat in cache_delta_stats:
+            counters[('pidoors_cache_deltas_total', (('result', stat),))] = value
+
+    counts, sums = _gc_pauses
+    for generation in range(3):
+        histograms[('pidoors_gc_pause_seconds', (('generation', str(generation)),))] = (
+            GC_BUCKETS, list(counts[generation]), sums[generation])
+
+    lines = []
+    for kind, series in (('counter', counters), ('gauge', gauges)):
+        for name in sorted({n for n, _ in series}):
+            lines.append(f'# HELP {name} {METRIC_HELP[name][1]}')
+            lines.append(f'# TYPE {name} {kind}')
+            for (n, labels), value in sorted(series.items()):
+                if n == name:
+                    lines.append(_metric_line(name, labels, value))
+    for name in sorted({n for n, _ in histograms}):
+        lines.append(f'# HELP {name} {METRIC_HELP[name][1]}')
+        lines.append(f'# TYPE {name} histogram')
+        for (n, labels), (bounds, bucket_counts, total) in sorted(histograms.items()):
+            if n == name:
+                lines.extend(_histogram_lines(name, labels, bounds, bucket_counts, total))
+    return '\n'.join(lines) + '\n'
+
+
+# ============================================================
+# EVENT STREAM
+# ============================================================
+#
+# Access decisions, door sensor changes, gate transitions and REX presses
+# go into a ring buffer that /events streams as server-sent events.
+# Sequence numbers start at the boot time in milliseconds, so they keep
+# increasing across restarts: a consumer resuming (Last-Event-ID) from an
+# id the buffer no longer holds gets a "reset" event telling it what it
+# missed instead of silently skipping ahead.
+
+EVENT_BUFFER_SIZE = 1000  # Events kept for consumers that reconnect
+EVENT_MAX_STREAMS = 4     # Concurrent /events consumers
+EVENT_KEEPALIVE = 15      # Seconds between comment lines on an idle stream
+
+event_lock = threading.Lock()
+event_buffer = deque(maxlen=EVENT_BUFFER_SIZE)  # (seq, kind, data)
+event_seq = int(time.time() * 1000)  # Last sequence number handed out
+event_waiters = set()  # (loop, asyncio.Event) per open stream
+
+
+def publish_event(kind, **data):
+    """Append an event to the ring buffer and wake the open streams"""
+    global event_seq
+    data['time'] = round(time.time(), 3)
+    with event_lock:
+        event_seq += 1
+        event_buffer.append((event_seq, kind, data))
+        waiters = list(event_waiters)
+    for loop, waiter in waiters:
+        try:
+            loop.call_soon_threadsafe(waiter.set)
+        except RuntimeError:
+            pass  # Listener loop already closed
+
+
+def events_since(seq):
+    """
+    Buffered events after a sequence number.
+
+    Returns:
+        (events, head, lost): head is the newest sequence number; lost is
+        True when events after seq have left the buffer, or seq was never
+        handed out by this boot
+    """
+    with event_lock:
+        head = event_seq
+        oldest = event_buffer[0][0] if event_buffer else head + 1
+        if seq > head:
+            return [], head, True
+        # Sequence numbers in the buffer are contiguous
+        start = max(0, seq + 1 - oldest)
+        return list(event_buffer)[start:], head, seq + 1 < oldest
+
+
+def event_stream_stats():
+    """Event buffer position and open streams"""
+    with event_lock:
+        return {'seq': event_seq, 'buffered': len(event_buffer), 'streams': len(event_waiters)}
+
+
+def _sse_event(seq, kind, data):
+    return f"id: {seq}\nevent: {kind}\ndata: {json.dumps(data, default=str)}\n\n".encode()
+
+
+async def _stream_events(reader, writer, resume):
+    """
+    Serve one /events stream until the consumer goes away.
+
+    Args:
+        reader, writer: Connection streams (response headers not yet sent)
+        resume: Last sequence number the consumer has seen, or None for
+                only new events
+    """
+    import asyncio
+
+    waiter = asyncio.Event()
+    entry = (asyncio.get_running_loop(), waiter)
+    with event_lock:
+        event_waiters.add(entry)
+        last = event_seq if resume is None else resume
+    # The consumer sends nothing more; a read returning means it hung up
+    hangup = asyncio.ensure_future(reader.read(1))
+    try:
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: close\r\n\r\nretry: 2000\n\n")
+        while True:
+            waiter.clear()
+            events, head, lost = events_since(last)
+            if lost:
+                first = events[0][0] if events else head + 1
+                writer.write(_sse_event(first - 1, 'reset', {'from': last, 'resume': first}))
+                last = first - 1
+            for seq, kind, data in events:
+                writer.write(_sse_event(seq, kind, data))
+                last = seq
+            await writer.drain()
+            woken = asyncio.ensure_future(waiter.wait())
+            done, _ = await asyncio.wait((woken, hangup), timeout=EVENT_KEEPALIVE,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if hangup in done:
+                woken.cancel()
+                return
+            if not done:
+                woken.cancel()
+                writer.write(b": keepalive\n\n")
+    finally:
+        hangup.cancel()
+        with event_lock:
+            event_waiters.discard(entry)
+
+
 # ============================================================
 # HTTPS PUSH LISTENER
 # ============================================================
@@ -2696,198 +3696,524 @@ def _get_status_dict():
         'is_gate': gate_enabled,
         'gate_state': gate_state,
         'gate_held': gate_held,
+        'reads_suppressed': card_dispatcher.suppressed if card_dispatcher else 0,
+        'reader_health': reader_health(),
+        'commands': command_delivery_stats(),
+        'state_writes': state_write_stats(),
+        'push': push_listener_stats(),
+        'cache_deltas': cache_delta_status(),
+        'events': event_stream_stats(),
+        'schedule': schedule_status(),
     }
 
 
-def _run_push_listener(port, api_key, cert_file, key_file):
-    """Run the HTTPS listener in a thread. Stdlib only."""
-    import ssl
-    from http.server import HTTPServer, BaseHTTPRequestHandler
+# Listener limits. Handlers run on a small thread pool (they touch GPIO, the
+# cache and config files); requests beyond what the pool can queue get a 503
+# instead of another thread.
+PUSH_MAX_CONNECTIONS = 32      # Open connections (keep-alive included)
+PUSH_HANDLER_THREADS = 4       # Threads running route handlers
+PUSH_MAX_PENDING = 16          # Requests queued or running before answering 503
+PUSH_MAX_HEADER_BYTES = 8192   # Request line plus headers
+PUSH_MAX_BODY_BYTES = 65536
+PUSH_REQUEST_TIMEOUT = 10      # Seconds to finish the TLS handshake or send a request
+PUSH_KEEPALIVE_TIMEOUT = 30    # Seconds an idle keep-alive connection stays open
+PUSH_MAX_BATCH = 16            # Commands in one /cmd/batch request
+PUSH_GATE_ACTIONS = ('open', 'close', 'stop', 'hold', 'release')
+PUSH_BATCH_GET = ('/status', '/metrics')    # Batch entries answered as GET
+PUSH_BATCH_POST = ('/ping', '/cmd/unlock', '/cmd/hold', '/cmd/release', '/cmd/rename',
+                   '/cmd/cache-delta', '/cmd/update', '/cmd/sync', '/cmd/reload-config'
+                   ) + tuple(f'/cmd/gate/{action}' for action in PUSH_GATE_ACTIONS)
+PUSH_BATCH_HOLD = ('/cmd/hold', '/cmd/release')  # Entries that make a batch atomic
 
-    controller_api_key = api_key
+push_stats = {'connections': 0, 'tls_resumed': 0, 'requests': 0, 'keepalive_requests': 0,
+              'rejected_busy': 0, 'rejected_limits': 0}
+push_stats_lock = threading.Lock()
 
-    class PushHandler(BaseHTTPRequestHandler):
 
-        def _check_auth(self):
-            auth = self.headers.get('Authorization', '')
-            expected = f'Bearer {controller_api_key}'
-            if not hmac.compare_digest(auth.encode(), expected.encode()):
-                self._respond(403, {'ok': False, 'error': 'Forbidden'})
-                return False
-            return True
+def _push_count(name, n=1):
+    with push_stats_lock:
+        push_stats[name] += n
 
-        def _respond(self, code, body):
-            payload = json.dumps(body).encode()
-            self.send_response(code)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Content-Length', str(len(payload)))
-            self.end_headers()
-            self.wfile.write(payload)
-
-        def do_POST(self):
-            global zone
-            if not self._check_auth():
-                return
 
-            client_ip = self.client_address[0]
-            path = self.path.rstrip('/')
-            zone_config = config.get(zone, {})
+def push_listener_stats():
+    """Push listener connection and request counters"""
+    with push_stats_lock:
+        return dict(push_stats)
+
+
+def _push_route(method, path, body, client_ip):
+    """
+    Handle one authenticated push listener request.
+
+    Args:
+        method: 'GET' or 'POST'
+        path: Request path without trailing slash
+        body: Parsed JSON request body ({} when empty)
+        client_ip: Caller address, for the log
+
+    Returns:
+        (HTTP status, response body): a JSON-serialisable body, or a str
+        sent as Prometheus text (/metrics)
+    """
+    global zone
+
+    if method == 'GET':
+        if path == '/status':
+            return 200, _get_status_dict()
+        if path == '/metrics':
+            return 200, render_metrics()
+        return 404, {'ok': False, 'error': 'Not found'}
+
+    if path == '/cmd/batch':
+        return _push_batch(body, client_ip)
+
+    zone_config = config.get(zone, {})
+
+    if path in ('/cmd/unlock', '/cmd/hold', '/cmd/release'):
+        # Sequenced server commands are acknowledged through
+        # doors.command_ack; a repeat of one already acted on is a no-op
+        try:
+            seq = int(body['seq']) if body.get('seq') is not None else None
+        except (ValueError, TypeError):
+            return 400, {'ok': False, 'error': 'Invalid seq'}
+        if not accept_command(seq, 'push'):
+            debug(f"Push: command {seq} already delivered, ignoring")
+            return 200, {'ok': True, 'seq': seq, 'duplicate': True}
+
+    if path == '/cmd/unlock':
+        latch_gpio = zone_config.get('latch_gpio')
+        if latch_gpio:
+            log_door_event('remote_unlock', 'Unlocked by push command')
+            report(f"Push: remote unlock from {client_ip}")
+            unlock_briefly(latch_gpio)
+        with state_lock:
+            locked = not door_unlocked
+        return 200, {'ok': True, 'locked': locked}
+
+    if path == '/cmd/hold':
+        with hold_lock:
+            if not zone_config.get('unlocked', False):
+                zone_config['unlocked'] = True
+                unlock_door()
+                log_door_event('door_held_open', 'Held open by push command')
+                report(f"Push: door held open from {client_ip}")
+        return 200, {'ok': True, 'held_open': True}
+
+    if path == '/cmd/release':
+        with hold_lock:
+            if zone_config.get('unlocked', False):
+                zone_config['unlocked'] = False
+                lock_door()
+                log_door_event('lock', 'Hold released by push command')
+                report(f"Push: hold released from {client_ip}")
+        return 200, {'ok': True, 'held_open': False}
+
+    if path == '/cmd/rename':
+        new_name = str(body.get('new_name', '')).strip()
+        if not new_name:
+            return 400, {'ok': False, 'error': 'new_name required'}
+        # No-op if already using this name
+        if new_name == zone:
+            return 200, {'ok': True, 'old_name': zone, 'new_name': new_name, 'no_change': True}
+        report(f"Push: rename from '{zone}' to '{new_name}' from {client_ip}")
+        try:
+            old_zone = zone
+            # Update config.json — move the zone key (must happen before zone.json
+            # is written, so if we crash we can detect the mismatch)
+            config_file = os.path.join(CONF_DIR, 'config.json')
+            cfg = load_json(config_file)
+            if old_zone in cfg:
+                cfg[new_name] = cfg.pop(old_zone)
+            elif new_name not in cfg:
+                # Old zone missing — refuse to create an empty new entry
+                raise RuntimeError(f"Zone '{old_zone}' not found in config.json")
+            save_json(config_file, cfg)
+            # Update zone.json
+            zone_file = os.path.join(CONF_DIR, 'zone.json')
+            save_json(zone_file, {'zone': new_name})
+            # Update in-memory zone so the running process uses the new name
+            # even if the service restart below fails
+            zone = new_name
+            report(f"Door renamed from '{old_zone}' to '{new_name}'")
+            # Best-effort service restart to reinitialize GPIO/push listener with
+            # new name, delayed so the response goes out first
+            restart = threading.Timer(
+                1.0, lambda: os.system('sudo -n systemctl restart pidoors 2>/dev/null'))
+            restart.daemon = True
+            restart.start()
+            return 200, {'ok': True, 'old_name': old_zone, 'new_name': new_name, 'restarted': True}
+        except Exception as e:
+            report(f"Rename failed: {e}")
+            return 500, {'ok': False, 'error': str(e)}
+
+    if path == '/cmd/cache-delta':
+        try:
+            version = int(body['version'])
+            delta = body['delta']
+            if not isinstance(delta, str):
+                raise TypeError
+        except (KeyError, ValueError, TypeError):
+            return 400, {'ok': False, 'error': 'version and delta required'}
+        if not hmac.compare_digest(str(body.get('signature', '')), cache_delta_signature(version, delta)):
+            with cache_lock:
+                cache_delta_stats['rejected'] += 1
+            report(f"Push: cache delta {version} from {client_ip} has a bad signature")
+            return 403, {'ok': False, 'error': 'Bad signature'}
+        try:
+            changes = parse_cache_delta(delta)
+        except ValueError as e:
+            return 400, {'ok': False, 'error': f'Invalid delta: {e}'}
+        result, local_version = apply_cache_delta(version, changes)
+        if result == 'gap':
+            request_cache_sync(f"cache delta {version} does not follow {local_version}")
+            return 409, {'ok': False, 'resync': True, 'version': local_version}
+        debug(f"Push: cache delta {version} {result}")
+        return 200, {'ok': True, 'version': local_version, 'duplicate': result == 'duplicate'}
+
+    if path == '/cmd/update':
+        report(f"Push: update requested from {client_ip}")
+        trigger_update()
+        return 200, {'ok': True, 'updating': True}
+
+    if path == '/cmd/sync':
+        report(f"Push: cache sync requested from {client_ip}")
+        threading.Thread(target=sync_cache_from_server, daemon=True).start()
+        return 200, {'ok': True}
+
+    if path == '/cmd/reload-config':
+        report(f"Push: config reload requested from {client_ip}")
+        threading.Thread(target=sync_cache_from_server, daemon=True).start()
+        return 200, {'ok': True, 'reloading': True}
+
+    if path.startswith('/cmd/gate/'):
+        gate_action = path.replace('/cmd/gate/', '')
+        if gate_action not in PUSH_GATE_ACTIONS:
+            return 400, {'ok': False, 'error': 'Unknown gate action'}
+        if not gate_enabled:
+            return 400, {'ok': False, 'error': 'Door is not configured as a gate'}
+        # Body force flag: operator override for clearance sensor
+        source = f'push:{client_ip}'
+        if body.get('force') and gate_action == 'close':
+            source = 'button-hold-override'  # Same source as physical hold-override
+        report(f"Push: gate/{gate_action} from {client_ip}" + (' (force)' if body.get('force') else ''))
+        ok, reason = gate_command(gate_action, source=source)
+        response = {'ok': ok, 'gate_state': gate_state, 'gate_held': gate_held}
+        if reason:
+            response['reason'] = reason
+        return 200, response
+
+    if path == '/ping':
+        return 200, _get_status_dict()
+
+    return 404, {'ok': False, 'error': 'Not found'}
+
+
+def _push_batch(body, client_ip):
+    """
+    Run an ordered list of push commands and return every result at once.
+
+    Body: {"commands": [{"path": "/cmd/reload-config"}, "/cmd/sync",
+    {"path": "/cmd/hold", "body": {"seq": 12}}, "/status"],
+    "stop_on_error": true}. Each entry goes through _push_route exactly as
+    if it had been sent on its own. Every entry is checked against the
+    known routes (PUSH_BATCH_GET/PUSH_BATCH_POST, with an optional "method"
+    that must match) before anything runs, so a mistyped route rejects the
+    whole batch with 400. A batch with a hold or release holds hold_lock
+    throughout, so no master card, poll or other push can change the
+    held-open state between its steps. Once an entry fails the rest are
+    skipped unless stop_on_error is false.
+
+    Returns:
+        (HTTP status, response body) with one {path, status, result} per entry
+    """
+    commands = body.get('commands')
+    if not isinstance(commands, list) or not commands:
+        return 400, {'ok': False, 'error': 'commands must be a non-empty list'}
+    if len(commands) > PUSH_MAX_BATCH:
+        return 400, {'ok': False, 'error': f'At most {PUSH_MAX_BATCH} commands per batch'}
+
+    steps = []
+    for i, entry in enumerate(commands):
+        if isinstance(entry, str):
+            entry = {'path': entry}
+        path = str(entry.get('path', '')).rstrip('/') if isinstance(entry, dict) else ''
+        step_body = entry.get('body', {}) if isinstance(entry, dict) else None
+        if not path.startswith('/') or not isinstance(step_body, dict):
+            return 400, {'ok': False, 'error': f'Invalid command at index {i}'}
+        method = 'GET' if path in PUSH_BATCH_GET else 'POST'
+        if (path not in PUSH_BATCH_GET and path not in PUSH_BATCH_POST
+                or str(entry.get('method', method)).upper() != method):
+            return 400, {'ok': False, 'error': f'Unknown route at index {i}: {path}'}
+        if path == '/cmd/rename' and i != len(commands) - 1:
+            # Rename restarts the service; nothing after it would run
+            return 400, {'ok': False, 'error': '/cmd/rename must be the last command'}
+        steps.append((method, path, step_body))
+
+    stop_on_error = body.get('stop_on_error', True) is not False
+    atomic = any(path in PUSH_BATCH_HOLD for _, path, _ in steps)
+    debug(f"Push: batch of {len(steps)} from {client_ip}" + (' (atomic)' if atomic else ''))
+
+    results = []
+    failed = False
+    if atomic:
+        hold_lock.acquire()
+    try:
+        for method, path, step_body in steps:
+            if failed and stop_on_error:
+                results.append({'path': path, 'status': None, 'skipped': True})
+                continue
+            try:
+                code, result = _push_route(method, path, step_body, client_ip)
+            except Exception as e:
+                report(f"Push: batch {path} failed: {e}")
+                code, result = 500, {'ok': False, 'error': 'Internal error'}
+            results.append({'path': path, 'status': code, 'result': result})
+            if code >= 400 or (isinstance(result, dict) and result.get('ok') is False):
+                failed = True
+    finally:
+        if atomic:
+            hold_lock.release()
+
+    return 200, {'ok': not failed, 'atomic': atomic, 'results': results}
+
+
+def _push_response(code, body, keep_alive, extra_headers=()):
+    """Serialise an HTTP/1.1 response: JSON, or Prometheus text for a str body"""
+    from http import HTTPStatus
+
+    if isinstance(body, str):
+        payload = body.encode()
+        content_type = "text/plain; version=0.0.4; charset=utf-8"
+    else:
+        payload = json.dumps(body).encode()
+        content_type = "application/json"
+    headers = [
+        f"HTTP/1.1 {code} {HTTPStatus(code).phrase}",
+        f"Content-Type: {content_type}",
+        f"Content-Length: {len(payload)}",
+    ]
+    if keep_alive:
+        headers += ["Connection: keep-alive", f"Keep-Alive: timeout={PUSH_KEEPALIVE_TIMEOUT}"]
+    else:
+        headers.append("Connection: close")
+    headers.extend(extra_headers)
+    return ('\r\n'.join(headers) + '\r\n\r\n').encode() + payload
+
+
+async def _read_push_request(reader):
+    """
+    Read one request's headers from a connection.
+
+    Returns:
+        (method, path, query, version, headers) with lower-cased header names, or
+        None if the peer closed the connection before sending a request
 
-            if path == '/cmd/unlock':
-                latch_gpio = zone_config.get('latch_gpio')
-                if latch_gpio:
-                    log_door_event('remote_unlock', 'Unlocked by push command')
-                    report(f"Push: remote unlock from {client_ip}")
-                    unlock_briefly(latch_gpio)
-                with state_lock:
-                    locked = not door_unlocked
-                self._respond(200, {'ok': True, 'locked': locked})
-
-            elif path == '/cmd/hold':
-                if not zone_config.get('unlocked', False):
-                    zone_config['unlocked'] = True
-                    unlock_door()
-                    log_door_event('door_held_open', 'Held open by push command')
-                    report(f"Push: door held open from {client_ip}")
-                self._respond(200, {'ok': True, 'held_open': True})
-
-            elif path == '/cmd/release':
-                if zone_config.get('unlocked', False):
-                    zone_config['unlocked'] = False
-                    lock_door()
-                    log_door_event('lock', 'Hold released by push command')
-                    report(f"Push: hold released from {client_ip}")
-                self._respond(200, {'ok': True, 'held_open': False})
-
-            elif path == '/cmd/rename':
-                content_length = int(self.headers.get('Content-Length', 0))
-                body = json.loads(self.rfile.read(content_length)) if content_length else {}
-                new_name = body.get('new_name', '').strip()
-                if not new_name:
-                    self._respond(400, {'ok': False, 'error': 'new_name required'})
+    Raises:
+        ValueError: Malformed request, or the header limit was exceeded
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, version = line.decode('latin-1').split()
+    except ValueError:
+        raise ValueError('Bad request line')
+
+    headers = {}
+    size = len(line)
+    while True:
+        line = await reader.readline()
+        size += len(line)
+        if size > PUSH_MAX_HEADER_BYTES or len(headers) > 64:
+            raise ValueError('Headers too large')
+        if line in (b'\r\n', b'\n'):
+            break
+        if not line:
+            raise ValueError('Connection closed in headers')
+        name, sep, value = line.decode('latin-1').partition(':')
+        if not sep:
+            raise ValueError('Bad header line')
+        headers[name.strip().lower()] = value.strip()
+
+    path, _, query = target.partition('?')
+    return method.upper(), path.rstrip('/'), query, version.upper(), headers
+
+
+async def _serve_push_listener(port, api_key, ssl_ctx):
+    """
+    Asyncio HTTPS server for the push listener.
+
+    Connections are kept open between requests (HTTP/1.1 keep-alive) and TLS
+    session tickets let a returning caller resume without a full handshake,
+    so a server sending several commands pays for one handshake. Route
+    handlers run on a bounded thread pool.
+    """
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    from urllib.parse import parse_qs
+
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(max_workers=PUSH_HANDLER_THREADS, thread_name_prefix='push')
+    expected_auth = f'Bearer {api_key}'.encode()
+    state = {'open': 0, 'pending': 0, 'streams': 0}
+
+    async def send(writer, data):
+        writer.write(data)
+        await writer.drain()
+
+    async def handle_connection(reader, writer):
+        global push_reached
+        client_ip = (writer.get_extra_info('peername') or ('?',))[0]
+        ssl_object = writer.get_extra_info('ssl_object')
+        _push_count('connections')
+        if ssl_object is not None and ssl_object.session_reused:
+            _push_count('tls_resumed')
+
+        if state['open'] >= PUSH_MAX_CONNECTIONS:
+            _push_count('rejected_busy')
+            try:
+                await send(writer, _push_response(503, {'ok': False, 'error': 'Too many connections'},
+                                                  False, ('Retry-After: 1',)))
+            except OSError:
+                pass
+            writer.close()
+            return
+        state['open'] += 1
+        served = 0
+        try:
+            while True:
+                # Idle keep-alive connections wait longer for the next request
+                # than a caller gets to finish sending one
+                timeout = PUSH_KEEPALIVE_TIMEOUT if served else PUSH_REQUEST_TIMEOUT
+                try:
+                    request = await asyncio.wait_for(_read_push_request(reader), timeout)
+                except ValueError as e:
+                    _push_count('rejected_limits')
+                    await send(writer, _push_response(400, {'ok': False, 'error': str(e)}, False))
                     return
-                # No-op if already using this name
-                if new_name == zone:
-                    self._respond(200, {'ok': True, 'old_name': zone, 'new_name': new_name, 'no_change': True})
+                if request is None:
                     return
-                report(f"Push: rename from '{zone}' to '{new_name}' from {client_ip}")
-                try:
-                    old_zone = zone
-                    # Update config.json — move the zone key (must happen before zone.json
-                    # is written, so if we crash we can detect the mismatch)
-                    config_file = os.path.join(CONF_DIR, 'config.json')
-                    cfg = load_json(config_file)
-                    if old_zone in cfg:
-                        cfg[new_name] = cfg.pop(old_zone)
-                    elif new_name not in cfg:
-                        # Old zone missing — refuse to create an empty new entry
-                        raise RuntimeError(f"Zone '{old_zone}' not found in config.json")
-                    save_json(config_file, cfg)
-                    # Update zone.json
-                    zone_file = os.path.join(CONF_DIR, 'zone.json')
-                    save_json(zone_file, {'zone': new_name})
-                    # Update in-memory zone so the running process uses the new name
-                    # even if the service restart below fails
-                    zone = new_name
-                    self._respond(200, {'ok': True, 'old_name': old_zone, 'new_name': new_name, 'restarted': True})
-                    report(f"Door renamed from '{old_zone}' to '{new_name}'")
-                    # Best-effort service restart to reinitialize GPIO/push listener with new name
-                    threading.Thread(
-                        target=lambda: os.system('sudo -n systemctl restart pidoors 2>/dev/null'),
-                        daemon=True
-                    ).start()
-                except Exception as e:
-                    report(f"Rename failed: {e}")
-                    self._respond(500, {'ok': False, 'error': str(e)})
-
-            elif path == '/cmd/update':
-                report(f"Push: update requested from {client_ip}")
-                trigger_update()
-                self._respond(200, {'ok': True, 'updating': True})
-
-            elif path == '/cmd/sync':
-                report(f"Push: cache sync requested from {client_ip}")
-                threading.Thread(target=sync_cache_from_server, daemon=True).start()
-                self._respond(200, {'ok': True})
-
-            elif path == '/cmd/reload-config':
-                report(f"Push: config reload requested from {client_ip}")
-                threading.Thread(target=sync_cache_from_server, daemon=True).start()
-                self._respond(200, {'ok': True, 'reloading': True})
-
-            elif path.startswith('/cmd/gate/'):
-                gate_action = path.replace('/cmd/gate/', '')
-                if gate_action not in ('open', 'close', 'stop', 'hold', 'release'):
-                    self._respond(400, {'ok': False, 'error': 'Unknown gate action'})
+                method, path, query, version, headers = request
+
+                _push_count('requests')
+                if served:
+                    _push_count('keepalive_requests')
+                served += 1
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = (connection != 'close' if version == 'HTTP/1.1'
+                              else connection == 'keep-alive')
+
+                if not hmac.compare_digest(headers.get('authorization', '').encode(), expected_auth):
+                    await send(writer, _push_response(403, {'ok': False, 'error': 'Forbidden'}, False))
                     return
-                if not gate_enabled:
-                    self._respond(400, {'ok': False, 'error': 'Door is not configured as a gate'})
+                push_reached = True
+                if method not in ('GET', 'POST'):
+                    await send(writer, _push_response(405, {'ok': False, 'error': 'Method not allowed'}, False))
                     return
-                # Read body for force flag (operator override for clearance sensor)
-                content_length = int(self.headers.get('Content-Length', 0))
-                body = json.loads(self.rfile.read(content_length)) if content_length else {}
-                source = f'push:{client_ip}'
-                if body.get('force') and gate_action == 'close':
-                    source = 'button-hold-override'  # Same source as physical hold-override
-                report(f"Push: gate/{gate_action} from {client_ip}" + (' (force)' if body.get('force') else ''))
-                ok, reason = gate_command(gate_action, source=source)
-                response = {'ok': ok, 'gate_state': gate_state, 'gate_held': gate_held}
-                if reason:
-                    response['reason'] = reason
-                self._respond(200, response)
-
-            elif path == '/ping':
-                self._respond(200, _get_status_dict())
 
-            else:
-                self._respond(404, {'ok': False, 'error': 'Not found'})
+                if method == 'GET' and path == '/events':
+                    # Streams take over the connection until the consumer leaves
+                    resume = headers.get('last-event-id') or parse_qs(query).get('since', [None])[0]
+                    try:
+                        resume = int(resume) if resume is not None else None
+                    except ValueError:
+                        await send(writer, _push_response(400, {'ok': False, 'error': 'Invalid event id'}, False))
+                        return
+                    if state['streams'] >= EVENT_MAX_STREAMS:
+                        _push_count('rejected_busy')
+                        await send(writer, _push_response(503, {'ok': False, 'error': 'Too many streams'},
+                                                          False, ('Retry-After: 5',)))
+                        return
+                    state['streams'] += 1
+                    try:
+                        await _stream_events(reader, writer, resume)
+                    finally:
+                        state['streams'] -= 1
+                    return
+                if 'chunked' in headers.get('transfer-encoding', '').lower():
+                    await send(writer, _push_response(411, {'ok': False, 'error': 'Content-Length required'}, False))
+                    return
+                try:
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    length = -1
+                if length < 0 or length > PUSH_MAX_BODY_BYTES:
+                    _push_count('rejected_limits')
+                    await send(writer, _push_response(413, {'ok': False, 'error': 'Body too large'}, False))
+                    return
 
-        def do_GET(self):
-            if not self._check_auth():
-                return
+                if length and headers.get('expect', '').lower() == '100-continue':
+                    await send(writer, b'HTTP/1.1 100 Continue\r\n\r\n')
+                raw = await asyncio.wait_for(reader.readexactly(length), PUSH_REQUEST_TIMEOUT) if length else b''
+                try:
+                    body = json.loads(raw) if raw else {}
+                except ValueError:
+                    body = None
+                if not isinstance(body, dict):
+                    await send(writer, _push_response(400, {'ok': False, 'error': 'Invalid JSON body'}, keep_alive))
+                    continue
 
-            path = self.path.rstrip('/')
-            if path == '/status':
-                self._respond(200, _get_status_dict())
-            else:
-                self._respond(404, {'ok': False, 'error': 'Not found'})
+                if state['pending'] >= PUSH_MAX_PENDING:
+                    _push_count('rejected_busy')
+                    await send(writer, _push_response(503, {'ok': False, 'error': 'Busy'}, keep_alive,
+                                                      ('Retry-After: 1',)))
+                    continue
 
-        def log_message(self, format, *args):
-            # Suppress default stderr logging
-            pass
+                state['pending'] += 1
+                try:
+                    code, response = await loop.run_in_executor(
+                        pool, _push_route, method, path, body, client_ip)
+                except Exception as e:
+                    report(f"Push listener: {method} {path} failed: {e}")
+                    code, response = 500, {'ok': False, 'error': 'Internal error'}
+                finally:
+                    state['pending'] -= 1
 
-    class ThreadedHTTPServer(HTTPServer):
-        """Handle each request in a new thread."""
-        daemon_threads = True
+                await send(writer, _push_response(code, response, keep_alive))
+                if not keep_alive:
+                    return
 
-        def process_request(self, request, client_address):
-            t = threading.Thread(target=self.process_request_thread,
-                                 args=(request, client_address), daemon=True)
-            t.start()
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+            pass  # Idle keep-alive timeout, or the caller went away mid-request
+        except (BrokenPipeError, ConnectionResetError, OSError) as e:
+            debug(f"Push listener: client {client_ip} disconnected ({type(e).__name__})")
+        finally:
+            state['open'] -= 1
+            writer.close()
+
+    server = await asyncio.start_server(
+        handle_connection, '0.0.0.0', port, ssl=ssl_ctx,
+        ssl_handshake_timeout=PUSH_REQUEST_TIMEOUT,
+        limit=PUSH_MAX_HEADER_BYTES,
+    )
+    debug(f"Push listener: HTTPS server bound to 0.0.0.0:{port}")
+    async with server:
+        await server.serve_forever()
 
-        def process_request_thread(self, request, client_address):
-            try:
-                self.finish_request(request, client_address)
-            except (BrokenPipeError, ConnectionResetError, OSError) as e:
-                debug(f"Push listener: client {client_address[0]} disconnected ({type(e).__name__})")
-            except Exception:
-                self.handle_error(request, client_address)
-            finally:
-                self.shutdown_request(request)
+
+def _run_push_listener(port, api_key, cert_file, key_file):
+    """Run the HTTPS listener's event loop in this thread. Stdlib only."""
+    global push_listener_port
+    import asyncio
+    import ssl
 
     try:
         ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
         ctx.minimum_version = ssl.TLSVersion.TLSv1_2
         ctx.set_ciphers('ECDHE+AESGCM:ECDHE+CHACHA20:DHE+AESGCM:DHE+CHACHA20:!aNULL:!MD5:!DSS')
         ctx.load_cert_chain(cert_file, key_file)
+        # Session tickets: a caller that reconnects resumes its TLS session
+        # instead of paying for a full handshake on the Pi
+        ctx.options &= ~ssl.OP_NO_TICKET
+        ctx.num_tickets = 2
 
-        server = ThreadedHTTPServer(('0.0.0.0', port), PushHandler)
-        server.socket = ctx.wrap_socket(server.socket, server_side=True)
-
-        debug(f"Push listener: HTTPS server bound to 0.0.0.0:{port}")
-        server.serve_forever()
+        asyncio.run(_serve_push_listener(port, api_key, ctx))
     except Exception as e:
         report(f"Push listener failed: {e}")
+        # Not listening: the heartbeat stops advertising the port, and the
+        # command sweep goes back to poll_interval
+        push_listener_port = None
 
 
 # Track process start time for uptime calculation
@@ -2941,6 +4267,11 @@ def cleanup(sig=None, frame=None):
     except Exception:
         pass  # Ignore errors during cleanup
 
+    try:
+        stop_readers()
+    except Exception:
+        pass
+
     GPIO.cleanup()
     sys.exit(0)
 
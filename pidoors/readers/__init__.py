@@ -7,15 +7,57 @@ Supported reader types:
 - OSDP (RS-485 encrypted)
 - NFC/RFID PN532 (I2C/SPI)
 - NFC/RFID MFRC522 (SPI)
+
+Driver modules are imported on first use, so a Wiegand-only door never
+loads pyserial, smbus2 or spidev. Third-party drivers can be registered
+with ReaderFactory.register_reader() or through the "pidoors.readers"
+entry point group, e.g. in the driver package's pyproject.toml:
+
+    [project.entry-points."pidoors.readers"]
+    my_reader = "my_package.my_reader:MyReader"
 """
 
-from typing import Dict, Any, Optional, Type, Callable
+import importlib
+from typing import Dict, Any, Optional, Type, Callable, Union
+
+from .base import BaseReader, CardRead, ReaderType, ReaderStatus, credential_key
+from .dispatcher import CardDispatcher
+
+ENTRY_POINT_GROUP = 'pidoors.readers'
+
+# Built-in driver classes by exported name, imported on first access
+_LAZY_CLASSES: Dict[str, str] = {
+    'WiegandReader': '.wiegand:WiegandReader',
+    'OSDPReader': '.osdp:OSDPReader',
+    'PN532Reader': '.nfc_pn532:PN532Reader',
+    'MFRC522Reader': '.nfc_mfrc522:MFRC522Reader',
+}
+
+
+def _import_reader_class(target: str) -> Type[BaseReader]:
+    """
+    Import a reader class from a "module:Class" reference. Modules starting
+    with a dot are relative to this package.
+
+    Raises:
+        ImportError: If the module or class cannot be loaded
+    """
+    module_name, _, class_name = target.partition(':')
+    module = importlib.import_module(module_name, __name__ if module_name.startswith('.') else None)
+    try:
+        return getattr(module, class_name)
+    except AttributeError:
+        raise ImportError(f"{module_name} has no reader class {class_name}") from None
+
 
-from .base import BaseReader, CardRead, ReaderType, ReaderStatus
-from .wiegand import WiegandReader
-from .osdp import OSDPReader
-from .nfc_pn532 import PN532Reader
-from .nfc_mfrc522 import MFRC522Reader
+def __getattr__(name: str):
+    """Resolve the built-in driver classes lazily (PEP 562)"""
+    target = _LAZY_CLASSES.get(name)
+    if target is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    reader_class = _import_reader_class(target)
+    globals()[name] = reader_class
+    return reader_class
 
 
 class ReaderFactory:
@@ -34,13 +76,15 @@ class ReaderFactory:
         reader_class = ReaderFactory.get_reader_class("wiegand")
     """
 
-    # Mapping of reader type names to classes
-    _reader_types: Dict[str, Type[BaseReader]] = {
-        'wiegand': WiegandReader,
-        'osdp': OSDPReader,
-        'nfc_pn532': PN532Reader,
-        'nfc_mfrc522': MFRC522Reader,
+    # Mapping of reader type names to classes, or "module:Class" references
+    # that are imported and replaced by the class on first use
+    _reader_types: Dict[str, Union[str, Type[BaseReader]]] = {
+        'wiegand': '.wiegand:WiegandReader',
+        'osdp': '.osdp:OSDPReader',
+        'nfc_pn532': '.nfc_pn532:PN532Reader',
+        'nfc_mfrc522': '.nfc_mfrc522:MFRC522Reader',
     }
+    _entry_points_loaded: bool = False
 
     # Aliases for convenience
     _aliases: Dict[str, str] = {
@@ -75,11 +119,14 @@ class ReaderFactory:
             reader_type = cls._aliases[reader_type]
 
         # Get reader class
-        reader_class = cls._reader_types.get(reader_type)
+        try:
+            reader_class = cls._resolve(reader_type)
+        except ImportError as e:
+            raise ValueError(f"Reader type {reader_type} could not be loaded: {e}")
 
         if not reader_class:
             raise ValueError(f"Unknown reader type: {reader_type}. "
-                           f"Available types: {list(cls._reader_types.keys())}")
+                           f"Available types: {cls.get_available_types()}")
 
         return reader_class(name, config, on_card_read)
 
@@ -100,26 +147,75 @@ class ReaderFactory:
         if reader_type in cls._aliases:
             reader_type = cls._aliases[reader_type]
 
-        return cls._reader_types.get(reader_type)
+        try:
+            return cls._resolve(reader_type)
+        except ImportError:
+            return None
 
     @classmethod
     def get_available_types(cls) -> list:
-        """Get list of available reader type names"""
+        """Get list of available reader type names (does not import drivers)"""
+        cls._load_entry_points()
         return list(cls._reader_types.keys())
 
     @classmethod
-    def register_reader(cls, type_name: str, reader_class: Type[BaseReader]):
+    def register_reader(cls, type_name: str, reader_class: Union[str, Type[BaseReader]]):
         """
         Register a custom reader type.
 
         Args:
             type_name: Name for the reader type
-            reader_class: Reader class (must inherit from BaseReader)
+            reader_class: Reader class (must inherit from BaseReader), or a
+                          "module:Class" reference imported on first use
         """
-        if not issubclass(reader_class, BaseReader):
+        if isinstance(reader_class, str):
+            if ':' not in reader_class:
+                raise ValueError("Reader reference must be in 'module:Class' form")
+        elif not issubclass(reader_class, BaseReader):
             raise TypeError("Reader class must inherit from BaseReader")
         cls._reader_types[type_name.lower()] = reader_class
 
+    @classmethod
+    def _resolve(cls, reader_type: str) -> Optional[Type[BaseReader]]:
+        """
+        Return the class for a reader type, importing its module on first use.
+
+        Raises:
+            ImportError: If the driver module cannot be imported
+        """
+        if reader_type not in cls._reader_types:
+            cls._load_entry_points()
+
+        reader_class = cls._reader_types.get(reader_type)
+        if isinstance(reader_class, str):
+            reader_class = _import_reader_class(reader_class)
+            if not (isinstance(reader_class, type) and issubclass(reader_class, BaseReader)):
+                raise ImportError(f"{reader_class!r} does not inherit from BaseReader")
+            cls._reader_types[reader_type] = reader_class
+        return reader_class
+
+    @classmethod
+    def _load_entry_points(cls):
+        """Register third-party drivers from the pidoors.readers entry point group (once)"""
+        if cls._entry_points_loaded:
+            return
+        cls._entry_points_loaded = True
+
+        try:
+            from importlib.metadata import entry_points
+            eps = entry_points()
+            if hasattr(eps, 'select'):
+                eps = eps.select(group=ENTRY_POINT_GROUP)
+            else:
+                eps = eps.get(ENTRY_POINT_GROUP, [])  # Python < 3.10
+        except Exception as e:
+            print(f"Reader entry points unavailable: {e}")
+            return
+
+        for ep in eps:
+            # Built-in and explicitly registered types win over entry points
+            cls._reader_types.setdefault(ep.name.lower(), ep.value)
+
     @classmethod
     def get_reader_info(cls) -> Dict[str, Dict[str, Any]]:
         """
@@ -129,7 +225,12 @@ class ReaderFactory:
             Dictionary with reader type info
         """
         info = {}
-        for name, reader_class in cls._reader_types.items():
+        for name in cls.get_available_types():
+            try:
+                reader_class = cls._resolve(name)
+            except ImportError as e:
+                info[name] = {'class': None, 'type_enum': None, 'doc': None, 'error': str(e)}
+                continue
             info[name] = {
                 'class': reader_class.__name__,
                 'type_enum': reader_class.get_reader_type().value if hasattr(reader_class, 'get_reader_type') else None,
@@ -158,6 +259,7 @@ def create_reader(name: str, config: Dict[str, Any],
 __all__ = [
     'BaseReader',
     'CardRead',
+    'credential_key',
     'ReaderType',
     'ReaderStatus',
     'WiegandReader',
@@ -165,5 +267,6 @@ __all__ = [
     'PN532Reader',
     'MFRC522Reader',
     'ReaderFactory',
+    'CardDispatcher',
     'create_reader',
 ]
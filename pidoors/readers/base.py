@@ -6,10 +6,11 @@ Defines the interface that all card readers must implement.
 """
 
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
 from typing import Optional, Callable, Dict, Any
 from enum import Enum
+import sys
 import threading
+import time
 
 
 class ReaderType(Enum):
@@ -30,17 +31,47 @@ class ReaderStatus(Enum):
     STOPPED = "stopped"
 
 
-@dataclass
+def credential_key(facility: Any, user_id: Any) -> str:
+    """
+    Canonical "facility,user_id" key used to index cards and master cards.
+
+    The key is interned, so once the card cache has been built with it every
+    later read of the same card resolves to the same string object and dict
+    lookups compare by identity.
+    """
+    return sys.intern(f"{facility},{user_id}")
+
+
 class CardRead:
     """Represents a card read event"""
-    card_id: str            # Hex representation of full card data
-    facility: str           # Facility code (may be empty for some formats)
-    user_id: str            # User/card number
-    bitstring: str          # Raw bit string (for Wiegand)
-    bit_length: int         # Number of bits read
-    format_name: str        # Name of the detected format
-    reader_name: str        # Name/identifier of the reader
-    raw_data: Optional[bytes] = None  # Raw bytes (for NFC/OSDP)
+
+    __slots__ = ('card_id', 'facility', 'user_id', 'bitstring', 'bit_length',
+                 'format_name', 'reader_name', 'raw_data', 'key')
+
+    def __init__(self, card_id: str, facility: str, user_id: str, bitstring: str,
+                 bit_length: int, format_name: str, reader_name: str,
+                 raw_data: Optional[bytes] = None):
+        self.card_id = card_id            # Hex representation of full card data
+        self.facility = facility          # Facility code (may be empty for some formats)
+        self.user_id = user_id            # User/card number
+        self.bitstring = bitstring        # Raw bit string (for Wiegand)
+        self.bit_length = bit_length      # Number of bits read
+        self.format_name = format_name    # Name of the detected format
+        self.reader_name = reader_name    # Name/identifier of the reader
+        self.raw_data = raw_data          # Raw bytes (for NFC/OSDP)
+        self.key = credential_key(facility, user_id)  # Canonical cache/master card key
+
+    def __repr__(self) -> str:
+        return (f"CardRead(card_id={self.card_id!r}, facility={self.facility!r}, "
+                f"user_id={self.user_id!r}, bit_length={self.bit_length}, "
+                f"format_name={self.format_name!r}, reader_name={self.reader_name!r})")
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None  # Mutable, so unhashable
 
 
 class BaseReader(ABC):
@@ -54,6 +85,9 @@ class BaseReader(ABC):
     - get_status(): Return current reader status
 
     The on_card_read callback will be called when a card is successfully read.
+
+    Drivers report I/O health with record_success()/record_failure(); the
+    ReaderSupervisor calls reset() once failures pile up.
     """
 
     def __init__(self, name: str, config: Dict[str, Any],
@@ -72,6 +106,10 @@ class BaseReader(ABC):
         self._status = ReaderStatus.UNINITIALIZED
         self._status_lock = threading.Lock()
         self._error_message: Optional[str] = None
+        self._failures: int = 0
+        self._failures_total: int = 0
+        self._last_failure: Optional[str] = None
+        self._last_success: float = 0.0
 
     @property
     def status(self) -> ReaderStatus:
@@ -99,6 +137,54 @@ class BaseReader(ABC):
         """Clear error state"""
         self._error_message = None
 
+    @property
+    def consecutive_failures(self) -> int:
+        """Hardware operations that failed in a row since the last success"""
+        return self._failures
+
+    @property
+    def failures_total(self) -> int:
+        """Failed hardware operations since the reader was created"""
+        return self._failures_total
+
+    @property
+    def last_failure(self) -> Optional[str]:
+        """Description of the most recent failure"""
+        return self._last_failure
+
+    @property
+    def last_success(self) -> float:
+        """time.monotonic() of the last successful exchange (0 if none yet)"""
+        return self._last_success
+
+    def record_success(self):
+        """Note a successful exchange with the reader hardware"""
+        self._failures = 0
+        self._last_success = time.monotonic()
+
+    def record_failure(self, message: str):
+        """Note a failed exchange with the reader hardware (no reply, I/O error)"""
+        self._failures += 1
+        self._failures_total += 1
+        self._last_failure = message
+
+    def reset(self) -> bool:
+        """
+        Hard reset: stop the reader, release its hardware handles, then
+        initialize and start it again from scratch.
+
+        Returns:
+            True if the reader is running again
+        """
+        try:
+            self.stop()
+        except Exception as e:
+            print(f"Reader {self.name} stop during reset failed: {e}")
+        self.clear_error()
+        self._failures = 0
+        self.status = ReaderStatus.UNINITIALIZED
+        return self.start()
+
     @abstractmethod
     def initialize(self) -> bool:
         """
@@ -139,6 +225,20 @@ class BaseReader(ABC):
         """
         pass
 
+    def feedback(self, event: str) -> bool:
+        """
+        Show access feedback on the reader itself (LED/buzzer).
+
+        Readers without a controllable LED or buzzer keep this default.
+
+        Args:
+            event: "grant", "deny" or "held"
+
+        Returns:
+            True if the feedback was accepted by the reader
+        """
+        return False
+
     def report_card(self, card_read: CardRead):
         """
         Report a card read event to the callback.
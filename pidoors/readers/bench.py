@@ -0,0 +1,266 @@
+"""
+Reader Benchmarks
+PiDoors Access Control System
+
+Small self-checking benchmarks for the reader hot paths. Runs on a
+development machine or directly on a door controller.
+
+Usage (from the install directory, e.g. /opt/pidoors):
+    python3 -m readers.bench crc [--seconds 2]
+    python3 -m readers.bench imports [--runs 10]
+    python3 -m readers.bench alloc [--scans 10000]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+
+def _reference_crc(data: bytes, poly: int = 0x8005) -> int:
+    """Original bit-by-bit OSDP CRC-16, kept as the correctness reference"""
+    crc = 0x0000
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            if crc & 0x0001:
+                crc = (crc >> 1) ^ poly
+            else:
+                crc >>= 1
+    return crc
+
+
+def _rate(fn: Callable[[], None], seconds: float) -> float:
+    """Call fn repeatedly for roughly `seconds` and return calls per second"""
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while True:
+        for _ in range(100):
+            fn()
+        count += 100
+        now = time.perf_counter()
+        if now >= deadline:
+            return count / (now - start)
+
+
+def bench_crc(seconds: float) -> Dict[str, float]:
+    """Verify the table-driven OSDP CRC against the reference and measure packets/s"""
+    from .osdp import OSDPReader
+
+    reader = OSDPReader("bench", {})
+
+    # Verification: random buffers of every realistic OSDP frame length
+    samples: List[bytes] = [os.urandom(n) for n in range(0, 130) for _ in range(8)]
+    for data in samples:
+        expected = _reference_crc(data, OSDPReader.POLY)
+        if reader._calculate_crc(data) != expected:
+            raise AssertionError(f"CRC mismatch for {data.hex()}")
+        split = len(data) // 2
+        if reader._calculate_crc(data[split:], reader._calculate_crc(data[:split])) != expected:
+            raise AssertionError(f"Chained CRC mismatch for {data.hex()}")
+
+    # Throughput: a POLL frame (6 header bytes) and a typical RAW card reply
+    poll = bytes([OSDPReader.SOM, 0x00, 0x08, 0x00, 0x04, 0x60])
+    raw_reply = bytes([OSDPReader.SOM, 0x80, 0x12, 0x00, 0x05, 0x50]) + os.urandom(10)
+
+    results = {
+        'verified_buffers': float(len(samples)),
+        'poll_reference_pps': _rate(lambda: _reference_crc(poll), seconds),
+        'poll_table_pps': _rate(lambda: reader._calculate_crc(poll), seconds),
+        'reply_reference_pps': _rate(lambda: _reference_crc(raw_reply), seconds),
+        'reply_table_pps': _rate(lambda: reader._calculate_crc(raw_reply), seconds),
+    }
+    return results
+
+
+# Cold-start scenarios for the import benchmark, run in a fresh interpreter.
+# "all drivers" resolves every built-in reader type, which is what importing
+# the readers package used to cost before driver modules were loaded lazily.
+_IMPORT_SCENARIOS = {
+    'wiegand_only': (
+        "import readers\n"
+        "readers.ReaderFactory.create('bench', {'reader_type': 'wiegand'})\n"
+    ),
+    'all_drivers': (
+        "import readers\n"
+        "for t in readers.ReaderFactory.get_available_types():\n"
+        "    readers.ReaderFactory.get_reader_class(t)\n"
+    ),
+}
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    'ms': elapsed * 1000.0,
+    'modules': sorted(m for m in ('serial', 'smbus2', 'spidev', 'RPi.GPIO') if m in sys.modules),
+    'reader_modules': sorted(m for m in sys.modules if m.startswith('readers.')),
+}}))
+"""
+
+
+def bench_imports(runs: int) -> Dict[str, Dict]:
+    """
+    Measure cold-start import cost of the reader package per scenario.
+
+    Each run is a fresh interpreter so nothing is cached in sys.modules;
+    bytecode caches are warmed by a first, untimed run.
+    """
+    install_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results: Dict[str, Dict] = {}
+
+    for name, code in _IMPORT_SCENARIOS.items():
+        probe = _IMPORT_PROBE.format(code=code)
+        samples: List[float] = []
+        last: Dict = {}
+        for i in range(runs + 1):
+            out = subprocess.run([sys.executable, '-c', probe], cwd=install_dir,
+                                 capture_output=True, text=True, check=True)
+            last = json.loads(out.stdout.strip().splitlines()[-1])
+            if i:
+                samples.append(last['ms'])
+        results[name] = {
+            'median_ms': statistics.median(samples),
+            'min_ms': min(samples),
+            'modules': last['modules'],
+            'reader_modules': last['reader_modules'],
+        }
+    return results
+
+
+@dataclass
+class _ReferenceCardRead:
+    """Original dataclass CardRead, kept as the allocation reference"""
+    card_id: str
+    facility: str
+    user_id: str
+    bitstring: str
+    bit_length: int
+    format_name: str
+    reader_name: str
+    raw_data: Optional[bytes] = None
+
+
+def bench_alloc(scans: int, seconds: float) -> Dict[str, float]:
+    """
+    Count allocations per scan on the decision path: building the CardRead
+    and the card keys used for the master card and card cache lookups.
+
+    The reference path rebuilds f"{facility},{user_id}" in lookup_card and
+    get_master_card_info; the current one uses the CardRead's interned key.
+    Every object a scan allocates is kept alive so tracemalloc can count it.
+    """
+    from .base import CardRead, credential_key
+
+    # A synced cache: keys interned exactly as the controller builds them
+    cards = {credential_key("1", str(uid)): {'doors': '*'} for uid in range(1000)}
+    master_cards: Dict[str, Dict] = {}
+    fields = [("0ab1c2", "1", str(uid % 1000), "1" * 26, 26, "Standard 26-bit", "front")
+              for uid in range(scans)]
+
+    # Preallocated so keeping results alive adds no container allocations
+    kept: List[object] = [None] * (3 * scans)
+
+    def reference_scan(f, i=0):
+        card_read = _ReferenceCardRead(*f)
+        card_key = f"{card_read.facility},{card_read.user_id}"      # lookup_card
+        master_key = f"{card_read.facility},{card_read.user_id}"    # get_master_card_info
+        master_cards.get(master_key)
+        cards.get(card_key)
+        kept[3 * i] = card_read
+        kept[3 * i + 1] = card_key
+        kept[3 * i + 2] = master_key
+
+    def slots_scan(f, i=0):
+        card_read = CardRead(*f)
+        master_cards.get(card_read.key)
+        cards.get(card_read.key)
+        kept[3 * i] = card_read
+
+    def count(scan) -> Dict[str, float]:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        for i, f in enumerate(fields):
+            scan(f, i)
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        files = (__file__, sys.modules[CardRead.__module__].__file__)
+        diff = [stat for stat in after.compare_to(before, 'filename')
+                if stat.traceback[0].filename in files]
+        kept[:] = [None] * len(kept)
+        return {'blocks': sum(stat.count_diff for stat in diff) / scans,
+                'bytes': sum(stat.size_diff for stat in diff) / scans}
+
+    reference = count(reference_scan)
+    current = count(slots_scan)
+    sample = fields[0]
+    return {
+        'reference_blocks_per_scan': reference['blocks'],
+        'reference_bytes_per_scan': reference['bytes'],
+        'slots_blocks_per_scan': current['blocks'],
+        'slots_bytes_per_scan': current['bytes'],
+        'reference_scans_per_s': _rate(lambda: reference_scan(sample), seconds),
+        'slots_scans_per_s': _rate(lambda: slots_scan(sample), seconds),
+    }
+
+
+def _print_results(title: str, results: Dict[str, float]):
+    print(title)
+    for key, value in results.items():
+        print(f"  {key:<28} {value:>14,.0f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="PiDoors reader benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p_crc = sub.add_parser("crc", help="OSDP CRC-16 correctness and packets/second")
+    p_crc.add_argument("--seconds", type=float, default=2.0, help="Time per measurement")
+
+    p_alloc = sub.add_parser("alloc", help="Allocations per scan on the CardRead/card key path")
+    p_alloc.add_argument("--scans", type=int, default=10000, help="Scans to count allocations over")
+    p_alloc.add_argument("--seconds", type=float, default=1.0, help="Time per throughput measurement")
+
+    p_imp = sub.add_parser("imports", help="Cold-start import time of the reader package")
+    p_imp.add_argument("--runs", type=int, default=10, help="Interpreter starts per scenario")
+
+    args = parser.parse_args(argv)
+
+    if args.bench == "crc":
+        results = bench_crc(args.seconds)
+        _print_results("OSDP CRC-16 (packets/second)", results)
+        print(f"  speedup (POLL)               {results['poll_table_pps'] / results['poll_reference_pps']:>14.1f}x")
+        print(f"  speedup (RAW reply)          {results['reply_table_pps'] / results['reply_reference_pps']:>14.1f}x")
+
+    elif args.bench == "alloc":
+        results = bench_alloc(max(1, args.scans), args.seconds)
+        print(f"CardRead and card key allocations ({args.scans} scans)")
+        for key, value in results.items():
+            print(f"  {key:<28} {value:>14,.1f}")
+
+    elif args.bench == "imports":
+        results = bench_imports(max(1, args.runs))
+        print(f"Reader package cold-start import ({args.runs} runs)")
+        for name, result in results.items():
+            print(f"  {name:<14} median {result['median_ms']:>8.1f} ms  min {result['min_ms']:>8.1f} ms")
+            print(f"  {'':<14} drivers: {', '.join(result['reader_modules']) or '-'}")
+            print(f"  {'':<14} backends: {', '.join(result['modules']) or '-'}")
+        lazy = results['wiegand_only']['median_ms']
+        eager = results['all_drivers']['median_ms']
+        if lazy:
+            print(f"  saved on a Wiegand-only door {eager - lazy:>8.1f} ms ({eager / lazy:.1f}x)")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Credential Repeat-Read Filter
+PiDoors Access Control System
+
+Shared TTL filter that drops repeat reads of the same credential on the
+same reader before they reach the access decision. NFC readers see a card
+on every poll while it stays in the field and some Wiegand/OSDP heads
+re-send a held card, so without this one presentation becomes several
+decisions, log entries and latch pulses.
+
+Entries are keyed by (reader, credential), so two cards presented together
+and two readers seeing the same card never suppress each other. The window
+runs from the last *accepted* read and is not extended by suppressed ones,
+which keeps deliberate re-presentations (the master card hold/release
+gestures) working as long as they are spaced further apart than the window.
+"""
+
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+
+
+class ReadFilter:
+    """
+    TTL repeat-read filter keyed by (reader name, credential).
+
+    Usage:
+        read_filter = ReadFilter({"nfc_pn532": 1.5})
+        read_filter.set_window("exit", "nfc_pn532")
+        if read_filter.allow("exit", card_read.card_id):
+            process(card_read)
+    """
+
+    # Default window per reader type in seconds. NFC readers report a card
+    # on every poll it stays in the field; Wiegand and OSDP heads send one
+    # frame per presentation but many re-send while a card is held.
+    DEFAULT_WINDOWS = {
+        'wiegand': 1.0,
+        'osdp': 1.0,
+        'nfc_pn532': 2.0,
+        'nfc_mfrc522': 2.0,
+    }
+    DEFAULT_WINDOW = 1.0
+
+    # Expired entries are swept once the table grows past this many keys
+    PRUNE_THRESHOLD = 64
+
+    def __init__(self, windows: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            windows: Per reader type window overrides, e.g. {"wiegand": 0.5}
+        """
+        self._type_windows: Dict[str, float] = dict(self.DEFAULT_WINDOWS)
+        for reader_type, window in (windows or {}).items():
+            self._type_windows[str(reader_type).lower()] = max(0.0, float(window))
+
+        self._reader_windows: Dict[str, float] = {}
+        self._expires: Dict[Tuple[str, str], float] = {}
+        self._suppressed: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def set_window(self, reader_name: str, reader_type: str,
+                   override: Optional[float] = None) -> float:
+        """
+        Set the window for one reader from its type, or an explicit override
+        (the reader's own debounce_time setting).
+
+        Returns:
+            Window in seconds now used for the reader
+        """
+        if override is not None:
+            window = max(0.0, float(override))
+        else:
+            window = self._type_windows.get(str(reader_type).lower(), self.DEFAULT_WINDOW)
+        self._reader_windows[reader_name] = window
+        return window
+
+    def get_window(self, reader_name: str) -> float:
+        """Window in seconds for a reader"""
+        return self._reader_windows.get(reader_name, self.DEFAULT_WINDOW)
+
+    def allow(self, reader_name: str, credential: str, now: Optional[float] = None) -> bool:
+        """
+        Check a read against the filter and record it if accepted.
+
+        Returns:
+            True if the read should be processed, False if it is a repeat
+        """
+        window = self._reader_windows.get(reader_name, self.DEFAULT_WINDOW)
+        if window <= 0:
+            return True
+
+        if now is None:
+            now = time.monotonic()
+        key = (reader_name, credential)
+
+        with self._lock:
+            expires = self._expires.get(key)
+            if expires is not None and now < expires:
+                self._suppressed[reader_name] = self._suppressed.get(reader_name, 0) + 1
+                return False
+
+            if len(self._expires) >= self.PRUNE_THRESHOLD:
+                self._expires = {k: t for k, t in self._expires.items() if t > now}
+            self._expires[key] = now + window
+            return True
+
+    def reset(self, reader_name: Optional[str] = None):
+        """Forget remembered reads for one reader, or for all readers"""
+        with self._lock:
+            if reader_name is None:
+                self._expires.clear()
+            else:
+                self._expires = {k: t for k, t in self._expires.items() if k[0] != reader_name}
+
+    @property
+    def suppressed(self) -> int:
+        """Total reads suppressed across all readers"""
+        with self._lock:
+            return sum(self._suppressed.values())
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get per-reader windows and suppressed read counts"""
+        with self._lock:
+            tracked = len(self._expires)
+            suppressed = dict(self._suppressed)
+        return {
+            'tracked': tracked,
+            'suppressed': sum(suppressed.values()),
+            'readers': {
+                name: {'window': window, 'suppressed': suppressed.get(name, 0)}
+                for name, window in self._reader_windows.items()
+            },
+        }
@@ -0,0 +1,213 @@
+"""
+Card Read Dispatcher
+PiDoors Access Control System
+
+Owns every configured reader and funnels their CardRead events into a
+single bounded queue drained by a small, fixed pool of worker threads.
+Reader callbacks (GPIO edge handlers, serial/I2C/SPI poll loops) only
+enqueue, so a slow access decision never blocks a reader and the thread
+count stays constant no matter how many readers or scans there are.
+Repeat reads of the same credential on the same reader are dropped by a
+shared ReadFilter before they are queued, and a ReaderSupervisor resets
+readers that stop working.
+"""
+
+import queue
+import threading
+from typing import Dict, Any, Optional, Callable, List
+
+from .base import BaseReader, CardRead
+from .debounce import ReadFilter
+from .supervisor import ReaderSupervisor
+
+
+class CardDispatcher:
+    """
+    Multi-reader event bus.
+
+    Usage:
+        dispatcher = CardDispatcher(handle_card_read, workers=2)
+        dispatcher.add_reader("front_door", {"reader_type": "wiegand", "d0": 24, "d1": 23})
+        dispatcher.add_reader("exit", {"reader_type": "nfc_pn532", "interface": "i2c"})
+        dispatcher.start()
+    """
+
+    DEFAULT_WORKERS = 2
+    DEFAULT_QUEUE_SIZE = 64
+
+    def __init__(self, handler: Callable[[CardRead], None],
+                 workers: int = DEFAULT_WORKERS,
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 on_error: Optional[Callable[[str], None]] = None,
+                 debounce: Optional[Dict[str, float]] = None,
+                 supervisor: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            handler: Called with each CardRead from a worker thread
+            workers: Number of worker threads draining the queue
+            queue_size: Maximum number of pending reads before new ones are dropped
+            on_error: Optional logger for reader/handler failures
+            debounce: Optional repeat-read window overrides per reader type,
+                      e.g. {"wiegand": 0.5, "nfc_pn532": 1.5}
+            supervisor: Optional ReaderSupervisor settings (max_failures,
+                        backoff, max_backoff); {"enabled": false} turns it off
+        """
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.on_error = on_error
+        self.read_filter = ReadFilter(debounce)
+
+        self._readers: Dict[str, BaseReader] = {}
+        self._queue: "queue.Queue[Optional[CardRead]]" = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._threads: List[threading.Thread] = []
+        self._running = False
+        self._dropped = 0
+
+        supervisor = supervisor or {}
+        self.supervisor: Optional[ReaderSupervisor] = None
+        if supervisor.get('enabled', True):
+            self.supervisor = ReaderSupervisor(
+                self._readers, on_event=on_error,
+                **{k: supervisor[k] for k in ('max_failures', 'backoff', 'max_backoff') if k in supervisor})
+
+    @property
+    def readers(self) -> Dict[str, BaseReader]:
+        """Configured readers by name"""
+        return dict(self._readers)
+
+    def add_reader(self, name: str, config: Dict[str, Any]) -> Optional[BaseReader]:
+        """
+        Create a reader through ReaderFactory and wire it to the dispatcher.
+
+        Returns:
+            Reader instance, or None if the reader type is unknown
+        """
+        from . import ReaderFactory
+
+        try:
+            reader = ReaderFactory.create(name, config, self.submit)
+        except ValueError as e:
+            self._error(f"Reader {name}: {e}")
+            return None
+
+        self.read_filter.set_window(name, reader.get_reader_type().value,
+                                    config.get('debounce_time'))
+        self._readers[name] = reader
+        return reader
+
+    def start(self) -> int:
+        """
+        Start worker threads and every configured reader.
+
+        Returns:
+            Number of readers that started successfully
+        """
+        if not self._running:
+            self._running = True
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f"card-dispatch-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+        started = 0
+        for name, reader in self._readers.items():
+            try:
+                if reader.start():
+                    started += 1
+                else:
+                    self._error(f"Reader {name} failed to start: {reader.error_message}")
+            except Exception as e:
+                reader.set_error(str(e))
+                self._error(f"Reader {name} failed to start: {e}")
+
+        if self.supervisor:
+            self.supervisor.start()
+        return started
+
+    def stop(self):
+        """Stop every reader and the worker threads"""
+        if self.supervisor:
+            self.supervisor.stop()
+
+        for name, reader in self._readers.items():
+            try:
+                reader.stop()
+            except Exception as e:
+                self._error(f"Reader {name} failed to stop: {e}")
+
+        if self._running:
+            self._running = False
+            for _ in self._threads:
+                try:
+                    self._queue.put_nowait(None)
+                except queue.Full:
+                    break
+            for t in self._threads:
+                t.join(timeout=2.0)
+            self._threads = []
+
+    def submit(self, card_read: CardRead):
+        """
+        Queue a card read for processing. Safe to call from any reader thread,
+        including GPIO edge callbacks; never blocks. Repeats of a credential
+        still inside the reader's debounce window are dropped and counted.
+        """
+        if not self.read_filter.allow(card_read.reader_name, card_read.card_id):
+            return
+        try:
+            self._queue.put_nowait(card_read)
+        except queue.Full:
+            self._dropped += 1
+            self._error(f"Card read from {card_read.reader_name} dropped: dispatch queue full")
+
+    def feedback(self, reader_name: str, event: str) -> bool:
+        """
+        Route access feedback ("grant", "deny", "held") to the reader a card
+        was presented at. Never blocks on reader I/O.
+
+        Returns:
+            True if the reader accepted the feedback
+        """
+        reader = self._readers.get(reader_name)
+        if reader is None:
+            return False
+        try:
+            return reader.feedback(event)
+        except Exception as e:
+            self._error(f"Reader {reader_name} feedback error: {e}")
+            return False
+
+    @property
+    def suppressed(self) -> int:
+        """Repeat reads dropped by the debounce filter"""
+        return self.read_filter.suppressed
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get dispatcher and per-reader status"""
+        return {
+            'workers': self.workers,
+            'queue_depth': self._queue.qsize(),
+            'dropped': self._dropped,
+            'debounce': self.read_filter.get_status(),
+            'health': self.supervisor.get_status() if self.supervisor else None,
+            'readers': {name: reader.get_status() for name, reader in self._readers.items()},
+        }
+
+    def _worker(self):
+        """Drain the queue and hand each read to the handler"""
+        while True:
+            card_read = self._queue.get()
+            try:
+                if card_read is None:
+                    return
+                self.handler(card_read)
+            except Exception as e:
+                self._error(f"Card read handler error ({card_read.reader_name}): {e}")
+            finally:
+                self._queue.task_done()
+
+    def _error(self, message: str):
+        if self.on_error:
+            self.on_error(message)
+        else:
+            print(message)
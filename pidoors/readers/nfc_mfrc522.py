@@ -3,11 +3,13 @@ MFRC522 NFC/RFID Reader Module
 PiDoors Access Control System
 
 MFRC522 NFC reader support over SPI interface.
-Supports reading Mifare Classic, Ultralight, and other ISO14443A cards.
+Supports reading Mifare Classic, Ultralight, and other ISO14443A cards,
+including 7- and 10-byte UIDs (DESFire, NTAG, phone HCE) via cascade
+levels 1-3 with bitwise anticollision.
 
 Requires:
   - spidev package
-  - RPi.GPIO for reset pin
+  - RPi.GPIO for reset pin (and the optional IRQ pin)
 """
 
 import threading
@@ -32,6 +34,16 @@ except ImportError:
     GPIO_AVAILABLE = False
 
 
+def _crc_a(data: List[int]) -> List[int]:
+    """ISO14443A CRC_A (initial value 0x6363), returned LSB first"""
+    crc = 0x6363
+    for byte in data:
+        byte ^= crc & 0xFF
+        byte = (byte ^ (byte << 4)) & 0xFF
+        crc = (crc >> 8) ^ (byte << 8) ^ (byte << 3) ^ (byte >> 4)
+    return [crc & 0xFF, (crc >> 8) & 0xFF]
+
+
 class MFRC522Register(IntEnum):
     """MFRC522 register addresses"""
     # Command and Status
@@ -137,15 +149,23 @@ class MFRC522Reader(BaseReader):
         spi_device: SPI device/chip select (default: 0)
         spi_speed: SPI speed in Hz (default: 1000000)
         reset_pin: GPIO pin for hardware reset (default: 25)
+        irq_pin: GPIO pin wired to the MFRC522 IRQ output (optional).
+                 When set, command completion and card presence are signalled
+                 by interrupt instead of polling the ComIrq register.
         poll_interval: Card polling interval in seconds (default: 0.2)
-        debounce_time: Time to wait before reading same card again (default: 2.0)
+        debounce_time: Repeat-read window for the same card, applied by the
+                       dispatcher (default: 2.0)
         antenna_gain: RF gain 0-7 (default: 4)
+        select_cache_ttl: Seconds a selected card's UID is remembered so the
+                          next poll can SELECT it directly and skip the
+                          anticollision rounds (default: 1.0)
 
     Example config:
         {
             "spi_bus": 0,
             "spi_device": 0,
             "reset_pin": 25,
+            "irq_pin": 16,
             "poll_interval": 0.2,
             "antenna_gain": 4
         }
@@ -153,18 +173,37 @@ class MFRC522Reader(BaseReader):
 
     MAX_LEN = 16
 
+    # _to_card status
+    STATUS_OK = 0
+    STATUS_ERROR = 1
+    STATUS_COLLISION = 2
+
+    CASCADE_TAG = 0x88
+    SELECT_LEVELS = (PICommand.SELECT1, PICommand.SELECT2, PICommand.SELECT3)
+    COMMAND_TIMEOUT = 0.05  # Upper bound for one card command; the chip timer fires first
+    STATUS_POLL_GAP = 0.001  # Pause between ComIrq reads when there is no IRQ pin
+
     def __init__(self, name: str, config: Dict[str, Any], on_card_read=None):
         super().__init__(name, config, on_card_read)
 
         self.poll_interval: float = 0.2
-        self.debounce_time: float = 2.0
 
         self._spi = None
         self._reset_pin: Optional[int] = None
+        self._irq_pin: Optional[int] = None
+        self._irq_event: Optional[threading.Event] = None
+        self._comien: Optional[int] = None
         self._running: bool = False
         self._poll_thread: Optional[threading.Thread] = None
-        self._last_card: Optional[str] = None
-        self._last_card_time: float = 0
+
+        # Last successful select: (uid, per-level UID blocks, expiry)
+        self.select_cache_ttl: float = 1.0
+        self._select_cache: Optional[tuple] = None
+
+        # SPI transaction accounting
+        self._spi_transactions: int = 0
+        self._polls: int = 0
+        self._last_poll_transactions: int = 0
 
     @staticmethod
     def get_reader_type() -> ReaderType:
@@ -186,9 +225,10 @@ class MFRC522Reader(BaseReader):
         device = self.get_config_value('spi_device', 0)
         speed = self.get_config_value('spi_speed', 1000000)
         self._reset_pin = self.get_config_value('reset_pin', 25)
+        self._irq_pin = self.get_config_value('irq_pin')
         self.poll_interval = self.get_config_value('poll_interval', 0.2)
-        self.debounce_time = self.get_config_value('debounce_time', 2.0)
         antenna_gain = self.get_config_value('antenna_gain', 4)
+        self.select_cache_ttl = self.get_config_value('select_cache_ttl', 1.0)
 
         try:
             # Setup GPIO for reset
@@ -221,6 +261,14 @@ class MFRC522Reader(BaseReader):
             # Set antenna gain
             self._set_antenna_gain(antenna_gain)
 
+            # Clear received bits after a collision (ValuesAfterColl = 0)
+            self._write_register(MFRC522Register.COLL, 0x00)
+
+            # Drive the IRQ pin push-pull (active low, see _to_card)
+            if self._irq_pin is not None:
+                self._write_register(MFRC522Register.DIVIEN, 0x80)
+                self._setup_irq()
+
             # Turn on antenna
             self._antenna_on()
 
@@ -257,6 +305,13 @@ class MFRC522Reader(BaseReader):
         if self._poll_thread and self._poll_thread.is_alive():
             self._poll_thread.join(timeout=2.0)
 
+        if self._irq_event is not None:
+            try:
+                GPIO.remove_event_detect(self._irq_pin)
+            except Exception:
+                pass
+            self._irq_event = None
+
         # Turn off antenna
         try:
             self._antenna_off()
@@ -269,6 +324,7 @@ class MFRC522Reader(BaseReader):
             except Exception:
                 pass
             self._spi = None
+        self._comien = None
 
         self.status = ReaderStatus.STOPPED
         return True
@@ -281,8 +337,32 @@ class MFRC522Reader(BaseReader):
             'status': self.status.value,
             'error': self.error_message,
             'reset_pin': self._reset_pin,
+            'irq_pin': self._irq_pin,
+            'completion': 'irq' if self._irq_event is not None else 'polling',
+            'polls': self._polls,
+            'spi_transactions': self._spi_transactions,
+            'spi_transactions_last_poll': self._last_poll_transactions,
         }
 
+    def _setup_irq(self):
+        """Attach an edge callback to the IRQ pin"""
+        if self._irq_event is not None:
+            return
+
+        try:
+            self._irq_event = threading.Event()
+            GPIO.setup(self._irq_pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+            GPIO.add_event_detect(self._irq_pin, GPIO.FALLING, callback=self._irq_edge)
+        except Exception as e:
+            self._irq_event = None
+            print(f"MFRC522 {self.name}: IRQ pin {self._irq_pin} unavailable, polling instead: {e}")
+
+    def _irq_edge(self, channel):
+        """GPIO callback: an enabled ComIrq bit was set"""
+        event = self._irq_event
+        if event is not None:
+            event.set()
+
     def _hard_reset(self):
         """Perform hardware reset via GPIO"""
         GPIO.output(self._reset_pin, GPIO.LOW)
@@ -295,15 +375,35 @@ class MFRC522Reader(BaseReader):
         self._write_register(MFRC522Register.COMMAND, MFRC522Command.SOFTRESET)
         time.sleep(0.05)
 
+    def _xfer(self, data: List[int]) -> List[int]:
+        """One SPI transaction (chip select held for the whole burst)"""
+        self._spi_transactions += 1
+        return self._spi.xfer2(data)
+
     def _write_register(self, reg: int, value: int):
         """Write a byte to register"""
-        self._spi.xfer([(reg << 1) & 0x7E, value])
+        self._xfer([(reg << 1) & 0x7E, value])
 
     def _read_register(self, reg: int) -> int:
         """Read a byte from register"""
-        result = self._spi.xfer([((reg << 1) & 0x7E) | 0x80, 0])
+        result = self._xfer([((reg << 1) & 0x7E) | 0x80, 0])
         return result[1]
 
+    def _read_registers(self, regs: List[int]) -> List[int]:
+        """Read several registers in one burst; each address clocks out the previous value"""
+        result = self._xfer([((reg << 1) & 0x7E) | 0x80 for reg in regs] + [0])
+        return result[1:]
+
+    def _write_fifo(self, data: List[int]):
+        """Write data to the FIFO in one burst"""
+        self._xfer([(MFRC522Register.FIFODATA << 1) & 0x7E] + list(data))
+
+    def _read_fifo(self, count: int) -> List[int]:
+        """Read `count` bytes from the FIFO in one burst"""
+        addr = ((MFRC522Register.FIFODATA << 1) & 0x7E) | 0x80
+        result = self._xfer([addr] * count + [0])
+        return result[1:]
+
     def _set_bit_mask(self, reg: int, mask: int):
         """Set bits in register"""
         current = self._read_register(reg)
@@ -331,144 +431,310 @@ class MFRC522Reader(BaseReader):
 
     def _poll_loop(self):
         """Main card polling loop"""
-        while self._running:
+        # A loop left behind by a reset (stuck in a bus call) exits once it
+        # wakes up instead of running alongside its replacement
+        while self._running and self._poll_thread is threading.current_thread():
             try:
+                before = self._spi_transactions
                 uid = self._read_card()
+                self._polls += 1
+                self._last_poll_transactions = self._spi_transactions - before
                 if uid:
                     self._handle_card(uid)
             except Exception as e:
+                self.record_failure(f"MFRC522 poll error: {e}")
                 print(f"MFRC522 poll error: {e}")
 
             time.sleep(self.poll_interval)
 
     def _read_card(self) -> Optional[bytes]:
-        """Attempt to read a card"""
-        # Request card
-        status, atq = self._request(PICommand.REQIDL)
-        if status != 0:
-            return None
-
-        # Anti-collision
-        status, uid = self._anticoll()
-        if status != 0:
+        """
+        Attempt to read a card.
+
+        WUPA wakes cards in IDLE or HALT state; a card that was selected on
+        an earlier poll is halted again afterwards, so it is re-read on every
+        poll while it stays in the field and the dispatcher debounce
+        decides what is reported.
+        """
+        status, atq = self._request(PICommand.REQALL)
+        if status != self.STATUS_OK:
+            # Empty field: forget the last card
+            self._select_cache = None
             return None
 
-        return bytes(uid)
-
-    def _request(self, req_mode: int) -> tuple:
-        """Send request command"""
-        self._write_register(MFRC522Register.BITFRAMING, 0x07)
+        uid = None
+        cache = self._select_cache
+        if cache and time.monotonic() < cache[2]:
+            uid = self._select_cached(cache[1])
+            blocks = cache[1]
 
-        status, back_data, back_len = self._to_card(
-            MFRC522Command.TRANSCEIVE,
-            [req_mode]
-        )
+        if uid is None:
+            result = self._select_card()
+            if result is None:
+                self._select_cache = None
+                return None
+            uid, blocks = result
 
-        if status != 0 or back_len != 0x10:
-            return (1, None)
-
-        return (0, back_data)
-
-    def _anticoll(self) -> tuple:
-        """Anti-collision detection"""
-        self._write_register(MFRC522Register.BITFRAMING, 0x00)
+        self._select_cache = (uid, blocks, time.monotonic() + self.select_cache_ttl)
+        self._halt()
+        return uid
 
+    def _request(self, req_mode: int) -> tuple:
+        """
+        Send request command. With an IRQ pin this is also the card-presence
+        check: an empty field ends on the chip timer interrupt without any
+        FIFO or error register reads.
+        """
+        # Short frame: 7 bits
         status, back_data, back_len = self._to_card(
             MFRC522Command.TRANSCEIVE,
-            [PICommand.ANTICOLL1, 0x20]
+            [req_mode],
+            bit_framing=0x07
         )
 
-        if status != 0:
-            return (1, None)
-
-        if len(back_data) == 5:
-            # Verify checksum
-            checksum = 0
-            for byte in back_data[:4]:
-                checksum ^= byte
-            if checksum != back_data[4]:
-                return (1, None)
-            return (0, back_data[:4])
-
-        return (1, None)
+        if status != self.STATUS_OK or back_len != 0x10:
+            return (self.STATUS_ERROR, None)
+
+        return (self.STATUS_OK, back_data)
+
+    def _select_card(self) -> Optional[tuple]:
+        """
+        Run anticollision and SELECT through cascade levels 1-3.
+
+        Returns:
+            (uid, per-level UID blocks) or None
+        """
+        uid: List[int] = []
+        blocks: List[List[int]] = []
+
+        for sel in self.SELECT_LEVELS:
+            block = self._anticoll(sel)
+            if block is None:
+                return None
+
+            sak = self._select(sel, block)
+            if sak is None:
+                return None
+            blocks.append(block)
+
+            # Cascade bit: UID not complete, block is CT + 3 UID bytes
+            if sak & 0x04:
+                if block[0] != self.CASCADE_TAG:
+                    return None
+                uid.extend(block[1:])
+                continue
+
+            uid.extend(block)
+            return (bytes(uid), blocks)
+
+        return None
+
+    def _select_cached(self, blocks: List[List[int]]) -> Optional[bytes]:
+        """SELECT a remembered card directly, skipping anticollision"""
+        uid: List[int] = []
+        for level, (sel, block) in enumerate(zip(self.SELECT_LEVELS, blocks)):
+            sak = self._select(sel, block)
+            if sak is None:
+                return None
+            last = level == len(blocks) - 1
+            if bool(sak & 0x04) == last:
+                return None
+            uid.extend(block if last else block[1:])
+        return bytes(uid)
 
-    def _to_card(self, command: int, send_data: List[int]) -> tuple:
-        """Send command to card"""
+    def _anticoll(self, sel: int) -> Optional[List[int]]:
+        """
+        Bitwise anticollision for one cascade level.
+
+        Sends the UID bits known so far; every card whose UID starts with
+        them answers with the rest. On a collision the colliding bit is
+        resolved to 1 and the round repeats with one more known bit, until
+        a single card answers with a complete UID block and matching BCC.
+
+        Returns:
+            The 4-byte UID block (CT + 3 bytes on a cascade), or None
+        """
+        known = [0] * 5     # 4 UID bytes + BCC
+        known_bits = 0
+
+        for _ in range(33):
+            full_bytes, tx_last_bits = divmod(known_bits, 8)
+            send_len = full_bytes + (1 if tx_last_bits else 0)
+            nvb = ((2 + full_bytes) << 4) | tx_last_bits
+
+            # RxAlign = TxLastBits: the answer continues the partial byte
+            status, back_data, back_len = self._to_card(
+                MFRC522Command.TRANSCEIVE,
+                [sel, nvb] + known[:send_len],
+                bit_framing=(tx_last_bits << 4) | tx_last_bits
+            )
+            if status == self.STATUS_ERROR or not back_data:
+                return None
+
+            # Merge the answer into the known bits
+            low_mask = (1 << tx_last_bits) - 1
+            for i, byte in enumerate(back_data):
+                idx = full_bytes + i
+                if idx >= len(known):
+                    break
+                if i == 0 and tx_last_bits:
+                    byte = (known[idx] & low_mask) | (byte & ~low_mask & 0xFF)
+                known[idx] = byte
+
+            if status == self.STATUS_COLLISION:
+                coll_pos = back_len
+                if coll_pos <= known_bits:
+                    return None
+                # Take the branch with a 1 at the colliding bit
+                known_bits = coll_pos
+                byte_index, bit = divmod(coll_pos - 1, 8)
+                known[byte_index] |= 1 << bit
+                continue
+
+            if known[0] ^ known[1] ^ known[2] ^ known[3] != known[4]:
+                return None
+            return known[:4]
+
+        return None
+
+    def _select(self, sel: int, block: List[int]) -> Optional[int]:
+        """SELECT one cascade level; returns the card's SAK or None"""
+        frame = [sel, 0x70] + list(block) + [block[0] ^ block[1] ^ block[2] ^ block[3]]
+        frame += _crc_a(frame)
+
+        status, back_data, back_len = self._to_card(MFRC522Command.TRANSCEIVE, frame)
+        if status != self.STATUS_OK or back_len != 24 or len(back_data) < 3:
+            return None
+        if _crc_a(back_data[:1]) != list(back_data[1:3]):
+            return None
+        return back_data[0]
+
+    def _halt(self):
+        """Send HLTA; the card does not answer, so the timer ends the command"""
+        frame = [PICommand.HALT, 0x00]
+        self._to_card(MFRC522Command.TRANSCEIVE, frame + _crc_a(frame))
+
+    def _to_card(self, command: int, send_data: List[int], bit_framing: int = 0x00) -> tuple:
+        """
+        Send command to card.
+
+        Registers are written directly rather than read-modify-write, the
+        FIFO is moved in single bursts and the completion registers are read
+        back in one transaction, so an empty-field poll costs a handful of
+        SPI transactions instead of hundreds.
+        """
         back_data = []
         back_len = 0
-        irq_en = 0x00
         wait_irq = 0x00
 
         if command == MFRC522Command.MFAUTHENT:
-            irq_en = 0x12
-            wait_irq = 0x10
+            wait_irq = 0x10     # IdleIRq
         elif command == MFRC522Command.TRANSCEIVE:
-            irq_en = 0x77
-            wait_irq = 0x30
+            wait_irq = 0x30     # RxIRq, IdleIRq
 
-        self._write_register(MFRC522Register.COMIEN, irq_en | 0x80)
-        self._clear_bit_mask(MFRC522Register.COMIRQ, 0x80)
-        self._set_bit_mask(MFRC522Register.FIFOLEVEL, 0x80)
+        # Only completion and the chip timer drive the IRQ pin (inverted: active low)
+        irq_en = 0x80 | wait_irq | 0x01
+        if irq_en != self._comien:
+            self._write_register(MFRC522Register.COMIEN, irq_en)
+            self._comien = irq_en
 
+        self._write_register(MFRC522Register.COMIRQ, 0x7F)    # Clear all IRQ bits
+        self._write_register(MFRC522Register.FIFOLEVEL, 0x80)  # Flush FIFO
         self._write_register(MFRC522Register.COMMAND, MFRC522Command.IDLE)
 
         # Write data to FIFO
-        for byte in send_data:
-            self._write_register(MFRC522Register.FIFODATA, byte)
+        self._write_fifo(send_data)
 
         # Execute command
+        if self._irq_event is not None:
+            self._irq_event.clear()
         self._write_register(MFRC522Register.COMMAND, command)
 
         if command == MFRC522Command.TRANSCEIVE:
-            self._set_bit_mask(MFRC522Register.BITFRAMING, 0x80)
+            self._write_register(MFRC522Register.BITFRAMING, bit_framing | 0x80)  # StartSend
 
-        # Wait for completion
-        i = 2000
-        while True:
-            n = self._read_register(MFRC522Register.COMIRQ)
-            i -= 1
-            if not ((i != 0) and (not (n & 0x01)) and (not (n & wait_irq))):
-                break
-
-        self._clear_bit_mask(MFRC522Register.BITFRAMING, 0x80)
-
-        if i != 0:
-            error = self._read_register(MFRC522Register.ERROR)
-            if not (error & 0x1B):
-                if command == MFRC522Command.TRANSCEIVE:
-                    n = self._read_register(MFRC522Register.FIFOLEVEL)
-                    last_bits = self._read_register(MFRC522Register.CONTROL) & 0x07
-                    if last_bits != 0:
-                        back_len = (n - 1) * 8 + last_bits
-                    else:
-                        back_len = n * 8
-
-                    if n == 0:
-                        n = 1
-                    if n > self.MAX_LEN:
-                        n = self.MAX_LEN
-
-                    # Read FIFO data
-                    for _ in range(n):
-                        back_data.append(self._read_register(MFRC522Register.FIFODATA))
-
-                return (0, back_data, back_len)
+        regs = self._wait_for_completion(wait_irq | 0x01)
+
+        if command == MFRC522Command.TRANSCEIVE:
+            self._write_register(MFRC522Register.BITFRAMING, bit_framing)
+
+        if regs is None:
+            # The chip timer always ends a command; no completion means the
+            # chip is not responding
+            self.record_failure("MFRC522 command timed out")
+            return (self.STATUS_ERROR, [], 0)
+        self.record_success()
+
+        irq, error, n, control, coll = regs
+
+        # Timer expired with nothing received: no card in the field
+        if not (irq & wait_irq):
+            return (self.STATUS_ERROR, [], 0)
+
+        # BufferOvfl, ParityErr, ProtocolErr
+        if error & 0x13:
+            return (self.STATUS_ERROR, [], 0)
+
+        # CollErr: return what was received and the collision bit position
+        if error & 0x08:
+            if command != MFRC522Command.TRANSCEIVE or coll & 0x20:
+                return (self.STATUS_ERROR, [], 0)
+            back_data = self._read_fifo(max(1, min(n, self.MAX_LEN)))
+            return (self.STATUS_COLLISION, back_data, (coll & 0x1F) or 32)
+
+        if command == MFRC522Command.TRANSCEIVE:
+            last_bits = control & 0x07
+            if last_bits != 0:
+                back_len = (n - 1) * 8 + last_bits
             else:
-                return (1, [], 0)
+                back_len = n * 8
+
+            if n == 0:
+                n = 1
+            if n > self.MAX_LEN:
+                n = self.MAX_LEN
+
+            # Read FIFO data
+            back_data = self._read_fifo(n)
+
+        return (self.STATUS_OK, back_data, back_len)
+
+    def _wait_for_completion(self, done_mask: int) -> Optional[List[int]]:
+        """
+        Wait until one of the done_mask ComIrq bits is set.
+
+        Returns:
+            [ComIrq, Error, FIFOLevel, Control, Coll] read in one burst, or None on timeout
+        """
+        regs_to_read = [
+            MFRC522Register.COMIRQ,
+            MFRC522Register.ERROR,
+            MFRC522Register.FIFOLEVEL,
+            MFRC522Register.CONTROL,
+            MFRC522Register.COLL,
+        ]
+        deadline = time.monotonic() + self.COMMAND_TIMEOUT
+        event = self._irq_event
 
-        return (1, [], 0)
+        while True:
+            if event is not None:
+                event.wait(max(0.0, deadline - time.monotonic()))
+                event.clear()
+
+            regs = self._read_registers(regs_to_read)
+            if regs[0] & done_mask:
+                return regs
+            if time.monotonic() >= deadline:
+                return None
+            if event is None:
+                # An idle poll waits ~15 ms for the chip timer; don't spin the bus
+                time.sleep(self.STATUS_POLL_GAP)
 
     def _handle_card(self, uid: bytes):
         """Handle a detected card"""
+        # Reported on every poll the card stays in the field; repeats are
+        # filtered per (reader, card) by the dispatcher's debounce window.
         uid_hex = uid.hex()
-        current_time = time.time()
-
-        # Debounce: don't report same card within debounce_time
-        if uid_hex == self._last_card and (current_time - self._last_card_time) < self.debounce_time:
-            return
-
-        self._last_card = uid_hex
-        self._last_card_time = current_time
 
         # Create card read event
         card_read = CardRead(
@@ -3,11 +3,13 @@ PN532 NFC/RFID Reader Module
 PiDoors Access Control System
 
 PN532 NFC reader support over I2C or SPI interface.
-Supports reading Mifare Classic, Ultralight, NTAG, and other ISO14443A cards.
+Supports reading Mifare Classic, Ultralight, NTAG, and other ISO14443A cards,
+plus ISO14443B and FeliCa cards in autopoll mode.
 
 Requires:
   - I2C: smbus2 package
   - SPI: spidev package
+  - IRQ pin (optional): RPi.GPIO
 """
 
 import threading
@@ -31,6 +33,16 @@ try:
 except ImportError:
     SPI_AVAILABLE = False
 
+# Try to import GPIO library (IRQ line)
+try:
+    import RPi.GPIO as GPIO
+    GPIO_AVAILABLE = True
+except ImportError:
+    GPIO_AVAILABLE = False
+
+# PN532 SPI is LSB-first; lookup table instead of per-byte string reversal
+_BIT_REVERSE = bytes(int('{:08b}'.format(b)[::-1], 2) for b in range(256))
+
 
 class PN532Command(IntEnum):
     """PN532 command codes"""
@@ -47,6 +59,14 @@ class PN532Command(IntEnum):
     POWERDOWN = 0x16
 
 
+class AutoPollType(IntEnum):
+    """InAutoPoll target types"""
+    GENERIC_106A = 0x00     # ISO14443A: Mifare, NTAG, ISO14443-4A
+    FELICA_212 = 0x11
+    FELICA_424 = 0x12
+    ISO14443_4B = 0x23
+
+
 class CardType(IntEnum):
     """NFC card types"""
     MIFARE_CLASSIC_1K = 0x08
@@ -67,14 +87,26 @@ class PN532Reader(BaseReader):
         spi_bus: SPI bus number (default: 0)
         spi_device: SPI device number (default: 0)
         spi_speed: SPI speed in Hz (default: 1000000)
+        irq_pin: GPIO pin (BCM) wired to the PN532 IRQ line (optional).
+                 When set, the reader arms target detection and sleeps until
+                 the chip signals a card; otherwise it polls.
+        autopoll: Let the chip poll autonomously with InAutoPoll across the
+                  configured card types, reading up to two cards per cycle
+                  (default: false = InListPassiveTarget, ISO14443A only)
+        autopoll_types: Card technologies for autopoll, any of "iso14443a",
+                        "iso14443b", "felica" (default: all three)
+        autopoll_period: Time between the chip's polling attempts in seconds,
+                         0.15 - 2.25 (default: 0.15)
         poll_interval: Card polling interval in seconds (default: 0.2)
-        debounce_time: Time to wait before reading same card again (default: 2.0)
+        debounce_time: Repeat-read window for the same card, applied by the
+                       dispatcher (default: 2.0)
 
     Example config:
         {
             "interface": "i2c",
             "i2c_address": 36,
             "i2c_bus": 1,
+            "irq_pin": 16,
             "poll_interval": 0.2
         }
     """
@@ -97,20 +129,41 @@ class PN532Reader(BaseReader):
     SPI_DATAREAD = 0x03
     SPI_READY = 0x01
 
+    # Command/response timing
+    ACK_FRAME = bytes([0x00, 0x00, 0xFF, 0x00, 0xFF, 0x00])
+    ACK_TIMEOUT = 0.1
+    READY_POLL_INTERVAL = 0.01  # Status polling when no IRQ pin is wired
+    IRQ_REARM_INTERVAL = 5.0    # Re-arm detection in case an IRQ edge is lost
+
+    # InAutoPoll
+    AUTOPOLL_TYPES = {
+        'iso14443a': (AutoPollType.GENERIC_106A,),
+        'iso14443b': (AutoPollType.ISO14443_4B,),
+        'felica': (AutoPollType.FELICA_212, AutoPollType.FELICA_424),
+    }
+    AUTOPOLL_ENDLESS = 0xFF     # PollNr: keep polling until a target is found
+    AUTOPOLL_PERIOD_UNIT = 0.15
+    AUTOPOLL_MAX_TARGETS = 2
+    RESPONSE_LEN = 32
+    AUTOPOLL_RESPONSE_LEN = 96  # Two targets, possibly with ATS
+
     def __init__(self, name: str, config: Dict[str, Any], on_card_read=None):
         super().__init__(name, config, on_card_read)
 
         self.interface: str = "i2c"
         self.poll_interval: float = 0.2
-        self.debounce_time: float = 2.0
+        self.irq_pin: Optional[int] = None
+        self.autopoll: bool = False
+
+        self._autopoll_types: List[int] = []
+        self._autopoll_period: int = 1
 
+        self._irq_event: Optional[threading.Event] = None
         self._i2c_bus = None
         self._i2c_address: int = self.I2C_ADDRESS
         self._spi = None
         self._running: bool = False
         self._poll_thread: Optional[threading.Thread] = None
-        self._last_card: Optional[str] = None
-        self._last_card_time: float = 0
 
     @staticmethod
     def get_reader_type() -> ReaderType:
@@ -122,7 +175,18 @@ class PN532Reader(BaseReader):
 
         self.interface = self.get_config_value('interface', 'i2c').lower()
         self.poll_interval = self.get_config_value('poll_interval', 0.2)
-        self.debounce_time = self.get_config_value('debounce_time', 2.0)
+        self.irq_pin = self.get_config_value('irq_pin')
+        self.autopoll = bool(self.get_config_value('autopoll', False))
+
+        if self.autopoll:
+            names = self.get_config_value('autopoll_types', list(self.AUTOPOLL_TYPES))
+            unknown = [n for n in names if n not in self.AUTOPOLL_TYPES]
+            if unknown or not names:
+                self.set_error(f"Unknown autopoll_types: {unknown or names}")
+                return False
+            self._autopoll_types = [int(t) for n in names for t in self.AUTOPOLL_TYPES[n]]
+            period = self.get_config_value('autopoll_period', self.AUTOPOLL_PERIOD_UNIT)
+            self._autopoll_period = min(15, max(1, round(period / self.AUTOPOLL_PERIOD_UNIT)))
 
         if self.interface == 'i2c':
             return self._init_i2c()
@@ -198,6 +262,8 @@ class PN532Reader(BaseReader):
             if not self.initialize():
                 return False
 
+        self._setup_irq()
+
         self._running = True
         self._poll_thread = threading.Thread(target=self._poll_loop, daemon=True)
         self._poll_thread.start()
@@ -212,6 +278,16 @@ class PN532Reader(BaseReader):
         if self._poll_thread and self._poll_thread.is_alive():
             self._poll_thread.join(timeout=2.0)
 
+        if self._irq_event is not None:
+            # Leave the chip idle rather than in an endless detection command
+            if not (self._poll_thread and self._poll_thread.is_alive()):
+                self._abort_command()
+            try:
+                GPIO.remove_event_detect(self.irq_pin)
+            except Exception:
+                pass
+            self._irq_event = None
+
         if self._i2c_bus:
             try:
                 self._i2c_bus.close()
@@ -238,8 +314,35 @@ class PN532Reader(BaseReader):
             'error': self.error_message,
             'interface': self.interface,
             'i2c_address': self._i2c_address if self.interface == 'i2c' else None,
+            'irq_pin': self.irq_pin,
+            'detection': 'irq' if self._irq_event is not None else 'polling',
+            'autopoll': self.autopoll,
         }
 
+    def _setup_irq(self):
+        """Attach an edge callback to the IRQ line, if one is configured"""
+        if self.irq_pin is None or self._irq_event is not None:
+            return
+
+        if not GPIO_AVAILABLE:
+            print(f"PN532 {self.name}: RPi.GPIO not available, polling instead of IRQ")
+            return
+
+        try:
+            self._irq_event = threading.Event()
+            # IRQ is active low and idles high
+            GPIO.setup(self.irq_pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+            GPIO.add_event_detect(self.irq_pin, GPIO.FALLING, callback=self._irq_edge)
+        except Exception as e:
+            self._irq_event = None
+            print(f"PN532 {self.name}: IRQ pin {self.irq_pin} unavailable, polling instead: {e}")
+
+    def _irq_edge(self, channel):
+        """GPIO callback: the PN532 has an ACK or response ready"""
+        event = self._irq_event
+        if event is not None:
+            event.set()
+
     def _wakeup(self) -> bool:
         """Wake up PN532 from power down"""
         if self.interface == 'i2c':
@@ -270,7 +373,7 @@ class PN532Reader(BaseReader):
 
     def _configure_sam(self) -> bool:
         """Configure Security Access Module"""
-        # Mode 1 = Normal, timeout 0, IRQ not used
+        # Mode 1 = Normal, timeout 0, drive the P70_IRQ line
         response = self._send_command(
             PN532Command.SAM_CONFIGURATION,
             [0x01, 0x00, 0x01]
@@ -279,56 +382,123 @@ class PN532Reader(BaseReader):
 
     def _poll_loop(self):
         """Main card polling loop"""
-        while self._running:
+        # A loop left behind by a reset (stuck in a bus call) exits once it
+        # wakes up instead of running alongside its replacement
+        while self._running and self._poll_thread is threading.current_thread():
             try:
-                card_uid = self._read_passive_target()
-                if card_uid:
+                if self._irq_event is not None:
+                    card_uids = self._wait_for_targets()
+                else:
+                    card_uids = self._poll_targets()
+                for card_uid in card_uids:
                     self._handle_card(card_uid)
             except Exception as e:
+                self.record_failure(f"PN532 poll error: {e}")
                 print(f"PN532 poll error: {e}")
 
             time.sleep(self.poll_interval)
 
-    def _read_passive_target(self) -> Optional[bytes]:
+    def _detection_command(self, endless: bool):
+        """Command, parameters and response size for one detection cycle"""
+        if self.autopoll:
+            poll_nr = self.AUTOPOLL_ENDLESS if endless else 0x01
+            return (PN532Command.IN_AUTOPOLL,
+                    [poll_nr, self._autopoll_period] + self._autopoll_types,
+                    self.AUTOPOLL_RESPONSE_LEN)
+        # InListPassiveTarget, max 1 target, 106 kbps Type A
+        return PN532Command.IN_LIST_PASSIVE_TARGET, [0x01, 0x00], self.RESPONSE_LEN
+
+    def _poll_targets(self) -> List[bytes]:
         """
-        Attempt to read a passive ISO14443A target.
-        Returns the card UID if found, None otherwise.
+        Run one host-driven detection cycle.
+        Returns the UIDs of any cards found.
         """
-        # Command: InListPassiveTarget, max 1 target, 106 kbps Type A
-        response = self._send_command(
-            PN532Command.IN_LIST_PASSIVE_TARGET,
-            [0x01, 0x00],  # Max 1 target, 106 kbps baud
-            timeout=0.5
-        )
+        command, data, response_len = self._detection_command(endless=False)
+        timeout = 0.5
+        if self.autopoll:
+            # One pass over every type, each taking up to one period
+            timeout += self._autopoll_period * self.AUTOPOLL_PERIOD_UNIT * len(self._autopoll_types)
 
-        if not response or len(response) < 1:
-            return None
+        response = self._send_command(command, data, timeout=timeout, response_len=response_len)
+        return self._parse_targets(response)
 
-        num_targets = response[0]
-        if num_targets < 1:
-            return None
+    def _wait_for_targets(self) -> List[bytes]:
+        """
+        Arm detection and sleep until the IRQ line signals that a target
+        was found. The chip keeps searching on its own, so there is no bus
+        traffic while the field is empty. Detection is re-armed every
+        IRQ_REARM_INTERVAL in case the chip was reset or an edge was missed.
+        """
+        command, data, response_len = self._detection_command(endless=True)
+        if not self._write_command(command, data):
+            return []
+
+        deadline = time.monotonic() + self.IRQ_REARM_INTERVAL
+        while self._running and time.monotonic() < deadline:
+            if self._wait_ready(0.5):
+                return self._parse_targets(self._read_response(response_len))
+
+        # The endless command is still running on the chip; it only accepts
+        # the next one once the host has aborted it
+        self._abort_command()
+        return []
+
+    def _parse_targets(self, response: Optional[List[int]]) -> List[bytes]:
+        """Extract card UIDs from an InListPassiveTarget or InAutoPoll response"""
+        if not response or response[0] < 1:
+            return []
+
+        if not self.autopoll:
+            # num_targets, then target data for one Type A target
+            uid = self._target_uid(AutoPollType.GENERIC_106A, response[1:])
+            return [uid] if uid else []
+
+        # num_targets, then per target: type, data length, target data
+        uids = []
+        idx = 1
+        for _ in range(min(response[0], self.AUTOPOLL_MAX_TARGETS)):
+            if idx + 2 > len(response):
+                break
+            target_type = response[idx]
+            target_len = response[idx + 1]
+            uid = self._target_uid(target_type, response[idx + 2:idx + 2 + target_len])
+            if uid:
+                uids.append(uid)
+            idx += 2 + target_len
+        return uids
+
+    def _target_uid(self, target_type: int, target: List[int]) -> Optional[bytes]:
+        """
+        Get the UID from one target's data (first byte is the target number).
+
+        ISO14443A: target_num, sens_res(2), sel_res, nfcid_len, nfcid...
+        ISO14443B: target_num, ATQB (0x50, PUPI(4), ...)
+        FeliCa:    target_num, pol_res_len, 0x01, IDm(8), ...
+        """
+        if target_type in (AutoPollType.FELICA_212, AutoPollType.FELICA_424):
+            if len(target) < 11:
+                return None
+            return bytes(target[3:11])
+
+        if target_type == AutoPollType.ISO14443_4B:
+            if len(target) < 6:
+                return None
+            return bytes(target[2:6])
 
-        # Parse response: target_num, sens_res(2), sel_res, nfcid_len, nfcid...
-        if len(response) < 6:
+        if len(target) < 6:
             return None
 
-        nfcid_len = response[4]
-        if len(response) < 5 + nfcid_len:
+        nfcid_len = target[4]
+        if nfcid_len < 1 or len(target) < 5 + nfcid_len:
             return None
 
-        return bytes(response[5:5 + nfcid_len])
+        return bytes(target[5:5 + nfcid_len])
 
     def _handle_card(self, uid: bytes):
         """Handle a detected card"""
+        # Reported on every poll the card stays in the field; repeats are
+        # filtered per (reader, card) by the dispatcher's debounce window.
         uid_hex = uid.hex()
-        current_time = time.time()
-
-        # Debounce: don't report same card within debounce_time
-        if uid_hex == self._last_card and (current_time - self._last_card_time) < self.debounce_time:
-            return
-
-        self._last_card = uid_hex
-        self._last_card_time = current_time
 
         # Create card read event
         # NFC UID is used directly as card_id and user_id
@@ -345,18 +515,107 @@ class PN532Reader(BaseReader):
         self.report_card(card_read)
 
     def _send_command(self, command: int, data: List[int] = None,
-                      timeout: float = 1.0) -> Optional[List[int]]:
+                      timeout: float = 1.0,
+                      response_len: int = RESPONSE_LEN) -> Optional[List[int]]:
         """Send command to PN532 and get response"""
-        if data is None:
-            data = []
+        if not self._write_command(command, data):
+            return None
+        if not self._wait_ready(timeout):
+            return None
+        return self._read_response(response_len)
+
+    def _write_frame(self, frame: bytes) -> bool:
+        """Write a raw frame to the PN532"""
+        try:
+            if self.interface == 'i2c':
+                self._i2c_bus.write_i2c_block_data(
+                    self._i2c_address,
+                    frame[0],
+                    list(frame[1:])
+                )
+            elif self.interface == 'spi':
+                self._spi.xfer([self.SPI_DATAWRITE] + [_BIT_REVERSE[b] for b in frame])
+            else:
+                return False
+        except Exception as e:
+            self.record_failure(f"PN532 write failed: {e}")
+            return False
+        return True
+
+    def _abort_command(self):
+        """Abort the command the PN532 is running (an ACK frame from the host)"""
+        self._write_frame(self.ACK_FRAME)
+
+    def _write_command(self, command: int, data: List[int] = None) -> bool:
+        """Send a command frame and consume the PN532's ACK"""
+        if not self._write_frame(self._build_frame(command, data or [])):
+            return False
+
+        if not self._wait_ready(self.ACK_TIMEOUT):
+            self.record_failure("PN532 did not acknowledge command")
+            return False
+
+        # The ACK has to be read before the chip will signal the response
+        ack = self._read_data(len(self.ACK_FRAME))
+        if ack is None or self.ACK_FRAME not in bytes(ack):
+            self.record_failure("PN532 sent an invalid ACK")
+            return False
+        self.record_success()
+        return True
+
+    def _read_response(self, length: int = RESPONSE_LEN) -> Optional[List[int]]:
+        """Read and parse a response frame once the chip is ready"""
+        response = self._read_data(length)
+        if response is None:
+            return None
+        return self._parse_response(response)
 
-        frame = self._build_frame(command, data)
+    def _wait_ready(self, timeout: float) -> bool:
+        """
+        Wait until the PN532 has data (ACK or response) ready.
 
+        With an IRQ pin this sleeps on the edge callback; the level check
+        after clearing the event covers an edge that fired just before.
+        Without one it polls the status byte.
+        """
+        event = self._irq_event
+        if event is not None:
+            event.clear()
+            if GPIO.input(self.irq_pin) == GPIO.LOW:
+                return True
+            return event.wait(timeout)
+
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if self._is_ready():
+                    return True
+            except Exception:
+                pass
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.READY_POLL_INTERVAL)
+
+    def _is_ready(self) -> bool:
+        """Read the PN532 status byte"""
         if self.interface == 'i2c':
-            return self._send_command_i2c(frame, timeout)
-        elif self.interface == 'spi':
-            return self._send_command_spi(frame, timeout)
-        return None
+            return bool(self._i2c_bus.read_byte(self._i2c_address) & self.I2C_READY)
+        status = self._spi.xfer([self.SPI_STATREAD, 0x00])
+        return bool(_BIT_REVERSE[status[1]] & self.SPI_READY)
+
+    def _read_data(self, length: int) -> Optional[List[int]]:
+        """Read `length` bytes of frame data from the PN532"""
+        try:
+            if self.interface == 'i2c':
+                # Plain I2C read (SMBus block reads stop at 32 bytes).
+                # First byte is the I2C status byte; the parser skips it
+                msg = smbus2.i2c_msg.read(self._i2c_address, length + 1)
+                self._i2c_bus.i2c_rdwr(msg)
+                return list(msg)
+            response = self._spi.xfer([self.SPI_DATAREAD] + [0x00] * length)
+            return [_BIT_REVERSE[b] for b in response[1:]]
+        except Exception:
+            return None
 
     def _build_frame(self, command: int, data: List[int]) -> bytes:
         """Build PN532 command frame"""
@@ -382,74 +641,6 @@ class PN532Reader(BaseReader):
 
         return bytes(frame)
 
-    def _send_command_i2c(self, frame: bytes, timeout: float) -> Optional[List[int]]:
-        """Send command over I2C"""
-        try:
-            # Write command
-            self._i2c_bus.write_i2c_block_data(
-                self._i2c_address,
-                frame[0],
-                list(frame[1:])
-            )
-
-            # Wait for response
-            start = time.time()
-            while (time.time() - start) < timeout:
-                try:
-                    # Check if ready
-                    status = self._i2c_bus.read_byte(self._i2c_address)
-                    if status & self.I2C_READY:
-                        break
-                except Exception:
-                    pass
-                time.sleep(0.01)
-            else:
-                return None
-
-            # Read response (max 64 bytes)
-            response = self._i2c_bus.read_i2c_block_data(
-                self._i2c_address,
-                self.PREAMBLE,
-                32
-            )
-
-            return self._parse_response(response)
-
-        except Exception:
-            return None
-
-    def _send_command_spi(self, frame: bytes, timeout: float) -> Optional[List[int]]:
-        """Send command over SPI"""
-        try:
-            # Reverse bits for SPI (PN532 quirk)
-            def reverse_byte(b):
-                return int('{:08b}'.format(b)[::-1], 2)
-
-            # Write command
-            spi_frame = [self.SPI_DATAWRITE]
-            spi_frame.extend([reverse_byte(b) for b in frame])
-            self._spi.xfer(spi_frame)
-
-            # Wait for response
-            start = time.time()
-            while (time.time() - start) < timeout:
-                status = self._spi.xfer([self.SPI_STATREAD, 0x00])
-                if reverse_byte(status[1]) & self.SPI_READY:
-                    break
-                time.sleep(0.01)
-            else:
-                return None
-
-            # Read response
-            read_cmd = [self.SPI_DATAREAD] + [0x00] * 32
-            response = self._spi.xfer(read_cmd)
-            response = [reverse_byte(b) for b in response[1:]]
-
-            return self._parse_response(response)
-
-        except Exception:
-            return None
-
     def _parse_response(self, data: List[int]) -> Optional[List[int]]:
         """Parse PN532 response frame"""
         # Find start code
@@ -478,7 +669,7 @@ class PN532Reader(BaseReader):
                 return None
 
             # Return data portion (skip TFI and response code)
-            return list(data[idx + 2:idx + length - 1])
+            return list(data[idx + 2:idx + length])
 
         except (IndexError, ValueError):
             return None
@@ -4,13 +4,14 @@ PiDoors Access Control System
 
 OSDP v2 protocol implementation for RS-485 communication with
 encrypted readers. Supports Secure Channel with AES-128 encryption.
+Several readers (PD addresses) may share one serial port; the port and
+poll schedule are owned by OSDPBus (see osdp_bus.py).
 
 Requires: pyserial
 """
 
-import threading
-import time
 import struct
+import time
 from typing import Dict, Any, Optional, List
 from enum import IntEnum
 from dataclasses import dataclass
@@ -33,6 +34,7 @@ except ImportError:
         CRYPTO_AVAILABLE = False
 
 from .base import BaseReader, CardRead, ReaderType, ReaderStatus
+from .osdp_bus import OSDPBus
 
 
 class OSDPCommand(IntEnum):
@@ -76,6 +78,29 @@ class OSDPReply(IntEnum):
     RMAC_I = 0x78     # Secure channel reply MAC
 
 
+class OSDPColor(IntEnum):
+    """osdp_LED colour codes"""
+    BLACK = 0
+    RED = 1
+    GREEN = 2
+    AMBER = 3
+    BLUE = 4
+
+
+def _build_crc_table(poly: int) -> List[int]:
+    """Precompute the 256-entry lookup table for the right-shifting CRC-16"""
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            if crc & 0x0001:
+                crc = (crc >> 1) ^ poly
+            else:
+                crc >>= 1
+        table.append(crc)
+    return table
+
+
 @dataclass
 class OSDPPacket:
     """OSDP packet structure"""
@@ -88,6 +113,81 @@ class OSDPPacket:
     is_secure: bool = False
 
 
+class OSDPFrameParser:
+    """
+    Incremental OSDP frame parser over a receive buffer.
+
+    States: hunting for SOM -> collecting the 4-byte header -> collecting
+    the body announced by the length field. feed() accepts whatever bytes
+    have arrived and returns a packet as soon as one is complete and its
+    CRC checks out. Line noise and corrupt frames are skipped by resyncing
+    on the next SOM instead of aborting the whole reply.
+    """
+
+    SOM = 0x53
+    HEADER_LEN = 4          # SOM, address, length LSB, length MSB
+    MIN_FRAME_LEN = 8       # Header + control + command + CRC
+    MAX_FRAME_LEN = 1440    # Anything longer is treated as noise
+
+    def __init__(self, crc):
+        self._crc = crc
+        self._buf = bytearray()
+
+    def bytes_needed(self) -> int:
+        """How many more bytes would complete the current state"""
+        if len(self._buf) < self.HEADER_LEN:
+            return self.HEADER_LEN - len(self._buf)
+        length = self._buf[2] | (self._buf[3] << 8)
+        return max(1, length - len(self._buf))
+
+    def feed(self, data: bytes) -> Optional[OSDPPacket]:
+        """Add received bytes; return the first complete, valid packet"""
+        buf = self._buf
+        buf.extend(data)
+
+        while buf:
+            # Hunt for start of message
+            if buf[0] != self.SOM:
+                som = buf.find(self.SOM)
+                if som < 0:
+                    buf.clear()
+                    return None
+                del buf[:som]
+
+            if len(buf) < self.HEADER_LEN:
+                return None
+
+            length = buf[2] | (buf[3] << 8)
+            if length < self.MIN_FRAME_LEN or length > self.MAX_FRAME_LEN:
+                del buf[0]  # Not a real SOM; resync
+                continue
+
+            if len(buf) < length:
+                return None
+
+            frame = memoryview(buf)[:length]
+            checksum = frame[-2] | (frame[-1] << 8)
+            if self._crc(frame[:-2]) != checksum:
+                frame.release()
+                del buf[0]  # Corrupt frame; resync on the next SOM
+                continue
+
+            packet = OSDPPacket(
+                address=frame[1],
+                length=length,
+                control=frame[4],
+                command=frame[5],
+                data=bytes(frame[6:-2]),
+                checksum=checksum,
+                is_secure=bool(frame[4] & 0x04)
+            )
+            frame.release()
+            del buf[:length]
+            return packet
+
+        return None
+
+
 class OSDPReader(BaseReader):
     """
     OSDP card reader over RS-485.
@@ -95,10 +195,27 @@ class OSDPReader(BaseReader):
     Configuration options:
         serial_port: Serial port path (e.g., /dev/serial0) (required)
         baud_rate: Baud rate (default: 115200)
+        max_baud_rate: Highest rate to negotiate via osdp_COMSET; negotiation
+                       is off unless this is above baud_rate (default: baud_rate)
+        link_state_file: Where the negotiated rate is persisted
+                         (default: <PIDOORS_DIR>/cache/osdp_links.json)
         address: OSDP address 0-126 (default: 0)
         encryption_key: Base64-encoded AES-128 key for Secure Channel (optional)
-        poll_interval: Polling interval in seconds (default: 0.1)
-        timeout: Serial read timeout in seconds (default: 0.5)
+        poll_interval: Idle polling interval in seconds (default: 0.1)
+        min_poll_interval: Polling interval right after card/keypad activity;
+                           backs off towards poll_interval while idle
+                           (default: poll_interval / 4)
+        timeout: Reply timeout in seconds (default: 0.5)
+        inter_byte_timeout: Maximum gap between bytes of one reply in seconds
+                            (default: 0.02)
+        offline_after: Missed replies before the reader is marked offline (default: 3)
+        offline_retry: Poll interval in seconds while offline (default: 1.0)
+        feedback: Show grant/deny/held on the reader LED (default: true)
+        feedback_buzzer: Also sound the reader buzzer (default: true)
+        reader_number: Reader number on the PD for LED/buzzer commands (default: 0)
+
+    Readers configured with the same serial_port share one bus and must use
+    the same baud_rate and distinct addresses.
 
     Example config:
         {
@@ -113,20 +230,36 @@ class OSDPReader(BaseReader):
     # OSDP constants
     SOM = 0x53  # Start of message marker
     POLY = 0x8005  # CRC-16 polynomial
+    CRC_TABLE = _build_crc_table(POLY)  # One lookup per byte instead of 8 shift/xor steps
+
+    # Access feedback: (LED colour, on time, off time, duration, beeps, beep on,
+    # beep off). Times are in the OSDP unit of 100 ms.
+    FEEDBACK_PATTERNS = {
+        'grant': (OSDPColor.GREEN, 30, 0, 30, 1, 2, 0),
+        'deny': (OSDPColor.RED, 2, 2, 18, 3, 2, 2),
+        'held': (OSDPColor.AMBER, 50, 0, 50, 2, 1, 1),
+    }
 
     def __init__(self, name: str, config: Dict[str, Any], on_card_read=None):
         super().__init__(name, config, on_card_read)
 
         self.serial_port: Optional[str] = None
         self.baud_rate: int = 115200
+        self.max_baud_rate: int = 115200
         self.address: int = 0
         self.poll_interval: float = 0.1
+        self.min_poll_interval: float = 0.025
         self.timeout: float = 0.5
-
-        self._serial: Optional[serial.Serial] = None
+        self.inter_byte_timeout: float = 0.02
+        self.offline_after: int = 3
+        self.offline_retry: float = 1.0
+        self.feedback_enabled: bool = True
+        self.feedback_buzzer: bool = True
+        self.reader_number: int = 0
+
+        self._bus: Optional[OSDPBus] = None
         self._sequence: int = 0
-        self._running: bool = False
-        self._poll_thread: Optional[threading.Thread] = None
+        self._attached: bool = False
 
         # Secure channel state
         self._encryption_key: Optional[bytes] = None
@@ -152,9 +285,18 @@ class OSDPReader(BaseReader):
             return False
 
         self.baud_rate = self.get_config_value('baud_rate', 115200)
+        self.max_baud_rate = self.get_config_value('max_baud_rate', self.baud_rate)
         self.address = self.get_config_value('address', 0)
         self.poll_interval = self.get_config_value('poll_interval', 0.1)
+        self.min_poll_interval = min(self.poll_interval,
+                                     self.get_config_value('min_poll_interval', self.poll_interval / 4))
         self.timeout = self.get_config_value('timeout', 0.5)
+        self.inter_byte_timeout = self.get_config_value('inter_byte_timeout', 0.02)
+        self.offline_after = max(1, int(self.get_config_value('offline_after', 3)))
+        self.offline_retry = self.get_config_value('offline_retry', 1.0)
+        self.feedback_enabled = bool(self.get_config_value('feedback', True))
+        self.feedback_buzzer = bool(self.get_config_value('feedback_buzzer', True))
+        self.reader_number = int(self.get_config_value('reader_number', 0))
 
         # Setup encryption key if provided
         enc_key = self.get_config_value('encryption_key')
@@ -173,22 +315,14 @@ class OSDPReader(BaseReader):
                 self.set_error("Encryption requested but pycryptodome/cryptography not available")
                 return False
 
-        # Open serial port
-        try:
-            self._serial = serial.Serial(
-                port=self.serial_port,
-                baudrate=self.baud_rate,
-                bytesize=serial.EIGHTBITS,
-                parity=serial.PARITY_NONE,
-                stopbits=serial.STOPBITS_ONE,
-                timeout=self.timeout
-            )
-            self._serial.reset_input_buffer()
-            self._serial.reset_output_buffer()
-
-        except Exception as e:
-            self.set_error(f"Failed to open serial port: {e}")
-            return False
+        # Open (or join) the bus for this serial port
+        if self._bus is None:
+            try:
+                self._bus = OSDPBus.acquire(self.serial_port, self.baud_rate,
+                                            self.get_config_value('link_state_file'))
+            except Exception as e:
+                self.set_error(f"Failed to open serial port: {e}")
+                return False
 
         self.status = ReaderStatus.READY
         return True
@@ -199,27 +333,25 @@ class OSDPReader(BaseReader):
             if not self.initialize():
                 return False
 
-        self._running = True
-        self._poll_thread = threading.Thread(target=self._poll_loop, daemon=True)
-        self._poll_thread.start()
+        try:
+            self._bus.attach(self)
+        except ValueError as e:
+            self.set_error(str(e))
+            return False
+        self._attached = True
 
         self.status = ReaderStatus.READING
         return True
 
     def stop(self) -> bool:
-        """Stop polling and close serial port"""
-        self._running = False
-
-        if self._poll_thread and self._poll_thread.is_alive():
-            self._poll_thread.join(timeout=2.0)
-
-        if self._serial and self._serial.is_open:
-            try:
-                self._serial.close()
-            except Exception:
-                pass
+        """Stop polling and release the bus (closing the port if unused)"""
+        if self._bus:
+            if self._attached:
+                self._bus.detach(self)
+                self._attached = False
+            OSDPBus.release(self._bus)
+            self._bus = None
 
-        self._serial = None
         self._secure_channel_active = False
         self._session_key = None
 
@@ -234,48 +366,30 @@ class OSDPReader(BaseReader):
             'status': self.status.value,
             'error': self.error_message,
             'serial_port': self.serial_port,
-            'baud_rate': self.baud_rate,
+            'baud_rate': self._bus.baud_rate if self._bus else self.baud_rate,
             'address': self.address,
             'secure_channel': self._secure_channel_active,
             'encryption_configured': self._encryption_key is not None,
+            'bus': self._bus.get_device_stats(self) if self._bus else None,
         }
 
-    def _poll_loop(self):
-        """Main polling loop"""
-        while self._running:
-            try:
-                # Send POLL command
-                response = self._send_command(OSDPCommand.POLL)
-
-                if response:
-                    self._handle_response(response)
-
-            except Exception as e:
-                print(f"OSDP poll error: {e}")
-                pass
-
-            time.sleep(self.poll_interval)
-
     def _send_command(self, command: int, data: bytes = b'') -> Optional[OSDPPacket]:
-        """Send OSDP command and receive response"""
-        if not self._serial or not self._serial.is_open:
+        """Send OSDP command over the shared bus and receive response"""
+        if not self._bus:
             return None
+        return self._bus.transact(self, command, data)
 
-        # Build packet
-        packet = self._build_packet(command, data)
+    def _advance_sequence(self):
+        """Move to the next sequence number once the PD has replied.
 
-        # Send packet
-        self._serial.write(packet)
-        self._serial.flush()
-
-        # Read response
-        return self._read_response()
+        A command that got no reply is resent with the same sequence number,
+        so the PD can recognise the retry."""
+        self._sequence = (self._sequence + 1) & 0x03
 
     def _build_packet(self, command: int, data: bytes = b'') -> bytes:
         """Build OSDP packet"""
         # Control byte: sequence number in lower 2 bits
         control = self._sequence & 0x03
-        self._sequence = (self._sequence + 1) & 0x03
 
         # Length includes: SOM, addr, len_lsb, len_msb, control, command, data, check_lsb, check_msb
         length = 6 + len(data) + 2  # header + data + checksum
@@ -297,60 +411,39 @@ class OSDPReader(BaseReader):
 
         return bytes(packet)
 
-    def _read_response(self) -> Optional[OSDPPacket]:
-        """Read and parse OSDP response"""
-        # Read SOM
-        som = self._serial.read(1)
-        if not som or som[0] != self.SOM:
-            return None
-
-        # Read address and length
-        header = self._serial.read(3)
-        if len(header) < 3:
-            return None
-
-        address = header[0]
-        length = header[1] | (header[2] << 8)
-
-        # Read rest of packet
-        remaining = length - 4  # Already read SOM + addr + 2 length bytes
-        rest = self._serial.read(remaining)
-        if len(rest) < remaining:
-            return None
-
-        control = rest[0]
-        command = rest[1]
-        data = rest[2:-2] if len(rest) > 4 else b''
-        checksum = rest[-2] | (rest[-1] << 8)
-
-        # Verify checksum
-        full_packet = bytearray([self.SOM, address, length & 0xFF, (length >> 8) & 0xFF])
-        full_packet.extend(rest[:-2])
-        calc_crc = self._calculate_crc(full_packet)
-
-        if checksum != calc_crc:
-            return None
-
-        return OSDPPacket(
-            address=address,
-            length=length,
-            control=control,
-            command=command,
-            data=bytes(data),
-            checksum=checksum,
-            is_secure=bool(control & 0x04)
-        )
-
-    def _calculate_crc(self, data: bytes) -> int:
-        """Calculate CRC-16 checksum"""
-        crc = 0x0000
+    def _read_response(self, port) -> Optional[OSDPPacket]:
+        """
+        Read and parse OSDP response from the bus serial port.
+
+        Reads exactly as many bytes as the parser still needs, so a reply is
+        returned the moment its last byte arrives. The port's timeout bounds
+        the wait for the reply to start and its inter_byte_timeout bounds
+        gaps inside it; the overall deadline stops a noisy line from holding
+        the bus.
+        """
+        parser = OSDPFrameParser(self._calculate_crc)
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            chunk = port.read(parser.bytes_needed())
+            if not chunk:
+                return None
+            packet = parser.feed(chunk)
+            if packet is not None:
+                return packet
+            if time.monotonic() > deadline:
+                return None
+
+    def _calculate_crc(self, data: bytes, crc: int = 0x0000) -> int:
+        """
+        Calculate CRC-16 checksum.
+
+        Pass a previous result as crc to continue a checksum across several
+        buffers. Produces the same values as the bit-by-bit loop.
+        """
+        table = self.CRC_TABLE
         for byte in data:
-            crc ^= byte
-            for _ in range(8):
-                if crc & 0x0001:
-                    crc = (crc >> 1) ^ self.POLY
-                else:
-                    crc >>= 1
+            crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
         return crc
 
     def _handle_response(self, packet: OSDPPacket):
@@ -455,36 +548,61 @@ class OSDPReader(BaseReader):
         )
         self.report_card(card_read)
 
-    def set_led(self, reader_num: int, led_num: int, color: int,
-                on_time: int = 0, off_time: int = 0, count: int = 0) -> bool:
-        """Set LED state on reader"""
-        # LED command data format
-        data = bytes([
+    def feedback(self, event: str) -> bool:
+        """
+        Queue grant/deny/held feedback for this reader's LED and buzzer.
+
+        The commands are sent by the bus thread in this PD's next poll slots
+        instead of a POLL, so they add no extra exchanges and the caller never
+        waits for the RS-485 round trip.
+        """
+        pattern = self.FEEDBACK_PATTERNS.get(event)
+        if not self.feedback_enabled or pattern is None or not self._bus or not self._attached:
+            return False
+
+        color, on_time, off_time, timer, beeps, beep_on, beep_off = pattern
+        commands = [(OSDPCommand.LED, self._led_data(self.reader_number, 0, color,
+                                                     on_time, off_time, timer))]
+        if self.feedback_buzzer and beeps:
+            commands.append((OSDPCommand.BUZ, self._buzzer_data(self.reader_number, 2,
+                                                                beep_on, beep_off, beeps)))
+        return self._bus.queue_commands(self, commands)
+
+    @staticmethod
+    def _led_data(reader_num: int, led_num: int, color: int,
+                  on_time: int, off_time: int, timer: int) -> bytes:
+        """One osdp_LED record: a temporary state for timer x 100 ms, permanent state unchanged"""
+        timer = max(0, min(0xFFFF, timer))
+        return bytes([
             reader_num,
             led_num,
-            0,  # Control code: temporary
+            0x02,  # Temporary control code: set state and start timer
             on_time,
             off_time,
             color,  # On color
-            0,  # Off color
-            count,
-            0  # Padding
+            OSDPColor.BLACK,  # Off color
+            timer & 0xFF,
+            timer >> 8,
+            0x00,  # Permanent control code: no change
+            0, 0, 0, 0
         ])
 
+    @staticmethod
+    def _buzzer_data(reader_num: int, tone: int, on_time: int,
+                     off_time: int = 0, count: int = 1) -> bytes:
+        """osdp_BUZ data (tone 2 = default tone, 1 = off)"""
+        return bytes([reader_num, tone, on_time, off_time, count])
+
+    def set_led(self, reader_num: int, led_num: int, color: int,
+                on_time: int = 0, off_time: int = 0, timer: int = 0) -> bool:
+        """Set a temporary LED state on the reader and wait for the PD's reply"""
+        data = self._led_data(reader_num, led_num, color, on_time, off_time, timer)
         response = self._send_command(OSDPCommand.LED, data)
         return response is not None and response.command == OSDPReply.ACK
 
     def set_buzzer(self, reader_num: int, tone: int, on_time: int,
                    off_time: int = 0, count: int = 1) -> bool:
-        """Set buzzer state on reader"""
-        data = bytes([
-            reader_num,
-            0,  # Control code: temporary
-            tone,
-            on_time,
-            off_time,
-            count
-        ])
-
+        """Sound the reader buzzer and wait for the PD's reply"""
+        data = self._buzzer_data(reader_num, tone, on_time, off_time, count)
         response = self._send_command(OSDPCommand.BUZ, data)
         return response is not None and response.command == OSDPReply.ACK
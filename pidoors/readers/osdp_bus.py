@@ -0,0 +1,606 @@
+"""
+OSDP Multi-Drop Bus Master
+PiDoors Access Control System
+
+RS-485 is a shared, half-duplex bus: only one command/reply exchange can be
+in flight at a time. OSDPBus owns the serial port and schedules POLLs for
+every OSDPReader (PD address) configured on that port from a single thread,
+so several readers can share one port without colliding.
+
+Scheduling:
+- Each device has a due time; the bus always polls the most overdue device,
+  which gives round-robin order when all devices share the same interval.
+- Poll intervals adapt per device: right after card/keypad activity a
+  device is polled every min_poll_interval, and each idle reply backs the
+  interval off by IDLE_BACKOFF until it is back at poll_interval. Idle bus
+  utilisation is unchanged while follow-up reads are picked up quickly.
+  Recently active devices also win ties.
+- A device that misses offline_after consecutive replies is marked offline
+  and only re-polled every offline_retry seconds until it answers again.
+- Queued output commands (LED/buzzer access feedback) make their device due
+  at once and are sent in its next slots in place of a POLL.
+
+Link speed:
+- When any reader sets max_baud_rate above the configured baud_rate, the
+  bus uses osdp_COMSET to step every PD up to the highest standard rate
+  they all accept, verifies the new rate with POLLs and falls back to the
+  previous rate if verification fails.
+- The negotiated rate is persisted per serial port so the next start opens
+  the port at that rate directly. PDs found at an unexpected rate (e.g.
+  after a PD power cycle reset it) are located by scanning the standard
+  rates and moved back to the bus rate. This runs when a new address is
+  attached; a reader re-attached by a reset is only polled at the bus rate.
+
+Requires: pyserial
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Any, Optional, List, Set, Tuple, TYPE_CHECKING
+
+try:
+    import serial
+    SERIAL_AVAILABLE = True
+except ImportError:
+    SERIAL_AVAILABLE = False
+
+from .base import ReaderStatus
+
+if TYPE_CHECKING:
+    from .osdp import OSDPReader, OSDPPacket
+
+
+class _BusDevice:
+    """Per-PD scheduling state and poll statistics"""
+
+    def __init__(self, reader: "OSDPReader"):
+        self.reader = reader
+        self.next_due: float = 0
+        self.interval: float = reader.poll_interval
+        self.last_activity: float = 0
+        self.online: bool = True
+        self.missed: int = 0
+        self.pending: List[Tuple[int, bytes]] = []  # Queued commands sent instead of POLLs
+
+        # Statistics
+        self.polls: int = 0
+        self.replies: int = 0
+        self.timeouts: int = 0
+        self.last_latency: Optional[float] = None
+        self.avg_latency: Optional[float] = None
+        self.max_latency: float = 0.0
+        self.commands_sent: int = 0
+        self.commands_failed: int = 0
+
+    def record_reply(self, latency: float):
+        self.replies += 1
+        self.last_latency = latency
+        # Exponentially weighted moving average, weight 1/8
+        if self.avg_latency is None:
+            self.avg_latency = latency
+        else:
+            self.avg_latency += (latency - self.avg_latency) / 8
+        if latency > self.max_latency:
+            self.max_latency = latency
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'address': self.reader.address,
+            'online': self.online,
+            'poll_interval_ms': round(self.interval * 1000, 1),
+            'polls': self.polls,
+            'replies': self.replies,
+            'timeouts': self.timeouts,
+            'last_latency_ms': round(self.last_latency * 1000, 2) if self.last_latency is not None else None,
+            'avg_latency_ms': round(self.avg_latency * 1000, 2) if self.avg_latency is not None else None,
+            'max_latency_ms': round(self.max_latency * 1000, 2),
+            'commands_sent': self.commands_sent,
+            'commands_failed': self.commands_failed,
+        }
+
+
+class OSDPBus:
+    """
+    Bus master for one RS-485 serial port.
+
+    Buses are shared per port: use OSDPBus.acquire() to get (or open) the bus
+    for a port and OSDPBus.release() when a reader is done with it. The port
+    is closed when the last reader releases it.
+    """
+
+    IDLE_BACKOFF = 1.5  # Poll-interval growth per idle reply after activity
+
+    STANDARD_BAUD_RATES = (9600, 19200, 38400, 57600, 115200, 230400)
+    LINK_VERIFY_POLLS = 3       # Consecutive POLL replies needed to accept a rate
+    LINK_CHECK_DELAY = 0.25     # Seconds after the last attach before negotiating
+    POLL_RATE_WINDOW = 10.0     # Seconds over which the achieved poll rate is measured
+    DEFAULT_LINK_STATE_FILE = os.path.join(
+        os.environ.get('PIDOORS_DIR', '/opt/pidoors'), 'cache', 'osdp_links.json')
+
+    _buses: Dict[str, "OSDPBus"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, serial_port: str, baud_rate: int, link_state_file: Optional[str] = None):
+        self.serial_port = serial_port
+        self.configured_baud_rate = baud_rate
+        self.link_state_file = link_state_file or self.DEFAULT_LINK_STATE_FILE
+        # Current bus rate: the persisted negotiated rate if there is one
+        self.baud_rate = self._load_link_state().get(serial_port, baud_rate)
+
+        self._link_check_due: float = 0
+        self._seen_addresses: Set[int] = set()  # Addresses attached since the bus opened
+        self._poll_rate: Optional[float] = None
+        self._rate_polls: int = 0
+        self._rate_start: float = time.monotonic()
+        self._report_poll_rate: bool = False
+
+        self._serial = None
+        self._devices: Dict[int, _BusDevice] = {}
+        self._users: int = 0
+        self._io_lock = threading.Lock()
+        self._devices_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running: bool = False
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Shared bus registry
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def acquire(cls, serial_port: str, baud_rate: int,
+                link_state_file: Optional[str] = None) -> "OSDPBus":
+        """
+        Get the bus for a serial port, opening the port on first use.
+
+        Raises:
+            ValueError: If the port is already configured for a different baud rate
+            Exception: If the serial port cannot be opened
+        """
+        with cls._registry_lock:
+            bus = cls._buses.get(serial_port)
+            if bus is None:
+                bus = cls(serial_port, baud_rate, link_state_file)
+                bus._open()
+                cls._buses[serial_port] = bus
+            elif bus.configured_baud_rate != baud_rate:
+                raise ValueError(f"{serial_port} is already configured for "
+                                 f"{bus.configured_baud_rate} baud (requested {baud_rate})")
+            bus._users += 1
+            return bus
+
+    @classmethod
+    def release(cls, bus: "OSDPBus"):
+        """Drop one user of a bus; close it when no readers remain"""
+        with cls._registry_lock:
+            bus._users -= 1
+            if bus._users > 0:
+                return
+            cls._buses.pop(bus.serial_port, None)
+        bus._close()
+
+    # ------------------------------------------------------------------
+    # Device management
+    # ------------------------------------------------------------------
+
+    def attach(self, reader: "OSDPReader"):
+        """Add a reader (PD) to the poll schedule and start the bus thread"""
+        with self._devices_lock:
+            if reader.address in self._devices:
+                raise ValueError(f"OSDP address {reader.address} already in use on {self.serial_port}")
+            self._devices[reader.address] = _BusDevice(reader)
+            new_address = reader.address not in self._seen_addresses
+            self._seen_addresses.add(reader.address)
+
+        # Negotiate for a new address only; coalesce back-to-back attaches into
+        # one link check. A re-attach (a supervisor reset) just polls the PD at
+        # the current rate and, if it stays silent, falls to the offline retry
+        # schedule, so a dead PD does not hold the port on every reset
+        if new_address:
+            self._link_check_due = time.monotonic() + self.LINK_CHECK_DELAY
+
+        if not self._running:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name=f"osdp-bus-{self.serial_port}",
+                                            daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def detach(self, reader: "OSDPReader"):
+        """Remove a reader from the poll schedule; stop the thread when empty"""
+        with self._devices_lock:
+            device = self._devices.get(reader.address)
+            if device is not None and device.reader is reader:
+                del self._devices[reader.address]
+            empty = not self._devices
+
+        if empty and self._running:
+            self._running = False
+            self._wake.set()
+            if self._thread and self._thread is not threading.current_thread():
+                self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def queue_commands(self, reader: "OSDPReader", commands: List[Tuple[int, bytes]]) -> bool:
+        """
+        Queue commands for a PD to be sent by the bus thread in its next poll
+        slots. Commands still waiting from an earlier call are replaced, so
+        feedback for a superseded decision is never shown.
+
+        Returns:
+            False if the PD is not attached or is offline
+        """
+        with self._devices_lock:
+            device = self._devices.get(reader.address)
+            if device is None or device.reader is not reader or not device.online:
+                return False
+            device.pending = list(commands)
+            device.next_due = min(device.next_due, time.monotonic())
+        self._wake.set()
+        return True
+
+    def get_device_stats(self, reader: "OSDPReader") -> Optional[Dict[str, Any]]:
+        """Poll latency statistics for one reader"""
+        with self._devices_lock:
+            device = self._devices.get(reader.address)
+        return device.get_stats() if device else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Bus-wide status with per-PD poll latency statistics"""
+        with self._devices_lock:
+            devices = list(self._devices.values())
+        return {
+            'serial_port': self.serial_port,
+            'baud_rate': self.baud_rate,
+            'configured_baud_rate': self.configured_baud_rate,
+            'poll_rate': round(self._poll_rate, 1) if self._poll_rate is not None else None,
+            'devices': {d.reader.name: d.get_stats() for d in devices},
+        }
+
+    # ------------------------------------------------------------------
+    # I/O
+    # ------------------------------------------------------------------
+
+    def transact(self, reader: "OSDPReader", command: int,
+                 data: bytes = b'') -> Optional["OSDPPacket"]:
+        """
+        Send one command to a PD and wait for its reply.
+
+        The bus lock makes this safe to call from any thread (e.g. LED or
+        buzzer commands from the access decision) alongside the poll loop.
+        """
+        with self._io_lock:
+            if not self._serial or not self._serial.is_open:
+                return None
+
+            # Only touch the port settings when they change (each set is a tcsetattr)
+            if self._serial.timeout != reader.timeout:
+                self._serial.timeout = reader.timeout
+            if self._serial.inter_byte_timeout != reader.inter_byte_timeout:
+                self._serial.inter_byte_timeout = reader.inter_byte_timeout
+
+            packet = reader._build_packet(command, data)
+            self._serial.reset_input_buffer()
+            self._serial.write(packet)
+            self._serial.flush()
+
+            reply = reader._read_response(self._serial)
+
+        # Replies come from the PD address with the reply bit (0x80) set
+        if reply is not None and (reply.address & 0x7F) != reader.address:
+            return None
+        if reply is not None:
+            reader._advance_sequence()
+        return reply
+
+    def _open(self):
+        if not SERIAL_AVAILABLE:
+            raise RuntimeError("pyserial not available - install with: pip install pyserial")
+        self._serial = serial.Serial(
+            port=self.serial_port,
+            baudrate=self.baud_rate,
+            bytesize=serial.EIGHTBITS,
+            parity=serial.PARITY_NONE,
+            stopbits=serial.STOPBITS_ONE,
+            timeout=0.5
+        )
+        self._serial.reset_input_buffer()
+        self._serial.reset_output_buffer()
+
+    def _set_port_baud(self, baud_rate: int):
+        """Change the serial port speed (does not change the bus rate)"""
+        with self._io_lock:
+            if self._serial and self._serial.baudrate != baud_rate:
+                self._serial.baudrate = baud_rate
+                self._serial.reset_input_buffer()
+
+    def _close(self):
+        self._running = False
+        self._wake.set()
+        with self._io_lock:
+            if self._serial and self._serial.is_open:
+                try:
+                    self._serial.close()
+                except Exception:
+                    pass
+            self._serial = None
+
+    # ------------------------------------------------------------------
+    # Link speed negotiation (osdp_COMSET)
+    # ------------------------------------------------------------------
+
+    def _load_link_state(self) -> Dict[str, int]:
+        """Negotiated rates by serial port"""
+        try:
+            with open(self.link_state_file, 'r') as f:
+                data = json.load(f)
+            return {k: int(v) for k, v in data.items()}
+        except (OSError, ValueError, TypeError, AttributeError):
+            return {}
+
+    def _save_link_state(self):
+        """Persist the current bus rate atomically (temp file + os.replace)"""
+        state = self._load_link_state()
+        if self.baud_rate == self.configured_baud_rate:
+            state.pop(self.serial_port, None)
+        else:
+            state[self.serial_port] = self.baud_rate
+        dir_name = os.path.dirname(self.link_state_file) or '.'
+        try:
+            os.makedirs(dir_name, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', dir=dir_name)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(state, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.link_state_file)
+        except OSError as e:
+            print(f"OSDP bus {self.serial_port}: could not save link state: {e}")
+
+    def _probe(self, reader: "OSDPReader") -> bool:
+        """True if the PD answers LINK_VERIFY_POLLS POLLs in a row at the current port rate"""
+        from .osdp import OSDPCommand
+
+        for _ in range(self.LINK_VERIFY_POLLS):
+            if self.transact(reader, OSDPCommand.POLL) is None:
+                return False
+        return True
+
+    def _comset(self, reader: "OSDPReader", baud_rate: int) -> bool:
+        """Ask a PD to switch to baud_rate; True if its osdp_COM reply confirms it"""
+        from .osdp import OSDPCommand, OSDPReply
+
+        data = bytes([reader.address]) + baud_rate.to_bytes(4, 'little')
+        reply = self.transact(reader, OSDPCommand.COMSET, data)
+        if reply is None or reply.command != OSDPReply.COM or len(reply.data) < 5:
+            return False
+        return int.from_bytes(reply.data[1:5], 'little') == baud_rate
+
+    def _discover(self, reader: "OSDPReader") -> bool:
+        """Find a PD that is not answering at the bus rate and move it back"""
+        from .osdp import OSDPCommand
+
+        try:
+            for rate in self.STANDARD_BAUD_RATES:
+                if rate == self.baud_rate:
+                    continue
+                self._set_port_baud(rate)
+                if self.transact(reader, OSDPCommand.POLL) is None:
+                    continue
+                if self._comset(reader, self.baud_rate):
+                    print(f"OSDP bus {self.serial_port}: address {reader.address} found at "
+                          f"{rate} baud, moved to {self.baud_rate}")
+                    break
+        finally:
+            self._set_port_baud(self.baud_rate)
+        return self._probe(reader)
+
+    def _switch_all(self, readers: List["OSDPReader"], target: int) -> bool:
+        """Move every PD to target; on any failure put them all back"""
+        previous = self.baud_rate
+
+        switched = []
+        for reader in readers:
+            if not self._comset(reader, target):
+                break
+            switched.append(reader)
+
+        if len(switched) == len(readers):
+            self._set_port_baud(target)
+            if all(self._probe(reader) for reader in readers):
+                self.baud_rate = target
+                return True
+
+        # Fall back: PDs that accepted the new rate are told to return
+        if switched:
+            self._set_port_baud(target)
+            for reader in switched:
+                self._comset(reader, previous)
+        self._set_port_baud(previous)
+        for reader in switched:
+            if not self._probe(reader):
+                self._discover(reader)
+        return False
+
+    def _negotiate(self):
+        """Bring every PD to the bus rate, then step the bus up or down to max_rate"""
+        with self._devices_lock:
+            readers = [d.reader for d in self._devices.values()]
+        if not readers:
+            return
+
+        max_rate = min(r.max_baud_rate for r in readers)
+        if max_rate <= self.configured_baud_rate and self.baud_rate == self.configured_baud_rate:
+            return  # Negotiation not enabled for this bus
+
+        reachable = [r for r in readers if self._probe(r) or self._discover(r)]
+        if not reachable:
+            return
+
+        previous = self.baud_rate
+        if self.baud_rate > max_rate:
+            # A saved rate above a lowered max_baud_rate or a new PD's limit
+            self._step_down(readers, reachable, max_rate)
+        else:
+            for target in sorted(self.STANDARD_BAUD_RATES, reverse=True):
+                if target <= self.baud_rate:
+                    break
+                if target > max_rate:
+                    continue
+                if self._switch_all(reachable, target):
+                    break
+
+        if self.baud_rate != previous:
+            print(f"OSDP bus {self.serial_port}: link at {self.baud_rate} baud (was {previous})")
+            self._report_poll_rate = True
+        self._save_link_state()
+
+    def _step_down(self, readers: List["OSDPReader"], reachable: List["OSDPReader"], max_rate: int):
+        """Move the bus to the highest standard rate <= max_rate"""
+        for target in sorted(self.STANDARD_BAUD_RATES, reverse=True):
+            if target > max_rate:
+                continue
+            if self._switch_all(reachable, target):
+                break
+        else:
+            # No PD took a lower rate: forget the saved one and find each
+            # PD from the configured rate
+            self.baud_rate = self.configured_baud_rate
+            self._set_port_baud(self.baud_rate)
+
+        # PDs that could not follow the old rate are moved to the new one
+        for reader in readers:
+            if reader not in reachable and not self._probe(reader):
+                self._discover(reader)
+
+    def _update_poll_rate(self, now: float):
+        """Measure the achieved bus-wide poll rate over POLL_RATE_WINDOW"""
+        self._rate_polls += 1
+        elapsed = now - self._rate_start
+        if elapsed >= self.POLL_RATE_WINDOW:
+            self._poll_rate = self._rate_polls / elapsed
+            self._rate_polls = 0
+            self._rate_start = now
+            if self._report_poll_rate:
+                self._report_poll_rate = False
+                print(f"OSDP bus {self.serial_port}: {self._poll_rate:.1f} polls/s "
+                      f"at {self.baud_rate} baud")
+
+    # ------------------------------------------------------------------
+    # Scheduler
+    # ------------------------------------------------------------------
+
+    def _next_device(self, now: float) -> Optional[_BusDevice]:
+        """Pick the most overdue device; recent activity wins ties"""
+        with self._devices_lock:
+            devices: List[_BusDevice] = list(self._devices.values())
+        if not devices:
+            return None
+        return min(devices, key=lambda d: (d.next_due, -d.last_activity))
+
+    def _send_pending(self, device: _BusDevice):
+        """Send one queued command in place of this device's POLL"""
+        from .osdp import OSDPReply
+
+        reader = device.reader
+        with self._devices_lock:
+            if not device.pending:
+                return
+            command, data = device.pending.pop(0)
+            more = bool(device.pending)
+
+        try:
+            reply = self.transact(reader, command, data)
+        except Exception as e:
+            print(f"OSDP bus {self.serial_port} error: {e}")
+            reply = None
+        done = time.monotonic()
+
+        if reply is not None and reply.command == OSDPReply.ACK:
+            device.commands_sent += 1
+        else:
+            device.commands_failed += 1
+
+        # The exchange used this device's slot; the displaced POLL follows on
+        # the normal schedule once the queue is drained
+        device.next_due = done if more else done + device.interval
+
+    def _run(self):
+        """Bus poll loop"""
+        from .osdp import OSDPCommand, OSDPReply
+
+        while self._running:
+            now = time.monotonic()
+
+            if self._link_check_due and now >= self._link_check_due:
+                self._link_check_due = 0
+                try:
+                    self._negotiate()
+                except Exception as e:
+                    print(f"OSDP bus {self.serial_port} link negotiation error: {e}")
+                self._rate_polls = 0
+                self._rate_start = time.monotonic()
+                continue
+
+            device = self._next_device(now)
+            if device is None:
+                self._wake.wait(0.5)
+                self._wake.clear()
+                continue
+
+            if device.next_due > now:
+                self._wake.wait(device.next_due - now)
+                self._wake.clear()
+                continue
+
+            reader = device.reader
+
+            if device.pending:
+                self._send_pending(device)
+                continue
+
+            device.polls += 1
+            start = time.monotonic()
+            try:
+                reply = self.transact(reader, OSDPCommand.POLL)
+            except Exception as e:
+                print(f"OSDP bus {self.serial_port} error: {e}")
+                reply = None
+            done = time.monotonic()
+            self._update_poll_rate(done)
+
+            if reply is None:
+                reader.record_failure(f"No reply from OSDP address {reader.address}")
+                device.timeouts += 1
+                device.missed += 1
+                if device.online and device.missed >= reader.offline_after:
+                    device.online = False
+                    reader.set_error(f"No reply from OSDP address {reader.address} "
+                                     f"({device.missed} polls)")
+            else:
+                reader.record_success()
+                device.record_reply(done - start)
+                device.missed = 0
+                if not device.online:
+                    device.online = True
+                    reader.clear_error()
+                    reader.status = ReaderStatus.READING
+                if reply.command not in (OSDPReply.ACK, OSDPReply.NAK):
+                    device.last_activity = done
+                    device.interval = reader.min_poll_interval
+                else:
+                    device.interval = min(reader.poll_interval, device.interval * self.IDLE_BACKOFF)
+                try:
+                    reader._handle_response(reply)
+                except Exception as e:
+                    print(f"OSDP reply handling error ({reader.name}): {e}")
+
+            if not device.online:
+                device.next_due = done + reader.offline_retry
+            elif device.pending:
+                device.next_due = done  # Feedback queued during this POLL
+            else:
+                device.next_due = done + device.interval
@@ -0,0 +1,210 @@
+"""
+Reader Supervisor
+PiDoors Access Control System
+
+Watches every reader owned by the CardDispatcher and brings wedged ones
+back without a service restart. Drivers count consecutive hardware
+failures (missed OSDP replies, unacknowledged PN532 commands, MFRC522
+command timeouts, bus I/O errors); once a reader crosses max_failures, or
+sits in the ERROR state, the supervisor hard-resets it (stop, close the
+device, initialize and start again). Failed resets are retried with
+exponential backoff so a reader that is physically gone does not thrash
+its bus.
+
+Each reader moves through:
+    ok -> failed -> resetting -> recovering -> ok
+                        ^             |
+                        +-- backoff <-+   (still failing)
+
+Transitions and the time from first failure to recovery are kept for the
+controller heartbeat.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Callable
+
+from .base import BaseReader, ReaderStatus
+
+
+class _ReaderHealth:
+    """Supervisor state for one reader"""
+
+    def __init__(self, backoff: float):
+        self.state: str = 'ok'
+        self.since: float = time.time()
+        self.failed_since: Optional[float] = None
+        self.next_reset: float = 0
+        self.reset_at: float = 0
+        self.backoff: float = backoff
+        self.resets: int = 0
+        self.outage_resets: int = 0
+        self.recoveries: int = 0
+        self.last_recovery_s: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.transitions: "deque[Dict[str, Any]]" = deque(maxlen=ReaderSupervisor.HISTORY)
+
+
+class ReaderSupervisor:
+    """
+    Reset readers that stop working, with exponential backoff.
+
+    Usage:
+        supervisor = ReaderSupervisor(dispatcher.readers, on_event=print)
+        supervisor.start()
+    """
+
+    CHECK_INTERVAL = 0.5   # Seconds between health checks
+    MAX_FAILURES = 5       # Consecutive failures before a reset
+    BACKOFF = 1.0          # First retry delay after a reset that did not help
+    MAX_BACKOFF = 60.0     # Retry delay ceiling
+    HISTORY = 10           # Transitions kept per reader
+    RECOVERY_GRACE = 10.0  # Failure-free seconds after a reset that count as recovered
+                           # for readers that report no successes (e.g. Wiegand)
+
+    def __init__(self, readers: Dict[str, BaseReader],
+                 on_event: Optional[Callable[[str], None]] = None,
+                 max_failures: int = MAX_FAILURES,
+                 backoff: float = BACKOFF,
+                 max_backoff: float = MAX_BACKOFF):
+        """
+        Args:
+            readers: Readers by name (the dict is read on every check, so
+                     readers added later are picked up)
+            on_event: Optional logger for state transitions and resets
+            max_failures: Consecutive failures that trigger a reset
+            backoff: Initial delay between resets of a reader that stays down
+            max_backoff: Longest delay between resets
+        """
+        self.readers = readers
+        self.on_event = on_event
+        self.max_failures = max(1, int(max_failures))
+        self.initial_backoff = max(0.1, float(backoff))
+        self.max_backoff = max(self.initial_backoff, float(max_backoff))
+
+        self._health: Dict[str, _ReaderHealth] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the supervisor thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="reader-supervisor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the supervisor thread (readers are left as they are)"""
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """Per-reader supervisor state, reset counts and recent transitions"""
+        with self._lock:
+            return {
+                name: {
+                    'state': health.state,
+                    'since': round(health.since, 3),
+                    'resets': health.resets,
+                    'recoveries': health.recoveries,
+                    'last_recovery_s': health.last_recovery_s,
+                    'backoff_s': health.backoff if health.state != 'ok' else None,
+                    'last_error': health.last_error,
+                    'transitions': list(health.transitions),
+                }
+                for name, health in self._health.items()
+            }
+
+    def check(self, now: Optional[float] = None):
+        """Run one health check over every reader (called by the thread)"""
+        for name, reader in list(self.readers.items()):
+            try:
+                self._check_reader(name, reader, time.monotonic() if now is None else now)
+            except Exception as e:
+                self._event(f"Reader supervisor error ({name}): {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.CHECK_INTERVAL):
+            self.check()
+
+    def _check_reader(self, name: str, reader: BaseReader, now: float):
+        status = reader.status
+        if status in (ReaderStatus.UNINITIALIZED, ReaderStatus.STOPPED):
+            return  # Not started (or stopped on purpose): nothing to supervise
+
+        with self._lock:
+            health = self._health.get(name)
+            if health is None:
+                health = self._health[name] = _ReaderHealth(self.initial_backoff)
+
+        failing = (status == ReaderStatus.ERROR
+                   or reader.consecutive_failures >= self.max_failures)
+
+        if not failing:
+            if health.state == 'recovering':
+                # Back only once it has worked since the reset (or stayed clean
+                # for RECOVERY_GRACE); a dead PD takes a few polls to fail again
+                if (reader.last_success <= health.reset_at
+                        and (reader.consecutive_failures or now - health.reset_at < self.RECOVERY_GRACE)):
+                    return
+            if health.state in ('failed', 'recovering'):
+                recovery = time.time() - health.failed_since if health.failed_since else None
+                health.recoveries += 1
+                health.last_recovery_s = round(recovery, 2) if recovery is not None else None
+                health.failed_since = None
+                health.backoff = self.initial_backoff
+                self._transition(name, health, 'ok',
+                                 f"recovered in {health.last_recovery_s}s after {health.outage_resets} reset(s)")
+            return
+
+        if health.state == 'ok':
+            health.failed_since = time.time()
+            health.outage_resets = 0
+            health.next_reset = now
+            health.last_error = reader.error_message or reader.last_failure
+            self._transition(name, health, 'failed', health.last_error)
+
+        if now < health.next_reset:
+            return
+
+        self._transition(name, health, 'resetting', f"attempt {health.outage_resets + 1}")
+        health.resets += 1
+        health.outage_resets += 1
+        try:
+            started = reader.reset()
+        except Exception as e:
+            started = False
+            reader.set_error(str(e))
+        health.reset_at = time.monotonic()
+        health.last_error = reader.error_message or reader.last_failure
+
+        # Whether or not it came back, wait before the next attempt; the
+        # reader must get through a check cycle healthy to count as recovered
+        health.next_reset = now + health.backoff
+        health.backoff = min(health.backoff * 2, self.max_backoff)
+        self._transition(name, health, 'recovering' if started else 'failed',
+                         None if started else health.last_error)
+
+    def _transition(self, name: str, health: _ReaderHealth, state: str, detail: Optional[str]):
+        previous = health.state
+        health.state = state
+        health.since = time.time()
+        with self._lock:
+            health.transitions.append({
+                'time': round(health.since, 3),
+                'from': previous,
+                'to': state,
+                'detail': detail,
+            })
+        self._event(f"Reader {name}: {previous} -> {state}" + (f" ({detail})" if detail else ""))
+
+    def _event(self, message: str):
+        if self.on_event:
+            self.on_event(message)
+        else:
+            print(message)
@@ -0,0 +1,849 @@
+"""
+Reader Trace Recording and Replay
+PiDoors Access Control System
+
+Records what a reader sees on the wire - Wiegand and IRQ GPIO edges, OSDP
+serial bytes, NFC SPI and I2C transactions - to a compact trace file, and
+replays a trace into the unmodified reader drivers through stand-ins for
+RPi.GPIO, pyserial, spidev and smbus2 (in the style of docker/mock_gpio.py).
+Replays run in real time or as fast as the driver consumes them, so decode
+throughput and latency can be measured on a laptop without hardware.
+
+Trace format (gzip-compressed when the file name ends in .gz): the first
+line is a JSON header {"trace": 1, "name": ..., "config": {...}}, every
+following line one JSON event starting with its offset in microseconds:
+
+    [t, "g", pin]                   GPIO falling edge        device -> host
+    [t, "r", hex]                   Serial bytes received    device -> host
+    [t, "w", hex]                   Serial bytes written     host -> device
+    [t, "x", out_hex, in_hex]       SPI transfer             host -> device
+    [t, "i", op, req_hex, resp]     I2C operation (resp is null if it raised)
+    [t, "end"]                      Recording stopped; the driver's shutdown follows
+
+Host events are matched against what the driver actually does; the next
+identical request within a short look-ahead is used, so a driver that polls
+a status register a different number of times stays in step. Device events
+are delivered once every host event recorded before them has happened,
+after the recorded delay (real time) or immediately (max speed). Polled
+readers (OSDP, NFC) still pace themselves; lower their poll_interval with
+--set to replay those faster.
+
+Usage (from the install directory, e.g. /opt/pidoors; stop the pidoors
+service before recording so the hardware is free):
+    python3 -m readers.trace record conf/config.json front_door -o front.trace.gz --seconds 60
+    python3 -m readers.trace replay front.trace.gz [--realtime] [--set timeout=0.01]
+    python3 -m readers.trace synth-wiegand 1000 -o cards.trace.gz
+"""
+
+import argparse
+import bisect
+import gzip
+import importlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .base import CardRead
+
+TRACE_VERSION = 1
+
+# Event kinds started by the device rather than the driver
+DEVICE_EVENTS = ('g', 'r')
+
+# How far ahead a driver request is matched against the recording
+LOOKAHEAD = 64
+
+# Hardware library attribute -> availability flag in the driver modules
+_BACKENDS = {
+    'GPIO': 'GPIO_AVAILABLE',
+    'serial': 'SERIAL_AVAILABLE',
+    'spidev': 'SPI_AVAILABLE',
+    'smbus2': 'I2C_AVAILABLE',
+}
+_DRIVER_MODULES = ('wiegand', 'osdp', 'osdp_bus', 'nfc_pn532', 'nfc_mfrc522')
+
+_MISSING = object()
+
+
+# ----------------------------------------------------------------------
+# Trace files
+# ----------------------------------------------------------------------
+
+def _open_trace(path: str, mode: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def load_trace(path: str) -> Tuple[Dict[str, Any], List[list]]:
+    """Load a trace file; returns (header, events)"""
+    with _open_trace(path, 'r') as f:
+        header = json.loads(f.readline())
+        if header.get('trace') != TRACE_VERSION:
+            raise ValueError(f"{path}: not a version {TRACE_VERSION} reader trace")
+        events = [json.loads(line) for line in f if line.strip()]
+    return header, events
+
+
+def save_trace(path: str, header: Dict[str, Any], events: List[list]):
+    """Write a trace file"""
+    with _open_trace(path, 'w') as f:
+        f.write(json.dumps(header) + '\n')
+        for event in events:
+            f.write(json.dumps(event, separators=(',', ':')) + '\n')
+
+
+class _BackendPatch:
+    """Swap the hardware libraries seen by every reader driver module"""
+
+    def __init__(self, backends: Dict[str, Any]):
+        self.backends = backends
+        self._saved: List[tuple] = []
+
+    def install(self):
+        for name in _DRIVER_MODULES:
+            module = importlib.import_module(f'{__package__}.{name}')
+            for attr, flag in _BACKENDS.items():
+                if attr in self.backends and hasattr(module, flag):
+                    self._saved.append((module, attr, getattr(module, attr, _MISSING),
+                                        flag, getattr(module, flag)))
+                    setattr(module, attr, self.backends[attr])
+                    setattr(module, flag, True)
+
+    def uninstall(self):
+        for module, attr, value, flag, available in reversed(self._saved):
+            if value is _MISSING:
+                delattr(module, attr)
+            else:
+                setattr(module, attr, value)
+            setattr(module, flag, available)
+        self._saved = []
+
+
+def _msg_key(msg) -> bytes:
+    """I2C message request bytes: address, read flag, length, write data"""
+    is_read = msg.flags & 0x0001
+    data = b'' if is_read else bytes(list(msg))
+    return bytes([msg.addr, is_read, msg.len]) + data
+
+
+# ----------------------------------------------------------------------
+# Recording
+# ----------------------------------------------------------------------
+
+class TraceRecorder:
+    """
+    Collects events from recording wrappers around the real hardware
+    libraries.
+
+    Usage:
+        recorder = TraceRecorder("front_door", reader_config)
+        patch = recorder.install()
+        ...run the reader...
+        patch.uninstall()
+        recorder.save("front.trace.gz")
+    """
+
+    def __init__(self, name: str, config: Dict[str, Any]):
+        self.header = {'trace': TRACE_VERSION, 'name': name, 'config': config}
+        self.events: List[list] = []
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+
+    def add(self, kind: str, *fields):
+        t = int((time.monotonic() - self._start) * 1e6)
+        with self._lock:
+            self.events.append([t, kind, *fields])
+
+    def install(self) -> _BackendPatch:
+        """Wrap whichever hardware libraries are installed"""
+        backends: Dict[str, Any] = {}
+        wrappers = {
+            'GPIO': ('RPi.GPIO', _RecordingGPIO),
+            'serial': ('serial', _RecordingSerialModule),
+            'spidev': ('spidev', _RecordingSpidevModule),
+            'smbus2': ('smbus2', _RecordingSMBusModule),
+        }
+        for attr, (module_name, wrapper) in wrappers.items():
+            try:
+                backends[attr] = wrapper(importlib.import_module(module_name), self)
+            except ImportError:
+                pass
+
+        patch = _BackendPatch(backends)
+        patch.install()
+        return patch
+
+    def save(self, path: str):
+        with self._lock:
+            save_trace(path, self.header, self.events)
+
+
+class _Proxy:
+    """Forwards attribute access to the wrapped object"""
+
+    def __init__(self, target, recorder: TraceRecorder):
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_recorder', recorder)
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+
+class _RecordingGPIO(_Proxy):
+    def add_event_detect(self, channel, edge, callback=None, **kwargs):
+        recorder = self._recorder
+
+        def recorded(ch):
+            recorder.add('g', ch)
+            if callback:
+                callback(ch)
+
+        return self._target.add_event_detect(channel, edge, callback=recorded, **kwargs)
+
+
+class _RecordingSerialModule(_Proxy):
+    def Serial(self, *args, **kwargs):
+        return _RecordingPort(self._target.Serial(*args, **kwargs), self._recorder)
+
+
+class _RecordingPort(_Proxy):
+    def write(self, data):
+        self._recorder.add('w', bytes(data).hex())
+        return self._target.write(data)
+
+    def read(self, size=1):
+        data = self._target.read(size)
+        if data:
+            self._recorder.add('r', bytes(data).hex())
+        return data
+
+
+class _RecordingSpidevModule(_Proxy):
+    def SpiDev(self, *args, **kwargs):
+        return _RecordingSpi(self._target.SpiDev(*args, **kwargs), self._recorder)
+
+
+class _RecordingSpi(_Proxy):
+    def xfer(self, data, *args):
+        result = self._target.xfer(data, *args)
+        self._recorder.add('x', bytes(data).hex(), bytes(result).hex())
+        return result
+
+    def xfer2(self, data, *args):
+        result = self._target.xfer2(data, *args)
+        self._recorder.add('x', bytes(data).hex(), bytes(result).hex())
+        return result
+
+
+class _RecordingSMBusModule(_Proxy):
+    def SMBus(self, *args, **kwargs):
+        return _RecordingBus(self._target.SMBus(*args, **kwargs), self._recorder)
+
+
+class _RecordingBus(_Proxy):
+    def _call(self, op: str, req: bytes, fn, encode):
+        try:
+            result = fn()
+        except Exception:
+            self._recorder.add('i', op, req.hex(), None)
+            raise
+        self._recorder.add('i', op, req.hex(), encode(result))
+        return result
+
+    def write_byte(self, addr, value, *args):
+        return self._call('write_byte', bytes([addr, value]),
+                          lambda: self._target.write_byte(addr, value, *args), lambda r: '')
+
+    def write_i2c_block_data(self, addr, reg, data, *args):
+        return self._call('write_i2c_block_data', bytes([addr, reg]) + bytes(data),
+                          lambda: self._target.write_i2c_block_data(addr, reg, data, *args),
+                          lambda r: '')
+
+    def read_byte(self, addr, *args):
+        return self._call('read_byte', bytes([addr]),
+                          lambda: self._target.read_byte(addr, *args), lambda r: bytes([r]).hex())
+
+    def read_i2c_block_data(self, addr, reg, length, *args):
+        return self._call('read_i2c_block_data', bytes([addr, reg, length]),
+                          lambda: self._target.read_i2c_block_data(addr, reg, length, *args),
+                          lambda r: bytes(r).hex())
+
+    def i2c_rdwr(self, *msgs):
+        req = b''.join(_msg_key(m) for m in msgs)
+        return self._call('i2c_rdwr', req, lambda: self._target.i2c_rdwr(*msgs),
+                          lambda r: b''.join(bytes(list(m)) for m in msgs if m.flags & 0x0001).hex())
+
+
+# ----------------------------------------------------------------------
+# Replay
+# ----------------------------------------------------------------------
+
+class TraceReplayer:
+    """
+    Feeds a trace to reader drivers through replay backends.
+
+    Args:
+        events: Trace events
+        realtime: Deliver device events with their recorded delays
+        settle: At max speed, gaps longer than frame_gap (e.g. between two
+                Wiegand cards) are shortened to this instead of to zero,
+                so the driver still sees the end of each frame
+        frame_gap: Gap in seconds that separates frames
+    """
+
+    STALL_TIMEOUT = 2.0  # Driver stopped following the trace
+
+    def __init__(self, events: List[list], realtime: bool = False,
+                 settle: float = 0.0, frame_gap: float = 0.02):
+        self.events = events
+        self.realtime = realtime
+        self.settle = settle
+        self.frame_gap = frame_gap
+
+        self.calls = 0
+        self.mismatches = 0
+        self.event_times: List[float] = []
+
+        self._cursor = 0
+        self._end = next((i for i, e in enumerate(events) if e[1] == 'end'), len(events))
+        self._anchor: Tuple[int, float] = (0, 0.0)   # (recorded us, monotonic)
+        self._progress = 0.0
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._gpio = _ReplayGPIO()
+        self._ports: List['_ReplayPort'] = []
+
+    def install(self) -> _BackendPatch:
+        """Point every reader driver at the replay backends"""
+        patch = _BackendPatch({
+            'GPIO': self._gpio,
+            'serial': _ReplaySerialModule(self),
+            'spidev': _ReplaySpidevModule(self),
+            'smbus2': _ReplaySMBusModule(self),
+        })
+        patch.install()
+        return patch
+
+    @property
+    def finished(self) -> bool:
+        return self._cursor >= self._end
+
+    def start(self):
+        """Start delivering device events"""
+        now = time.monotonic()
+        with self._cond:
+            first = self.events[self._cursor][0] if not self.finished else 0
+            self._anchor = (first, now)
+            self._progress = now
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="trace-replay", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the trace is consumed, or the driver stops following it.
+
+        Returns:
+            True if every event was replayed
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self.finished:
+                now = time.monotonic()
+                if now - self._progress > self.STALL_TIMEOUT:
+                    return False
+                if deadline is not None and now >= deadline:
+                    return False
+                self._cond.wait(0.1)
+        return True
+
+    @property
+    def position(self) -> int:
+        return self._cursor
+
+    def call(self, kind: str, key: tuple) -> Optional[list]:
+        """
+        Match a driver request against the recording.
+
+        Returns:
+            The recorded event, or None if it is not in the look-ahead window
+        """
+        with self._cond:
+            self.calls += 1
+            self._gpio.deassert()
+
+            end = min(len(self.events), self._cursor + LOOKAHEAD)
+            for i in range(self._cursor, end):
+                event = self.events[i]
+                if event[1] == kind and tuple(event[2:2 + len(key)]) == key:
+                    break
+            else:
+                if not self.finished:
+                    self.mismatches += 1
+                return None
+
+            # Device events recorded before this request are overdue
+            overdue = [e for e in self.events[self._cursor:i] if e[1] in DEVICE_EVENTS]
+            now = time.monotonic()
+            self.event_times.append(now)
+            self._cursor = i + 1
+            self._anchor = (event[0], now)
+            self._progress = now
+            self._cond.notify_all()
+
+        for e in overdue:
+            self._deliver(e)
+        return event
+
+    def _due(self, event: list) -> float:
+        recorded, actual = self._anchor
+        gap = (event[0] - recorded) / 1e6
+        if not self.realtime:
+            gap = self.settle if gap > self.frame_gap else 0.0
+        return actual + gap
+
+    def _run(self):
+        while self._running:
+            with self._cond:
+                if self.finished:
+                    self._cond.wait(0.1)
+                    continue
+                event = self.events[self._cursor]
+                if event[1] not in DEVICE_EVENTS:
+                    # Waiting for the driver to make this request
+                    self._cond.wait(0.1)
+                    continue
+                due = self._due(event)
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                self._cursor += 1
+                self._anchor = (event[0], due if self.realtime else time.monotonic())
+                self._progress = time.monotonic()
+                self._cond.notify_all()
+            self._deliver(event)
+
+    def _deliver(self, event: list):
+        self.event_times.append(time.monotonic())
+        if event[1] == 'g':
+            self._gpio.fire(event[2])
+        else:
+            data = bytes.fromhex(event[2])
+            for port in self._ports:
+                port.feed(data)
+
+
+class _ReplayGPIO:
+    """RPi.GPIO stand-in (cf. docker/mock_gpio.py) whose edges come from the trace"""
+    BCM = 11
+    BOARD = 10
+    IN = 1
+    OUT = 0
+    FALLING = 32
+    RISING = 31
+    BOTH = 33
+    PUD_UP = 22
+    PUD_DOWN = 21
+    PUD_OFF = 20
+    HIGH = 1
+    LOW = 0
+
+    def __init__(self):
+        self._callbacks: Dict[int, Any] = {}
+        self._asserted = set()
+
+    def setmode(self, mode): pass
+    def setwarnings(self, flag): pass
+    def setup(self, channel, direction, pull_up_down=None, initial=None): pass
+    def output(self, channel, value): pass
+    def cleanup(self, channel=None): pass
+
+    def input(self, channel):
+        # An IRQ line stays low after its edge until the driver next talks to the chip
+        return self.LOW if channel in self._asserted else self.HIGH
+
+    def add_event_detect(self, channel, edge, callback=None, bouncetime=None):
+        self._callbacks[channel] = callback
+
+    def remove_event_detect(self, channel):
+        self._callbacks.pop(channel, None)
+
+    def fire(self, channel):
+        self._asserted.add(channel)
+        callback = self._callbacks.get(channel)
+        if callback:
+            callback(channel)
+
+    def deassert(self):
+        self._asserted.clear()
+
+
+class _ReplaySerialModule:
+    """pyserial stand-in"""
+    EIGHTBITS = 8
+    PARITY_NONE = 'N'
+    STOPBITS_ONE = 1
+    SerialException = OSError
+
+    def __init__(self, replayer: TraceReplayer):
+        self._replayer = replayer
+
+    def Serial(self, port=None, baudrate=9600, timeout=None, **kwargs):
+        return _ReplayPort(self._replayer, port, baudrate, timeout)
+
+
+class _ReplayPort:
+    def __init__(self, replayer: TraceReplayer, port, baudrate, timeout):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.inter_byte_timeout = None
+        self.is_open = True
+        self._replayer = replayer
+        self._buffer = bytearray()
+        self._cond = threading.Condition()
+        replayer._ports.append(self)
+
+    def feed(self, data: bytes):
+        with self._cond:
+            self._buffer.extend(data)
+            self._cond.notify_all()
+
+    def write(self, data) -> int:
+        self._replayer.call('w', (bytes(data).hex(),))
+        return len(data)
+
+    def read(self, size: int = 1) -> bytes:
+        deadline = time.monotonic() + (self.timeout or 0)
+        with self._cond:
+            while not self._buffer:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return b''
+                self._cond.wait(remaining)
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+        return data
+
+    def reset_input_buffer(self):
+        with self._cond:
+            self._buffer.clear()
+
+    def reset_output_buffer(self): pass
+    def flush(self): pass
+
+    def close(self):
+        self.is_open = False
+
+
+class _ReplaySpidevModule:
+    """spidev stand-in"""
+
+    def __init__(self, replayer: TraceReplayer):
+        self._replayer = replayer
+
+    def SpiDev(self):
+        return _ReplaySpi(self._replayer)
+
+
+class _ReplaySpi:
+    def __init__(self, replayer: TraceReplayer):
+        self._replayer = replayer
+        self.max_speed_hz = 0
+        self.mode = 0
+
+    def open(self, bus, device): pass
+    def close(self): pass
+
+    def xfer2(self, data, *args) -> List[int]:
+        event = self._replayer.call('x', (bytes(data).hex(),))
+        if event is None:
+            return [0] * len(data)
+        return list(bytes.fromhex(event[3]))
+
+    xfer = xfer2
+
+
+class _ReplayMsg:
+    """smbus2.i2c_msg stand-in"""
+
+    def __init__(self, addr: int, flags: int, data: List[int]):
+        self.addr = addr
+        self.flags = flags
+        self.len = len(data)
+        self.buf = list(data)
+
+    def __iter__(self):
+        return iter(self.buf)
+
+    @staticmethod
+    def read(addr: int, length: int) -> '_ReplayMsg':
+        return _ReplayMsg(addr, 0x0001, [0] * length)
+
+    @staticmethod
+    def write(addr: int, data) -> '_ReplayMsg':
+        return _ReplayMsg(addr, 0, list(data))
+
+
+class _ReplaySMBusModule:
+    """smbus2 stand-in"""
+    i2c_msg = _ReplayMsg
+
+    def __init__(self, replayer: TraceReplayer):
+        self._replayer = replayer
+
+    def SMBus(self, bus=None):
+        return _ReplayBus(self._replayer)
+
+
+class _ReplayBus:
+    def __init__(self, replayer: TraceReplayer):
+        self._replayer = replayer
+
+    def _call(self, op: str, req: bytes) -> bytes:
+        event = self._replayer.call('i', (op, req.hex()))
+        if event is None or event[4] is None:
+            raise OSError(121, "Remote I/O error")
+        return bytes.fromhex(event[4])
+
+    def write_byte(self, addr, value, *args):
+        self._call('write_byte', bytes([addr, value]))
+
+    def write_i2c_block_data(self, addr, reg, data, *args):
+        self._call('write_i2c_block_data', bytes([addr, reg]) + bytes(data))
+
+    def read_byte(self, addr, *args) -> int:
+        return self._call('read_byte', bytes([addr]))[0]
+
+    def read_i2c_block_data(self, addr, reg, length, *args) -> List[int]:
+        return list(self._call('read_i2c_block_data', bytes([addr, reg, length])))
+
+    def i2c_rdwr(self, *msgs):
+        data = self._call('i2c_rdwr', b''.join(_msg_key(m) for m in msgs))
+        for msg in msgs:
+            if msg.flags & 0x0001:
+                msg.buf = list(data[:msg.len])
+                data = data[msg.len:]
+
+    def close(self): pass
+
+
+# ----------------------------------------------------------------------
+# Harness
+# ----------------------------------------------------------------------
+
+def record(name: str, config: Dict[str, Any], seconds: float, path: str) -> Dict[str, int]:
+    """Run a reader on real hardware for `seconds` and save its trace"""
+    from . import ReaderFactory
+
+    reads: List[CardRead] = []
+    recorder = TraceRecorder(name, config)
+    patch = recorder.install()
+    try:
+        reader = ReaderFactory.create(name, config, reads.append)
+        if not reader.start():
+            raise RuntimeError(f"Reader failed to start: {reader.error_message}")
+        try:
+            time.sleep(seconds)
+        finally:
+            recorder.add('end')
+            reader.stop()
+    finally:
+        patch.uninstall()
+
+    recorder.save(path)
+    return {'events': len(recorder.events), 'reads': len(reads)}
+
+
+def replay(path: str, realtime: bool = False,
+           overrides: Optional[Dict[str, Any]] = None,
+           timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Replay a trace into a fresh reader and measure it.
+
+    Returns:
+        Read count, decoded cards, throughput and per-read latency (time
+        from the last trace event before a read to the read callback)
+    """
+    from . import ReaderFactory
+    from .wiegand import WiegandReader
+
+    header, events = load_trace(path)
+    config = dict(header.get('config') or {})
+    config.update(overrides or {})
+
+    # OSDP link state belongs to the recording, not this machine
+    link_state = None
+    if config.get('reader_type') in ('osdp', 'rs485'):
+        fd, link_state = tempfile.mkstemp(prefix='pidoors-trace-', suffix='.json')
+        os.close(fd)
+        os.unlink(link_state)
+        config['link_state_file'] = link_state
+
+    reads: List[Tuple[float, CardRead]] = []
+    replayer = TraceReplayer(events, realtime=realtime)
+    patch = replayer.install()
+    try:
+        reader = ReaderFactory.create(header.get('name', 'replay'), config,
+                                      lambda card_read: reads.append((time.monotonic(), card_read)))
+        if isinstance(reader, WiegandReader):
+            replayer.settle = reader.timeout * 1.5
+
+        start = time.monotonic()
+        if not reader.start():
+            raise RuntimeError(f"Reader failed to start: {reader.error_message}")
+        try:
+            replayer.start()
+            complete = replayer.wait(timeout)
+            mismatches = replayer.mismatches
+            # Let the last frame finish decoding
+            time.sleep(replayer.settle + 0.05)
+            elapsed = time.monotonic() - start
+        finally:
+            reader.stop()
+            replayer.stop()
+    finally:
+        patch.uninstall()
+        if link_state and os.path.exists(link_state):
+            os.unlink(link_state)
+
+    event_times = sorted(replayer.event_times)
+    latencies = []
+    for read_time, _ in reads:
+        i = bisect.bisect_right(event_times, read_time)
+        if i:
+            latencies.append((read_time - event_times[i - 1]) * 1000)
+    latencies.sort()
+
+    def percentile(p):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 3) if latencies else None
+
+    return {
+        'complete': complete,
+        'events': len(events),
+        'replayed': replayer.position,
+        'host_requests': replayer.calls,
+        'mismatches': mismatches,
+        'reads': len(reads),
+        'cards': [card_read.card_id for _, card_read in reads],
+        'elapsed_s': round(elapsed, 3),
+        'reads_per_s': round(len(reads) / elapsed, 1) if elapsed else 0,
+        'events_per_s': round(replayer.position / elapsed, 1) if elapsed else 0,
+        'latency_ms_p50': percentile(0.5),
+        'latency_ms_p95': percentile(0.95),
+        'latency_ms_max': round(latencies[-1], 3) if latencies else None,
+    }
+
+
+def synth_wiegand(count: int, facility: int = 1, first_card: int = 1,
+                  d0: int = 24, d1: int = 23, bit_interval: float = 0.002,
+                  card_interval: float = 0.5) -> Tuple[Dict[str, Any], List[list]]:
+    """Generate a trace of `count` standard 26-bit Wiegand reads"""
+    events: List[list] = []
+    t = 0.0
+    for n in range(count):
+        data = format(facility & 0xFF, '08b') + format((first_card + n) & 0xFFFF, '016b')
+        even = str(data[:12].count('1') % 2)
+        odd = str(1 - data[12:].count('1') % 2)
+        for bit in even + data + odd:
+            events.append([int(t * 1e6), 'g', d1 if bit == '1' else d0])
+            t += bit_interval
+        t += card_interval
+
+    header = {
+        'trace': TRACE_VERSION,
+        'name': 'synthetic',
+        'config': {'reader_type': 'wiegand', 'd0': d0, 'd1': d1},
+    }
+    return header, events
+
+
+def _find_reader_config(config: Dict[str, Any], name: str) -> Dict[str, Any]:
+    """Look up "zone" or "zone/reader" in a pidoors config.json"""
+    zone, _, sub = name.partition('/')
+    entry = config.get(zone)
+    if isinstance(entry, dict) and sub:
+        entry = (entry.get('readers') or {}).get(sub)
+    if not isinstance(entry, dict):
+        raise KeyError(f"No reader named {name} in config")
+    return entry
+
+
+def _parse_override(text: str) -> Tuple[str, Any]:
+    key, _, value = text.partition('=')
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="PiDoors reader trace recording and replay")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_rec = sub.add_parser("record", help="Record a reader's hardware traffic")
+    p_rec.add_argument("config", help="pidoors config.json")
+    p_rec.add_argument("reader", help="Zone name, or zone/reader for a reader in a \"readers\" object")
+    p_rec.add_argument("-o", "--output", required=True, help="Trace file (.gz to compress)")
+    p_rec.add_argument("--seconds", type=float, default=60.0, help="Recording length")
+
+    p_play = sub.add_parser("replay", help="Replay a trace and measure decoding")
+    p_play.add_argument("trace", help="Trace file")
+    p_play.add_argument("--realtime", action="store_true", help="Keep recorded timing (default: max speed)")
+    p_play.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="Override a reader config value, e.g. timeout=0.01")
+    p_play.add_argument("--timeout", type=float, default=None, help="Give up after this many seconds")
+    p_play.add_argument("--cards", action="store_true", help="List decoded card IDs")
+
+    p_syn = sub.add_parser("synth-wiegand", help="Generate a 26-bit Wiegand trace")
+    p_syn.add_argument("count", type=int, help="Number of card reads")
+    p_syn.add_argument("-o", "--output", required=True, help="Trace file (.gz to compress)")
+    p_syn.add_argument("--facility", type=int, default=1)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        with open(args.config) as f:
+            reader_config = _find_reader_config(json.load(f), args.reader)
+        result = record(args.reader, reader_config, args.seconds, args.output)
+        print(f"Recorded {result['events']} events, {result['reads']} card reads to {args.output}")
+
+    elif args.command == "replay":
+        overrides = dict(_parse_override(s) for s in args.set)
+        result = replay(args.trace, realtime=args.realtime, overrides=overrides, timeout=args.timeout)
+        cards = result.pop('cards')
+        print(f"Replay of {args.trace} ({'real time' if args.realtime else 'max speed'})")
+        for key, value in result.items():
+            print(f"  {key:<20} {value}")
+        if args.cards:
+            for card_id in cards:
+                print(f"  card {card_id}")
+        return 0 if result['complete'] else 1
+
+    elif args.command == "synth-wiegand":
+        header, events = synth_wiegand(args.count, facility=args.facility)
+        save_trace(args.output, header, events)
+        print(f"Wrote {args.count} reads ({len(events)} events) to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
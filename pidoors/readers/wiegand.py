@@ -61,6 +61,7 @@ class WiegandReader(BaseReader):
         self._stream = ""
         self._stream_lock = threading.Lock()
         self._timer: Optional[threading.Timer] = None
+        self._last_bit_time: float = 0
 
         # Format registry
         self._format_registry: Optional[FormatRegistry] = None
@@ -180,24 +181,29 @@ class WiegandReader(BaseReader):
         self._add_bit('1')
 
     def _add_bit(self, bit: str):
-        """Add a bit to the stream and reset timer"""
+        """Add a bit to the stream, arming the end-of-stream timer on the first bit"""
         with self._stream_lock:
             self._stream += bit
+            self._last_bit_time = time.monotonic()
 
-            # Cancel existing timer
-            if self._timer:
-                self._timer.cancel()
-
-            # Start new timer
-            self._timer = threading.Timer(
-                self.timeout,
-                self._process_stream
-            )
-            self._timer.start()
+            # One timer per card stream, not per bit: a 26-bit read used to
+            # spawn (and cancel) 26 timer threads inside the GPIO callback.
+            if self._timer is None:
+                self._timer = threading.Timer(self.timeout, self._process_stream)
+                self._timer.daemon = True
+                self._timer.start()
 
     def _process_stream(self):
         """Process the completed bit stream"""
         with self._stream_lock:
+            # Bits still arriving - re-arm for the rest of the quiet period
+            remaining = self.timeout - (time.monotonic() - self._last_bit_time)
+            if remaining > 0 and self._stream:
+                self._timer = threading.Timer(remaining, self._process_stream)
+                self._timer.daemon = True
+                self._timer.start()
+                return
+
             bitstring = self._stream
             self._stream = ""
             self._timer = None
@@ -265,7 +271,9 @@ class WiegandReader(BaseReader):
         if calc_lparity != lparity or calc_rparity != rparity:
             return None
 
-        card_id = "%08x" % int(bstr, 2)
+        # Byte-aligned width, matching FormatRegistry.validate() for the same card
+        hex_width = ((len(bstr) + 7) // 8) * 2
+        card_id = f"{int(bstr, 2):0{hex_width}x}"
         return CardRead(
             card_id=card_id,
             facility=str(facility),
@@ -293,7 +301,9 @@ class WiegandReader(BaseReader):
         if calc_lparity != lparity or calc_rparity != rparity:
             return None
 
-        card_id = "%09x" % int(bstr, 2)
+        # Byte-aligned width, matching FormatRegistry.validate() for the same card
+        hex_width = ((len(bstr) + 7) // 8) * 2
+        card_id = f"{int(bstr, 2):0{hex_width}x}"
         return CardRead(
             card_id=card_id,
             facility=str(facility),
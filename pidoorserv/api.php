@@ -853,15 +853,11 @@ if ($resource === 'doors') {
         if (!$door) json_error('Door not found', 404);
         if ($door['status'] !== 'online') json_error('Door is not online');
 
-        $result = push_to_controller($pdo_access, $door_name, 'unlock');
-        $delivery = 'push';
-        if ($result['ok']) {
+        $result = send_door_command($pdo_access, $door_name, 'unlock');
+        $delivery = $result['delivery'];
+        if ($delivery === 'push') {
             // Update DB immediately so dashboard poll sees the change right away
             $pdo_access->prepare("UPDATE doors SET locked = 0 WHERE name = ?")->execute([$door_name]);
-        } else {
-            // Fallback to database flag
-            $pdo_access->prepare("UPDATE doors SET unlock_requested = 1 WHERE name = ?")->execute([$door_name]);
-            $delivery = 'poll';
         }
         log_security_event($pdo, 'remote_unlock', $_SESSION['user_id'], "Remote unlock via API ($delivery): $door_name");
         json_success(['delivery' => $delivery], 'Unlock command sent');
@@ -882,20 +878,15 @@ if ($resource === 'doors') {
         if (!$door) json_error('Door not found', 404);
         if ($door['status'] !== 'online') json_error('Door is not online');
 
-        $push_cmd = ($hold_action === 'hold') ? 'hold' : 'release';
-        $result = push_to_controller($pdo_access, $door_name, $push_cmd);
-        $delivery = 'push';
-        if ($result['ok']) {
+        $result = send_door_command($pdo_access, $door_name, $hold_action);
+        $delivery = $result['delivery'];
+        if ($delivery === 'push') {
             // Update DB immediately so dashboard poll sees the change right away
             if ($hold_action === 'hold') {
                 $pdo_access->prepare("UPDATE doors SET held_open = 1, locked = 0 WHERE name = ?")->execute([$door_name]);
             } else {
                 $pdo_access->prepare("UPDATE doors SET held_open = 0, locked = 1 WHERE name = ?")->execute([$door_name]);
             }
-        } else {
-            $hold_val = ($hold_action === 'hold') ? 1 : 2;
-            $pdo_access->prepare("UPDATE doors SET hold_requested = ? WHERE name = ?")->execute([$hold_val, $door_name]);
-            $delivery = 'poll';
         }
         $label = ($hold_action === 'hold') ? 'Hold open' : 'Release hold';
         log_security_event($pdo, 'remote_hold', $_SESSION['user_id'], "$label via API ($delivery): $door_name");
@@ -1070,6 +1061,7 @@ if ($resource === 'cards') {
         $imported = 0;
         $skipped = 0;
         $errors_list = [];
+        $imported_keys = [];
 
         $pdo_access->beginTransaction();
         try {
@@ -1143,6 +1135,7 @@ if ($resource === 'cards') {
                         } catch (PDOException $e) { /* master_cards table may not exist */ }
                     }
 
+                    $imported_keys[] = trim($data['facility'] ?? '') . ",$user_id";
                     $imported++;
                 } catch (PDOException $e) {
                     $errors_list[] = "Row $user_id: " . $e->getMessage();
@@ -1156,6 +1149,7 @@ if ($resource === 'cards') {
             json_error('Import failed: ' . $e->getMessage());
         }
         fclose($handle);
+        push_cache_delta($pdo_access, ['cards' => $imported_keys]);
 
         log_security_event($pdo, 'cards_imported', $_SESSION['user_id'], "CSV import: $imported imported, $skipped skipped");
         json_success(['imported' => $imported, 'skipped' => $skipped, 'errors' => $errors_list], "Imported $imported cards, skipped $skipped");
@@ -1254,6 +1248,7 @@ if ($resource === 'cards') {
                     ->execute([$new_card_id, $user_id, sanitize_string($input['facility'] ?? ''), sanitize_string($input['firstname'] ?? '') . ' ' . sanitize_string($input['lastname'] ?? '')]);
             } catch (PDOException $e) { /* master_cards table may not exist */ }
         }
+        push_cache_delta($pdo_access, ['cards' => [sanitize_string($input['facility'] ?? '') . ",$user_id"]]);
 
         log_security_event($pdo, 'card_created', $_SESSION['user_id'], "Card created: $user_id");
         json_success(['card_id' => $new_card_id], 'Card created');
@@ -1284,6 +1279,7 @@ if ($resource === 'cards') {
         if (isset($input['daily_scan_limit'])) { $fields[] = "daily_scan_limit = ?"; $params[] = !empty($input['daily_scan_limit']) ? (int)$input['daily_scan_limit'] : null; }
 
         if (empty($fields) && !isset($input['master_card'])) json_error('No fields to update');
+        $old_key = card_cache_key($pdo_access, $id);
 
         if (!empty($fields)) {
             $params[] = $id;
@@ -1311,6 +1307,8 @@ if ($resource === 'cards') {
                 }
             } catch (PDOException $e) { /* master_cards table may not exist */ }
         }
+        // user_id/facility may have changed: the old key is removed, the new one set
+        push_cache_delta($pdo_access, ['cards' => [$old_key, card_cache_key($pdo_access, $id)]]);
 
         log_security_event($pdo, 'card_updated', $_SESSION['user_id'], "Card updated: card_id=$id");
         json_success([], 'Card updated');
@@ -1324,11 +1322,13 @@ if ($resource === 'cards') {
         $stmt->execute([$id]);
         $card_info = $stmt->fetch();
         if (!$card_info) json_error('Card not found', 404);
+        $del_key = card_cache_key($pdo_access, $id);
 
         // Delete from master_cards first (foreign key)
         $pdo_access->prepare("DELETE FROM master_cards WHERE card_id = ?")->execute([$id]);
         // Delete card
         $pdo_access->prepare("DELETE FROM cards WHERE card_id = ?")->execute([$id]);
+        push_cache_delta($pdo_access, ['cards' => [$del_key]]);
         log_security_event($pdo, 'card_deleted', $_SESSION['user_id'], "Card deleted: {$card_info['firstname']} {$card_info['lastname']} (card_id=$id)");
         json_success([], 'Card deleted');
     }
@@ -1460,8 +1460,10 @@ if ($resource === 'schedules') {
             if ($e->getCode() == 23000) json_error('A schedule with this name already exists');
             throw $e;
         }
+        $schedule_id = (int)$pdo_access->lastInsertId();
+        push_cache_delta($pdo_access, ['schedules' => [$schedule_id]]);
         log_security_event($pdo, 'schedule_created', $_SESSION['user_id'], "Schedule created: $name");
-        json_success(['id' => (int)$pdo_access->lastInsertId()], 'Schedule created');
+        json_success(['id' => $schedule_id], 'Schedule created');
     }
 
     if ($method === 'GET' && $id !== null) {
@@ -1493,6 +1495,7 @@ if ($resource === 'schedules') {
         if (empty($fields)) json_error('No fields to update');
         $params[] = (int)$id;
         $pdo_access->prepare("UPDATE access_schedules SET " . implode(', ', $fields) . " WHERE id = ?")->execute($params);
+        push_cache_delta($pdo_access, ['schedules' => [(int)$id]]);
         log_security_event($pdo, 'schedule_updated', $_SESSION['user_id'], "Schedule updated: id=$id");
         json_success([], 'Schedule updated');
     }
@@ -1503,6 +1506,7 @@ if ($resource === 'schedules') {
         $stmt = $pdo_access->prepare("DELETE FROM access_schedules WHERE id = ?");
         $stmt->execute([(int)$id]);
         if ($stmt->rowCount() === 0) json_error('Schedule not found', 404);
+        push_cache_delta($pdo_access, ['schedules' => [(int)$id]]);
         log_security_event($pdo, 'schedule_deleted', $_SESSION['user_id'], "Schedule deleted: id=$id");
         json_success([], 'Schedule deleted');
     }
@@ -1605,6 +1609,7 @@ if ($resource === 'holidays') {
 
         $stmt = $pdo_access->prepare("INSERT INTO holidays (name, date, recurring, access_denied) VALUES (?, ?, ?, ?)");
         $stmt->execute([$name, $date, (int)($input['recurring'] ?? 0), (int)($input['access_denied'] ?? 1)]);
+        push_cache_delta($pdo_access, ['holidays' => true]);
         log_security_event($pdo, 'holiday_created', $_SESSION['user_id'], "Holiday created: $name");
         json_success(['id' => (int)$pdo_access->lastInsertId()], 'Holiday created');
     }
@@ -1624,6 +1629,7 @@ if ($resource === 'holidays') {
         if (empty($fields)) json_error('No fields to update');
         $params[] = (int)$id;
         $pdo_access->prepare("UPDATE holidays SET " . implode(', ', $fields) . " WHERE id = ?")->execute($params);
+        push_cache_delta($pdo_access, ['holidays' => true]);
         json_success([], 'Holiday updated');
     }
 
@@ -1633,6 +1639,7 @@ if ($resource === 'holidays') {
         $stmt = $pdo_access->prepare("DELETE FROM holidays WHERE id = ?");
         $stmt->execute([(int)$id]);
         if ($stmt->rowCount() === 0) json_error('Holiday not found', 404);
+        push_cache_delta($pdo_access, ['holidays' => true]);
         json_success([], 'Holiday deleted');
     }
 
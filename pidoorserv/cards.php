@@ -5,6 +5,7 @@
  */
 $title = 'Cards';
 require_once './includes/header.php';
+require_once __DIR__ . '/includes/push.php';
 
 // Require admin
 require_admin($config);
@@ -22,11 +23,15 @@ if (isset($_GET['delete']) && isset($_GET['token'])) {
             $del_stmt->execute([$card_id]);
             $del_card = $del_stmt->fetch();
             $del_name = $del_card ? trim($del_card['firstname'] . ' ' . $del_card['lastname']) : '';
+            $del_key = card_cache_key($pdo_access, $card_id);
 
             $stmt = $pdo_access->prepare("DELETE FROM master_cards WHERE card_id = ?");
             $stmt->execute([$card_id]);
             $stmt = $pdo_access->prepare("DELETE FROM cards WHERE card_id = ?");
             $stmt->execute([$card_id]);
+            if ($del_key) {
+                push_cache_delta($pdo_access, ['cards' => [$del_key]]);
+            }
 
             $del_detail = "Deleted card $card_id";
             if ($del_card) {
@@ -106,6 +111,7 @@ if ($_SERVER['REQUEST_METHOD'] === 'POST') {
                     $stmt = $pdo_access->prepare("INSERT INTO master_cards (card_id, user_id, facility, description, active) VALUES (?, ?, ?, ?, 1)");
                     $stmt->execute([$card_id, $user_id, $facility, $desc]);
                 }
+                push_cache_delta($pdo_access, ['cards' => ["$facility,$user_id"]]);
 
                 $add_name = trim($firstname . ' ' . $lastname);
                 $add_detail = "Created card $card_id (user_id: $user_id, facility: $facility";
@@ -5,6 +5,7 @@
  */
 $title = 'Edit Card';
 require_once './includes/header.php';
+require_once __DIR__ . '/includes/push.php';
 
 require_login($config);
 require_admin($config);
@@ -98,6 +99,7 @@ if ($_SERVER['REQUEST_METHOD'] === 'POST') {
                 $stmt = $pdo_access->prepare("DELETE FROM master_cards WHERE card_id = ?");
                 $stmt->execute([$card_id]);
             }
+            push_cache_delta($pdo_access, ['cards' => ["{$card['facility']},{$card['user_id']}"]]);
 
             // Build change detail for audit log
             $edit_changes = [];
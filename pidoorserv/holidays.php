@@ -5,6 +5,7 @@
  */
 $title = 'Holidays';
 require_once './includes/header.php';
+require_once __DIR__ . '/includes/push.php';
 
 require_admin($config);
 
@@ -16,6 +17,7 @@ if (isset($_GET['delete']) && isset($_GET['token'])) {
             try {
                 $stmt = $pdo_access->prepare("DELETE FROM holidays WHERE id = ?");
                 $stmt->execute([$id]);
+                push_cache_delta($pdo_access, ['holidays' => true]);
                 header("Location: {$config['url']}/holidays.php?success=Holiday deleted.");
                 exit();
             } catch (PDOException $e) {
@@ -67,6 +69,7 @@ if ($_SERVER['REQUEST_METHOD'] === 'POST') {
                     $stmt->execute([$name, $date, $recurring, $access_denied]);
                     $message = 'Holiday added successfully.';
                 }
+                push_cache_delta($pdo_access, ['holidays' => true]);
                 header("Location: {$config['url']}/holidays.php?success=" . urlencode($message));
                 exit();
             } catch (PDOException $e) {
@@ -5,6 +5,7 @@
  */
 $title = 'Import Cards';
 require_once './includes/header.php';
+require_once __DIR__ . '/includes/push.php';
 
 require_login($config);
 require_admin($config);
@@ -79,6 +80,7 @@ if ($_SERVER['REQUEST_METHOD'] === 'POST' && isset($_FILES['csv_file'])) {
                             $skipped = 0;
                             $errors = 0;
                             $line_num = 1;
+                            $imported_keys = [];
 
                             $pdo_access->beginTransaction();
 
@@ -151,6 +153,7 @@ if ($_SERVER['REQUEST_METHOD'] === 'POST' && isset($_FILES['csv_file'])) {
                                             $master_stmt->execute([$card_id, $user_id, $csv_facility, $desc]);
                                         }
 
+                                        $imported_keys[] = "{$csv_facility},{$user_id}";
                                         $imported++;
                                     } catch (PDOException $e) {
                                         if ($e->getCode() == 23000) {
@@ -164,6 +167,7 @@ if ($_SERVER['REQUEST_METHOD'] === 'POST' && isset($_FILES['csv_file'])) {
                                 }
 
                                 $pdo_access->commit();
+                                push_cache_delta($pdo_access, ['cards' => $imported_keys]);
                                 $success_message = "Import complete: {$imported} imported, {$skipped} skipped, {$errors} errors.";
 
                                 log_security_event($pdo, 'cards_imported', $_SESSION['user_id'] ?? null, "{$imported} cards imported from CSV");
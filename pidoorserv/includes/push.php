@@ -6,6 +6,8 @@
  */
 
 define('PIDOORS_CA_PATH', '/var/www/pidoors/ca.pem');
+// Cards per cache delta; the controller reads at most 64 KB per request
+define('PIDOORS_DELTA_MAX_CARDS', 150);
 
 /**
  * Build SSL curl options. FAILS CLOSED: TLS verification is always enforced and
@@ -28,6 +30,26 @@ function _push_ssl_opts() {
     return null;
 }
 
+/**
+ * curl share handle for controller requests made during one PHP request.
+ * Reuses open connections (controllers keep them alive) and TLS sessions,
+ * so a page that sends several commands to a door pays for one handshake.
+ *
+ * @return resource|CurlShareHandle
+ */
+function _push_curl_share() {
+    static $share = null;
+    if ($share === null) {
+        $share = curl_share_init();
+        curl_share_setopt($share, CURLSHOPT_SHARE, CURL_LOCK_DATA_SSL_SESSION);
+        curl_share_setopt($share, CURLSHOPT_SHARE, CURL_LOCK_DATA_DNS);
+        if (defined('CURL_LOCK_DATA_CONNECT')) {
+            curl_share_setopt($share, CURLSHOPT_SHARE, CURL_LOCK_DATA_CONNECT);
+        }
+    }
+    return $share;
+}
+
 /**
  * Push a command to a door controller via HTTPS.
  *
@@ -81,6 +103,7 @@ function push_to_controller($pdo_access, $door_name, $command, $body = []) {
             "Authorization: Bearer {$key}",
         ],
         CURLOPT_POSTFIELDS     => json_encode($body ?: new \stdClass()),
+        CURLOPT_SHARE          => _push_curl_share(),
     ] + $ssl_opts);
 
     $response = curl_exec($ch);
@@ -106,6 +129,288 @@ function push_to_controller($pdo_access, $door_name, $command, $body = []) {
     return ['ok' => false, 'fallback' => true, 'reason' => $err ?: "HTTP {$http_code}"];
 }
 
+/**
+ * Send an unlock/hold/release command to a door: push first, database flag as fallback.
+ *
+ * Every command takes the door's next command_seq. The pushed command carries it
+ * and the controller writes it back to command_ack once it has acted, so the
+ * controller's reconciliation sweep (which only reads the row while
+ * command_seq <> command_ack) picks a command up only when the push did not
+ * get through. The request flags always describe the latest command: a newer
+ * command replaces an older one that has not been delivered yet.
+ *
+ * A server whose migration has not run yet (no command_seq) sends the command
+ * unsequenced, falling back to the request flags alone as before.
+ *
+ * @param PDO    $pdo_access  Database connection (access DB)
+ * @param string $door_name   Door name
+ * @param string $command     'unlock', 'hold' or 'release'
+ * @return array  ['ok' => bool, 'delivery' => 'push'|'poll', 'seq' => int|null, ...push response]
+ */
+function send_door_command($pdo_access, $door_name, $command) {
+    $unlock_val = ($command === 'unlock') ? 1 : 0;
+    $hold_val = ($command === 'hold') ? 1 : (($command === 'release') ? 2 : 0);
+
+    // LAST_INSERT_ID(expr) hands the incremented value back to this connection atomically
+    $seq = null;
+    foreach ([
+        "UPDATE doors SET command_seq = LAST_INSERT_ID(command_seq + 1), command_time = NOW() WHERE name = ?",
+        "UPDATE doors SET command_seq = LAST_INSERT_ID(command_seq + 1) WHERE name = ?",
+    ] as $sql) {
+        try {
+            $pdo_access->prepare($sql)->execute([$door_name]);
+            $seq = (int) $pdo_access->lastInsertId();
+            break;
+        } catch (PDOException $e) {
+            /* command_time / command_seq not migrated yet */
+        }
+    }
+
+    if ($seq === null) {
+        // Unsequenced, as before the migration: the controller sweeps the flags
+        $result = push_to_controller($pdo_access, $door_name, $command);
+        if (!empty($result['ok'])) {
+            return array_merge($result, ['ok' => true, 'delivery' => 'push', 'seq' => null]);
+        }
+        $pdo_access->prepare(
+            "UPDATE doors SET unlock_requested = ?, hold_requested = ? WHERE name = ?"
+        )->execute([$unlock_val, $hold_val, $door_name]);
+        return ['ok' => true, 'delivery' => 'poll', 'seq' => null, 'reason' => $result['reason'] ?? null];
+    }
+
+    $result = push_to_controller($pdo_access, $door_name, $command, ['seq' => $seq]);
+    if (!empty($result['ok'])) {
+        // Supersedes any older command still waiting in the flags
+        $pdo_access->prepare(
+            "UPDATE doors SET unlock_requested = 0, hold_requested = 0 WHERE name = ? AND command_seq = ?"
+        )->execute([$door_name, $seq]);
+        return array_merge($result, ['ok' => true, 'delivery' => 'push', 'seq' => $seq]);
+    }
+
+    // Push failed: leave the command for the controller's reconciliation sweep,
+    // unless a timed-out push did arrive and has been acknowledged meanwhile
+    $pdo_access->prepare(
+        "UPDATE doors SET unlock_requested = ?, hold_requested = ? WHERE name = ? AND command_seq = ? AND command_ack < ?"
+    )->execute([$unlock_val, $hold_val, $door_name, $seq, $seq]);
+    return ['ok' => true, 'delivery' => 'poll', 'seq' => $seq, 'reason' => $result['reason'] ?? null];
+}
+
+/**
+ * Cache key of a card as the controllers store it ("facility,user_id").
+ *
+ * @param PDO    $pdo_access  Database connection (access DB)
+ * @param string $card_id     Card ID
+ * @return string|null  Key, or null if the card does not exist
+ */
+function card_cache_key($pdo_access, $card_id) {
+    $stmt = $pdo_access->prepare("SELECT facility, user_id FROM cards WHERE card_id = ?");
+    $stmt->execute([$card_id]);
+    $row = $stmt->fetch(PDO::FETCH_ASSOC);
+    return $row ? "{$row['facility']},{$row['user_id']}" : null;
+}
+
+/**
+ * Push card, master card, schedule and holiday changes straight into the
+ * controllers' caches, so a revocation takes effect without a database sync.
+ *
+ * Every push-enabled door gets its next doors.cache_version and a delta holding
+ * the current state of each changed entry, signed with the door's api_key.
+ * A controller that sees a version skipped (a push that never arrived) runs a
+ * full sync itself, so a failed push here needs no retry or fallback flag.
+ *
+ * Each card goes out with the schedule it references, so a card moved to a
+ * schedule the controller has not cached yet is not denied until the next
+ * sync. More than PIDOORS_DELTA_MAX_CARDS cards are sent as several deltas.
+ *
+ * @param PDO   $pdo_access  Database connection (access DB)
+ * @param array $changes     ['cards' => [cache keys], 'schedules' => [ids], 'holidays' => true]
+ * @return array  ['pushed' => int, 'failed' => int]
+ */
+function push_cache_delta($pdo_access, $changes) {
+    $result = ['pushed' => 0, 'failed' => 0];
+
+    $keys = array_values(array_unique(array_filter($changes['cards'] ?? [])));
+    if (!$keys && empty($changes['schedules']) && empty($changes['holidays'])) {
+        return $result;
+    }
+    if (count($keys) > PIDOORS_DELTA_MAX_CARDS) {
+        foreach (array_chunk($keys, PIDOORS_DELTA_MAX_CARDS) as $i => $chunk) {
+            $part = push_cache_delta($pdo_access, ['cards' => $chunk] + ($i === 0 ? $changes : []));
+            $result['pushed'] += $part['pushed'];
+            $result['failed'] += $part['failed'];
+        }
+        return $result;
+    }
+
+    // Fail closed, as push_to_controller does: the next full sync picks the change up
+    $ssl_opts = _push_ssl_opts();
+    if ($ssl_opts === null) {
+        return $result;
+    }
+
+    try {
+        $doors = $pdo_access->query(
+            "SELECT name, ip_address, listen_port, api_key FROM doors WHERE ip_address IS NOT NULL AND listen_port IS NOT NULL AND api_key IS NOT NULL AND ip_address != '' AND api_key != ''"
+        )->fetchAll(PDO::FETCH_ASSOC);
+        if (empty($doors)) {
+            return $result;
+        }
+
+        // Current state of every changed entry (absent = removed)
+        $card_rows = [];
+        $master_rows = [];
+        $card_stmt = $pdo_access->prepare(
+            "SELECT card_id, firstname, lastname, doors, schedule_id, valid_from, valid_until, daily_scan_limit FROM cards WHERE facility = ? AND user_id = ? AND active = 1"
+        );
+        foreach ($keys as $key) {
+            [$facility, $user_id] = array_pad(explode(',', $key, 2), 2, '');
+            $card_stmt->execute([$facility, $user_id]);
+            $card_rows[$key] = $card_stmt->fetchAll(PDO::FETCH_ASSOC);
+            try {
+                $master_stmt = $pdo_access->prepare(
+                    "SELECT card_id, user_id, facility, description FROM master_cards WHERE facility = ? AND user_id = ? AND active = 1"
+                );
+                $master_stmt->execute([$facility, $user_id]);
+                $master_rows[$key] = $master_stmt->fetch(PDO::FETCH_ASSOC) ?: null;
+            } catch (PDOException $e) {
+                $master_rows[$key] = null; /* master_cards table may not exist */
+            }
+        }
+
+        // Schedules the changed cards use, which the controller may not have yet
+        foreach ($card_rows as $rows) {
+            foreach ($rows as $row) {
+                if ($row['schedule_id'] !== null) {
+                    $changes['schedules'][] = (int) $row['schedule_id'];
+                }
+            }
+        }
+
+        $schedules = null;
+        if (!empty($changes['schedules'])) {
+            $schedules = ['set' => [], 'remove' => []];
+            $sched_stmt = $pdo_access->prepare("SELECT * FROM access_schedules WHERE id = ?");
+            foreach (array_unique(array_map('intval', $changes['schedules'])) as $schedule_id) {
+                $sched_stmt->execute([$schedule_id]);
+                $row = $sched_stmt->fetch(PDO::FETCH_ASSOC);
+                if ($row) {
+                    $schedules['set'][(string) $schedule_id] = $row;
+                } else {
+                    $schedules['remove'][] = (string) $schedule_id;
+                }
+            }
+            $schedules['set'] = (object) $schedules['set'];
+        }
+
+        $holidays = null;
+        if (!empty($changes['holidays'])) {
+            $holidays = $pdo_access->query(
+                "SELECT name, date, access_denied, recurring FROM holidays WHERE date >= CURDATE()"
+            )->fetchAll(PDO::FETCH_ASSOC);
+        }
+
+        $timeout = 5;
+        $ts = $pdo_access->query("SELECT setting_value FROM settings WHERE setting_key = 'push_timeout'")->fetch(PDO::FETCH_ASSOC);
+        if ($ts && $ts['setting_value']) {
+            $timeout = max(2, (int) $ts['setting_value']);
+        }
+
+        $bump_stmt = $pdo_access->prepare(
+            "UPDATE doors SET cache_version = LAST_INSERT_ID(cache_version + 1) WHERE name = ?"
+        );
+        $mh = curl_multi_init();
+        $handles = [];
+
+        foreach ($doors as $door) {
+            $delta = [];
+            if ($keys) {
+                $cards = ['set' => [], 'remove' => []];
+                $masters = ['set' => [], 'remove' => []];
+                foreach ($keys as $key) {
+                    $card = null;
+                    foreach ($card_rows[$key] as $row) {
+                        // Same matching as the controller's full sync
+                        if ($row['doors'] === '*' || in_array($door['name'], explode(',', str_replace(' ', '', $row['doors'])), true)) {
+                            $card = $row;
+                            break;
+                        }
+                    }
+                    if ($card) {
+                        $card['schedule_id'] = $card['schedule_id'] !== null ? (int) $card['schedule_id'] : null;
+                        $card['daily_scan_limit'] = $card['daily_scan_limit'] !== null ? (int) $card['daily_scan_limit'] : null;
+                        $cards['set'][$key] = $card;
+                    } else {
+                        $cards['remove'][] = $key;
+                    }
+                    if ($master_rows[$key]) {
+                        $masters['set'][$key] = $master_rows[$key];
+                    } else {
+                        $masters['remove'][] = $key;
+                    }
+                }
+                $cards['set'] = (object) $cards['set'];
+                $masters['set'] = (object) $masters['set'];
+                $delta['cards'] = $cards;
+                $delta['master_cards'] = $masters;
+            }
+            if ($schedules !== null) {
+                $delta['schedules'] = $schedules;
+            }
+            if ($holidays !== null) {
+                $delta['holidays'] = $holidays;
+            }
+
+            // LAST_INSERT_ID(expr) hands the incremented value back to this connection atomically
+            $bump_stmt->execute([$door['name']]);
+            $version = (int) $pdo_access->lastInsertId();
+            $payload = json_encode($delta);
+            $signature = hash_hmac('sha256', "{$door['name']}\n{$version}\n{$payload}", $door['api_key']);
+
+            $ch = curl_init("https://{$door['ip_address']}:{$door['listen_port']}/cmd/cache-delta");
+            curl_setopt_array($ch, [
+                CURLOPT_POST           => true,
+                CURLOPT_RETURNTRANSFER => true,
+                CURLOPT_TIMEOUT        => $timeout,
+                CURLOPT_CONNECTTIMEOUT => $timeout - 1,
+                CURLOPT_HTTPHEADER     => [
+                    'Content-Type: application/json',
+                    "Authorization: Bearer {$door['api_key']}",
+                ],
+                CURLOPT_POSTFIELDS     => json_encode(['version' => $version, 'delta' => $payload, 'signature' => $signature]),
+                CURLOPT_SHARE          => _push_curl_share(),
+            ] + $ssl_opts);
+            curl_multi_add_handle($mh, $ch);
+            $handles[] = $ch;
+        }
+
+        $running = null;
+        do {
+            curl_multi_exec($mh, $running);
+            if ($running > 0) {
+                curl_multi_select($mh, 0.1);
+            }
+        } while ($running > 0);
+
+        foreach ($handles as $ch) {
+            // 409: the controller found a version gap and is running a full sync
+            $http_code = curl_getinfo($ch, CURLINFO_HTTP_CODE);
+            if (($http_code >= 200 && $http_code < 300) || $http_code == 409) {
+                $result['pushed']++;
+            } else {
+                $result['failed']++;
+            }
+            curl_multi_remove_handle($mh, $ch);
+            curl_close($ch);
+        }
+        curl_multi_close($mh);
+    } catch (PDOException $e) {
+        // e.g. cache_version column not migrated yet: controllers still sync hourly
+        error_log("Cache delta push error: " . $e->getMessage());
+    }
+
+    return $result;
+}
+
 /**
  * Ping a door controller and return its live status.
  *
@@ -153,6 +458,7 @@ function ping_controller($pdo_access, $door_name) {
             "Authorization: Bearer {$key}",
         ],
         CURLOPT_POSTFIELDS     => '{}',
+        CURLOPT_SHARE          => _push_curl_share(),
     ] + $ssl_opts);
 
     $response = curl_exec($ch);
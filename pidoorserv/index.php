@@ -9,6 +9,7 @@ if (isset($_GET['ajax']) && $_GET['ajax'] === 'unlock' && $_SERVER['REQUEST_METH
     $config = include(__DIR__ . '/includes/config.php');
     require_once __DIR__ . '/includes/security.php';
     require_once $config['apppath'] . 'database/db_connection.php';
+    require_once __DIR__ . '/includes/push.php';
     secure_session_start($config);
 
     header('Content-Type: application/json');
@@ -31,8 +32,7 @@ if (isset($_GET['ajax']) && $_GET['ajax'] === 'unlock' && $_SERVER['REQUEST_METH
         $stmt->execute([$door_name]);
         $door_check = $stmt->fetch();
         if ($door_check && $door_check['status'] === 'online') {
-            $stmt = $pdo_access->prepare("UPDATE doors SET unlock_requested = 1 WHERE name = ?");
-            $stmt->execute([$door_name]);
+            send_door_command($pdo_access, $door_name, 'unlock');
             log_security_event($pdo, 'remote_unlock', $_SESSION['user_id'], "Remote unlock requested for door: $door_name");
             echo json_encode(['ok' => true, 'msg' => 'Unlock command sent']);
         } else {
@@ -49,6 +49,7 @@ if (isset($_GET['ajax']) && $_GET['ajax'] === 'hold' && $_SERVER['REQUEST_METHOD
     $config = include(__DIR__ . '/includes/config.php');
     require_once __DIR__ . '/includes/security.php';
     require_once $config['apppath'] . 'database/db_connection.php';
+    require_once __DIR__ . '/includes/push.php';
     secure_session_start($config);
 
     header('Content-Type: application/json');
@@ -77,9 +78,7 @@ if (isset($_GET['ajax']) && $_GET['ajax'] === 'hold' && $_SERVER['REQUEST_METHOD
         $stmt->execute([$door_name]);
         $door_check = $stmt->fetch();
         if ($door_check && $door_check['status'] === 'online') {
-            $hold_val = ($action === 'hold') ? 1 : 2;
-            $stmt = $pdo_access->prepare("UPDATE doors SET hold_requested = ? WHERE name = ?");
-            $stmt->execute([$hold_val, $door_name]);
+            send_door_command($pdo_access, $door_name, $action);
             $label = ($action === 'hold') ? 'Hold open' : 'Release hold';
             log_security_event($pdo, 'remote_hold', $_SESSION['user_id'], "$label requested for door: $door_name");
             echo json_encode(['ok' => true, 'msg' => "$label command sent"]);
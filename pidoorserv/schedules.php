@@ -5,6 +5,7 @@
  */
 $title = 'Access Schedules';
 require_once './includes/header.php';
+require_once __DIR__ . '/includes/push.php';
 
 require_admin($config);
 
@@ -16,6 +17,7 @@ if (isset($_GET['delete']) && isset($_GET['token'])) {
             try {
                 $stmt = $pdo_access->prepare("DELETE FROM access_schedules WHERE id = ?");
                 $stmt->execute([$id]);
+                push_cache_delta($pdo_access, ['schedules' => [$id]]);
                 header("Location: {$config['url']}/schedules.php?success=Schedule deleted.");
                 exit();
             } catch (PDOException $e) {
@@ -80,6 +82,7 @@ if ($_SERVER['REQUEST_METHOD'] === 'POST') {
                     }
                     $params[] = $id;
                     $stmt->execute($params);
+                    push_cache_delta($pdo_access, ['schedules' => [$id]]);
                     $message = 'Schedule updated successfully.';
                 } else {
                     // Insert
@@ -97,6 +100,7 @@ if ($_SERVER['REQUEST_METHOD'] === 'POST') {
                         $params[] = $times["{$day}_end"];
                     }
                     $stmt->execute($params);
+                    push_cache_delta($pdo_access, ['schedules' => [(int) $pdo_access->lastInsertId()]]);
                     $message = 'Schedule added successfully.';
                 }
                 header("Location: {$config['url']}/schedules.php?success=" . urlencode($message));
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+PiDoors Fleet Command Tool
+PiDoors Access Control System
+
+Sends push listener commands to every door controller at once. Door
+addresses and API keys come from the access database's doors table (the
+same rows the web UI pushes to), and every door is driven concurrently
+with asyncio, so one slow or offline door only costs its own timeout.
+
+Usage:
+    sudo ./tools/pidoors-fleet.py sync
+    sudo ./tools/pidoors-fleet.py --doors front,back reload-config sync status
+    sudo ./tools/pidoors-fleet.py --parallel 64 --timeout 5 --json update
+
+Commands are sent to each door in the order given, over one connection:
+    status, metrics          GET /status, GET /metrics
+    ping                     POST /ping
+    sync, reload-config,     POST /cmd/<command>
+    update, unlock, hold,
+    release, gate/<action>
+
+Requires PyMySQL (pip install PyMySQL, or apt install python3-pymysql).
+The database settings are read from the web config
+(/var/www/pidoors/includes/config.php) and controller certificates are
+verified against the server's CA (/var/www/pidoors/ca.pem), exactly as
+the web UI does.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import ssl
+import sys
+import time
+
+try:
+    import pymysql
+    MYSQL_AVAILABLE = True
+except ImportError:
+    MYSQL_AVAILABLE = False
+
+WEB_CONFIG = '/var/www/pidoors/includes/config.php'
+CA_PATH = '/var/www/pidoors/ca.pem'
+
+DEFAULT_PARALLEL = 32   # Doors contacted at once
+DEFAULT_TIMEOUT = 10.0  # Seconds per attempt (connect, TLS handshake and response)
+DEFAULT_RETRIES = 2     # Extra attempts per command after the first
+RETRY_BACKOFF = 0.5     # First retry delay in seconds, doubled per attempt
+MAX_RESPONSE_BYTES = 1 << 20
+
+GET_COMMANDS = ('status', 'metrics')
+# Sending these twice does no harm, so they are retried even when the
+# door may have received the first attempt. Anything else (unlock, gate
+# commands) is only retried when the connection could not be made.
+IDEMPOTENT_COMMANDS = ('status', 'metrics', 'ping', 'sync', 'reload-config', 'update',
+                       'hold', 'release')
+
+
+class CommandError(Exception):
+    """A command failed; retryable says whether another attempt may help"""
+
+    def __init__(self, message, retryable, sent=True, retry_after=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.sent = sent
+        self.retry_after = retry_after
+
+
+def read_web_config(path):
+    """Read the string settings from the web UI's PHP config file"""
+    with open(path, 'r') as f:
+        content = f.read()
+    return {key: re.sub(r"\\(.)", r"\1", value)
+            for key, value in re.findall(r"'(\w+)'\s*=>\s*'((?:[^'\\]|\\.)*)'", content)}
+
+
+def load_doors(web_config, names=None):
+    """
+    Read push-enabled doors from the access database.
+
+    Args:
+        web_config: Settings from read_web_config()
+        names: Optional door names to restrict to
+
+    Returns:
+        List of {'name', 'ip_address', 'listen_port', 'api_key'} dicts
+    """
+    ssl_args = {}
+    if web_config.get('sql_ssl_ca'):
+        ssl_args = {'ssl': {'ca': web_config['sql_ssl_ca']}, 'ssl_verify_cert': True}
+    db = pymysql.connect(
+        host=web_config.get('sqladdr', '127.0.0.1'),
+        user=web_config.get('sqluser', 'pidoors'),
+        password=os.environ.get('PIDOORS_DB_PASS') or web_config.get('sqlpass', ''),
+        database=web_config.get('sqldb2', 'access'),
+        connect_timeout=10,
+        cursorclass=pymysql.cursors.DictCursor,
+        **ssl_args
+    )
+    try:
+        with db.cursor() as cursor:
+            cursor.execute(
+                "SELECT name, ip_address, listen_port, api_key FROM doors "
+                "WHERE ip_address IS NOT NULL AND ip_address != '' AND listen_port IS NOT NULL "
+                "AND api_key IS NOT NULL AND api_key != '' ORDER BY name"
+            )
+            doors = cursor.fetchall()
+    finally:
+        db.close()
+
+    if names:
+        wanted = set(names)
+        doors = [d for d in doors if d['name'] in wanted]
+        missing = wanted - {d['name'] for d in doors}
+        if missing:
+            print(f"Warning: no push config for: {', '.join(sorted(missing))}", file=sys.stderr)
+    return doors
+
+
+def command_request(command):
+    """(method, path) for a command name"""
+    if command in GET_COMMANDS:
+        return 'GET', f'/{command}'
+    if command == 'ping':
+        return 'POST', '/ping'
+    return 'POST', f'/cmd/{command}'
+
+
+class DoorConnection:
+    """One keep-alive HTTPS connection to a controller's push listener"""
+
+    def __init__(self, door, ssl_ctx, timeout):
+        self.door = door
+        self.ssl_ctx = ssl_ctx
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+        self.sent = False
+
+    async def close(self):
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (OSError, ssl.SSLError):
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, path):
+        """
+        Send one request and read the response.
+
+        Returns:
+            (HTTP status, decoded body): parsed JSON, or text for /metrics
+
+        Raises:
+            CommandError: Connection, timeout or HTTP failure
+        """
+        self.sent = False
+        try:
+            return await asyncio.wait_for(self._request(method, path), self.timeout)
+        except asyncio.TimeoutError:
+            await self.close()
+            raise CommandError(f'timed out after {self.timeout:g}s', retryable=True, sent=self.sent)
+
+    async def _request(self, method, path):
+        if self.writer is None:
+            try:
+                self.reader, self.writer = await asyncio.open_connection(
+                    self.door['ip_address'], int(self.door['listen_port']),
+                    ssl=self.ssl_ctx, server_hostname=self.door['ip_address'])
+            except (OSError, ssl.SSLError) as e:
+                await self.close()
+                raise CommandError(f'connect failed: {e}', retryable=True, sent=False)
+
+        body = b'{}' if method == 'POST' else b''
+        head = (f"{method} {path} HTTP/1.1\r\n"
+                f"Host: {self.door['ip_address']}\r\n"
+                f"Authorization: Bearer {self.door['api_key']}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n")
+        try:
+            self.writer.write(head.encode() + body)
+            self.sent = True
+            await self.writer.drain()
+            status_line = await self.reader.readline()
+            if not status_line:
+                raise ConnectionResetError('connection closed')
+            status = int(status_line.split()[1])
+            headers = {}
+            while True:
+                line = await self.reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get('content-length', -1))
+            if 0 <= length <= MAX_RESPONSE_BYTES:
+                payload = await self.reader.readexactly(length)
+            else:
+                payload = await self.reader.read(MAX_RESPONSE_BYTES)
+                headers['connection'] = 'close'
+        except (OSError, ssl.SSLError, ValueError, IndexError, asyncio.IncompleteReadError) as e:
+            await self.close()
+            raise CommandError(f'request failed: {e or type(e).__name__}', retryable=True)
+
+        # Controllers before the keep-alive listener close after every response
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+
+        text = payload.decode('utf-8', 'replace')
+        try:
+            result = json.loads(text) if 'json' in headers.get('content-type', '') else text
+        except ValueError:
+            result = text
+        if status >= 400:
+            error = result.get('error') if isinstance(result, dict) else None
+            retry_after = headers.get('retry-after')
+            raise CommandError(f'HTTP {status}' + (f': {error}' if error else ''),
+                               retryable=status >= 500,
+                               retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None)
+        return status, result
+
+
+async def run_door(door, commands, ssl_ctx, timeout, retries):
+    """
+    Send every command to one door in order, stopping at the first failure.
+
+    Returns:
+        Report dict: name, ok, elapsed, attempts, results (per command), error
+    """
+    conn = DoorConnection(door, ssl_ctx, timeout)
+    report = {'name': door['name'], 'ok': True, 'attempts': 0, 'results': {}, 'error': None}
+    started = time.monotonic()
+    try:
+        for command in commands:
+            method, path = command_request(command)
+            delay = RETRY_BACKOFF
+            for attempt in range(retries + 1):
+                report['attempts'] += 1
+                try:
+                    _, result = await conn.request(method, path)
+                    report['results'][command] = result
+                    break
+                except CommandError as e:
+                    last_try = (attempt == retries or not e.retryable
+                                or (e.sent and command not in IDEMPOTENT_COMMANDS))
+                    if last_try:
+                        report['ok'] = False
+                        report['error'] = f'{command}: {e}'
+                        return report
+                    await asyncio.sleep(e.retry_after or delay)
+                    delay *= 2
+    finally:
+        await conn.close()
+        report['elapsed'] = round(time.monotonic() - started, 3)
+    return report
+
+
+async def run_fleet(doors, commands, ssl_ctx, parallel=DEFAULT_PARALLEL,
+                    timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, progress=None):
+    """
+    Run the commands on every door, at most `parallel` doors at a time.
+
+    Args:
+        progress: Optional callback called with each door's report as it finishes
+
+    Returns:
+        List of per-door reports, in door order
+    """
+    limit = asyncio.Semaphore(max(1, parallel))
+
+    async def one(door):
+        async with limit:
+            report = await run_door(door, commands, ssl_ctx, timeout, retries)
+        if progress:
+            progress(report)
+        return report
+
+    return await asyncio.gather(*(one(door) for door in doors))
+
+
+def summarize(reports, wall_time):
+    """Totals and latency figures for a finished run"""
+    elapsed = sorted(r['elapsed'] for r in reports)
+    return {
+        'doors': len(reports),
+        'ok': sum(1 for r in reports if r['ok']),
+        'failed': sum(1 for r in reports if not r['ok']),
+        'retried': sum(1 for r in reports if r['ok'] and r['attempts'] > len(r['results'])),
+        'wall_time': round(wall_time, 3),
+        'door_p50': elapsed[len(elapsed) // 2] if elapsed else None,
+        'door_max': elapsed[-1] if elapsed else None,
+    }
+
+
+def print_report(reports, summary, verbose):
+    """Human-readable per-door lines and summary"""
+    for r in reports:
+        if not r['ok']:
+            print(f"  FAIL  {r['name']:<24} {r['elapsed']:>7.2f}s  {r['error']}")
+        elif verbose:
+            detail = ''
+            status = r['results'].get('status')
+            if isinstance(status, dict):
+                detail = f"version {status.get('version')}, " + ('locked' if status.get('locked') else 'unlocked')
+            print(f"  ok    {r['name']:<24} {r['elapsed']:>7.2f}s  {detail}")
+    print(f"{summary['ok']}/{summary['doors']} doors ok, {summary['failed']} failed, "
+          f"{summary['retried']} needed retries; {summary['wall_time']:.2f}s total "
+          f"(per door p50 {summary['door_p50'] or 0:.2f}s, max {summary['door_max'] or 0:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Send push listener commands to every door controller concurrently.')
+    parser.add_argument('commands', nargs='+', metavar='COMMAND',
+                        help='status, metrics, ping, sync, reload-config, update, unlock, hold, '
+                             'release or gate/<action>; several run in order on each door')
+    parser.add_argument('--doors', help='Comma-separated door names (default: all push-enabled doors)')
+    parser.add_argument('--parallel', type=int, default=DEFAULT_PARALLEL,
+                        help=f'Doors contacted at once (default {DEFAULT_PARALLEL})')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help=f'Seconds per attempt (default {DEFAULT_TIMEOUT:g})')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                        help=f'Retries per command (default {DEFAULT_RETRIES})')
+    parser.add_argument('--config', default=WEB_CONFIG, help=f'Web config file (default {WEB_CONFIG})')
+    parser.add_argument('--ca', default=CA_PATH, help=f'Controller CA certificate (default {CA_PATH})')
+    parser.add_argument('--json', action='store_true', help='Print the full report as JSON')
+    parser.add_argument('-v', '--verbose', action='store_true', help='List successful doors too')
+    args = parser.parse_args()
+
+    for command in args.commands:
+        if not re.fullmatch(r'[a-z-]+(/[a-z]+)?', command):
+            parser.error(f'invalid command: {command}')
+
+    if not MYSQL_AVAILABLE:
+        print("Error: PyMySQL is required (pip install PyMySQL)", file=sys.stderr)
+        return 2
+
+    # Same rule as the web UI: never send a door's api_key over an unverified channel
+    if not os.path.isfile(args.ca) or os.path.getsize(args.ca) == 0:
+        print(f"Error: controller CA {args.ca} is missing; refusing to send API keys", file=sys.stderr)
+        return 2
+    ssl_ctx = ssl.create_default_context(cafile=args.ca)
+
+    try:
+        web_config = read_web_config(args.config)
+        doors = load_doors(web_config, args.doors.split(',') if args.doors else None)
+    except (OSError, pymysql.Error) as e:
+        print(f"Error: could not read doors: {e}", file=sys.stderr)
+        return 2
+    if not doors:
+        print("No push-enabled doors found")
+        return 0
+
+    def progress(report):
+        if not args.json:
+            mark = 'ok' if report['ok'] else 'FAIL'
+            print(f"\r  {mark:<5} {report['name']}".ljust(40), end='', file=sys.stderr, flush=True)
+
+    started = time.monotonic()
+    reports = asyncio.run(run_fleet(doors, args.commands, ssl_ctx, args.parallel,
+                                    args.timeout, args.retries, progress))
+    summary = summarize(reports, time.monotonic() - started)
+
+    if args.json:
+        print(json.dumps({'summary': summary, 'doors': reports}, indent=2, default=str))
+    else:
+        print('\r'.ljust(40) + '\r', end='', file=sys.stderr)
+        print_report(reports, summary, args.verbose)
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())